@@ -0,0 +1,172 @@
+import os
+import gzip
+import json
+import hashlib
+import argparse
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qs, unquote, quote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from build_manifest import build_manifest
+from room_store import LocalRoomStore, BASE_PATH, get_raw_url
+from room_search import search_rooms
+from info_search import InfoSearchIndex, documents_from_manifest
+
+# Read-only JSON API over the rooms, for clients that should not boot a
+# Streamlit session (loco.html, mobile apps).
+#
+#   GET /rooms            [{id, name, points, url}]
+#   GET /rooms/{id}       room info, media (with derivatives) and points
+#   GET /search?q=...     room name matches, then landmark matches
+#
+# Landmark matches carry the plain info text and the [start, end) offsets
+# of the matched words, so clients can mark them up however they render.
+#
+# {id} is the URL-encoded room name. Everything is built once at startup
+# from a local checkout (or manifest.json). /rooms and /rooms/{id} bodies are
+# serialized, gzipped and hashed for their ETag up front, so a request is a
+# dict lookup. Search results are memoized per query.
+
+GZIP_MIN_BYTES = 512
+SEARCH_CACHE_SIZE = 1024
+LANDMARK_LIMIT = 10
+
+
+class Payload:
+    """A JSON response body with its gzip variant and ETag"""
+
+    def __init__(self, data):
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+        self.gzipped = gzip.compress(self.body, mtime=0) if len(self.body) >= GZIP_MIN_BYTES else None
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+
+
+def _media(store, folder, names):
+    media = []
+    for name in names:
+        path = f"{folder}/{name}"
+        variants = store.derivatives_for(path) if store is not None else []
+        media.append({
+            'name': name,
+            'url': get_raw_url(path),
+            'variants': [{'width': width, 'format': fmt, 'url': url} for width, fmt, url in variants],
+        })
+    return media
+
+
+class RoomApi:
+    def __init__(self, manifest, store=None):
+        rooms = manifest['rooms']
+        self.room_names = list(rooms)
+        self.info_index = InfoSearchIndex(documents_from_manifest(manifest))
+        self.rooms = {}
+        summaries = []
+        for room, data in rooms.items():
+            room_path = f"{BASE_PATH}/{room}"
+            url = f"/rooms/{quote(room, safe='')}"
+            summaries.append({'id': room, 'name': room, 'points': len(data['points']), 'url': url})
+            self.rooms[room] = Payload({
+                'id': room,
+                'name': room,
+                'info': data['info'],
+                'media': _media(store, room_path, data['media']),
+                'points': [{
+                    'name': point,
+                    'info': point_data['info'],
+                    'thumbnail': get_raw_url(f"{room_path}/{point}/thumbnail.jpg") if point_data['thumbnail'] else None,
+                    'media': _media(store, f"{room_path}/{point}", point_data['media']),
+                } for point, point_data in data['points'].items()],
+            })
+        self.room_list = Payload(summaries)
+        self.search = lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search)
+
+    def _search(self, query):
+        rooms = search_rooms(self.room_names, query) if query else []
+        landmarks = [{'room': room, 'point': point, 'score': round(score, 3), 'text': text,
+                      'matches': [list(span) for span in spans]}
+                     for score, room, point, text, spans in self.info_index.hits(query, LANDMARK_LIMIT)]
+        return Payload({'query': query, 'rooms': rooms, 'landmarks': landmarks})
+
+    def resolve(self, path, query):
+        """Return the Payload for a request path, or None for 404"""
+        if path in ("/rooms", "/rooms/"):
+            return self.room_list
+        if path.startswith("/rooms/"):
+            return self.rooms.get(unquote(path[len("/rooms/"):]))
+        if path == "/search":
+            return self.search(" ".join(query.get('q', [""])).strip().lower())
+        return None
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # body waits on the client's delayed ACK (about 40 ms)
+    disable_nagle_algorithm = True
+    api = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        payload = self.api.resolve(url.path, parse_qs(url.query))
+        if payload is None:
+            self._send(404, Payload({'error': 'not found'}))
+            return
+        if payload.etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', payload.etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._send(200, payload)
+
+    def _send(self, status, payload):
+        body = payload.body
+        gzipped = payload.gzipped is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('ETag', payload.etag)
+        self.send_header('Cache-Control', 'public, max-age=60')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if gzipped:
+            body = payload.gzipped
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def load_api(root=None, manifest_path=None):
+    """Build the API from a manifest file or by walking root/Rooms"""
+    if manifest_path is not None:
+        with open(manifest_path, encoding="utf-8") as f:
+            return RoomApi(json.load(f))
+    store = LocalRoomStore(root)
+    return RoomApi(build_manifest(store), store)
+
+
+def serve(api, host="127.0.0.1", port=8502):
+    handler = type("Handler", (ApiHandler,), {'api': api})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve rooms, points and media as a read-only JSON API")
+    parser.add_argument("--root", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="repository checkout containing Rooms/")
+    parser.add_argument("--manifest", help="serve from this manifest.json instead of walking Rooms/")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+    api = load_api(args.root, args.manifest)
+    server = serve(api, args.host, args.port)
+    print(f"Serving {len(api.rooms)} rooms on http://{args.host}:{server.server_port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
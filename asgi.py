@@ -0,0 +1,14 @@
+import os
+import streamlit as st
+from starlette.middleware import Middleware
+from static_assets import ImmutableAssetsMiddleware
+
+# ASGI entry point: serves the app like `streamlit run`, but with the
+# vendored assets under /app/static/vendor/ cacheable for a year, which
+# Streamlit's own static route does not allow.
+#
+#   uvicorn asgi:app --host 0.0.0.0 --port 8501
+#
+# APP_SCRIPT picks the script to serve (check.py, or check_no_api.py).
+
+app = st.App(os.environ.get("APP_SCRIPT", "check.py"), middleware=[Middleware(ImmutableAssetsMiddleware)])
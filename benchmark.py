@@ -0,0 +1,223 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+from fake_github import FakeRepo, start
+
+# Measures what a page view or admin action costs in GitHub traffic.
+#
+# Starts fake_github.py on a copy of this checkout's Rooms/, points the
+# apps at it and drives check.py and check_no_api.py headlessly with
+# Streamlit's AppTest. For each scenario it reports the requests made to
+# the Contents, Git Data and raw endpoints, the bytes moved and the wall
+# time. Scenarios over budget fail the run (exit status 1), so a change
+# that brings back per-room listings or per-file commits shows up at once.
+#
+#   python benchmark.py [--latency-ms 20] [--json results.json] [--no-budgets]
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SECRETS = {'github': {'tokens': ["benchmark-token"]}, 'general': {'password': "benchmark-admin"}}
+APP_TIMEOUT = 120
+
+# Upper bounds per scenario: total requests to the fake GitHub, and wall
+# seconds at the default 20 ms latency
+BUDGETS = {
+    'viewer_cold': {'calls': 8, 'seconds': 5},
+    'viewer_warm': {'calls': 3, 'seconds': 2},
+    # The landmark index reads manifest.json once per manifest version
+    'viewer_landmark': {'calls': 10, 'seconds': 5},
+    'no_api_viewer': {'calls': 3, 'seconds': 5},
+    'no_api_probe': {'calls': 30, 'seconds': 5},
+    'admin_tabs': {'calls': 10, 'seconds': 5},
+    'admin_expand_room': {'calls': 3, 'seconds': 3},
+    'admin_upload': {'calls': 30, 'seconds': 30},
+}
+
+
+def reset_caches():
+    """Drop every process-wide cache so the next scenario starts cold"""
+    import streamlit as st
+    import carousel
+    import room_search
+    from http_cache import response_cache
+    from room_snapshot import reset_snapshot
+    response_cache.invalidate()
+    reset_snapshot()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    carousel.carousel_markup.cache_clear()
+    carousel.room_markup.cache_clear()
+    room_search._index_for.cache_clear()
+
+
+def app(script, **session_state):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=APP_TIMEOUT)
+    for section, values in SECRETS.items():
+        at.secrets[section] = values
+    for key, value in session_state.items():
+        at.session_state[key] = value
+    return at
+
+
+def run(at):
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+
+def _fake_upload(name, width=800, height=600):
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (90, 140, 200)).save(buffer, "JPEG")
+    upload = io.BytesIO(buffer.getvalue())
+    upload.name = name
+    upload.type = "image/jpeg"
+    upload.size = len(buffer.getvalue())
+    return upload
+
+
+def _upload_script():
+    # Runs as its own Streamlit script, so check.py's module setup applies
+    import sys
+    import streamlit as st
+    sys.path.insert(0, st.session_state['benchmark_root'])
+    import check
+    results = check.upload_room_files("205", st.session_state['benchmark_files'])
+    st.session_state['benchmark_results'] = [name for name, _, _ in results]
+
+
+class Scenarios:
+    """Each method is one scenario; state carries AppTests between warm runs"""
+
+    def __init__(self, github):
+        self.github = github
+        self.viewer = None
+
+    def viewer_cold(self):
+        reset_caches()
+        self.viewer = run(app("check.py"))
+        self.viewer.text_input[0].input("205")
+        run(self.viewer)
+
+    def viewer_warm(self):
+        self.viewer.text_input[0].input("206")
+        run(self.viewer)
+
+    def viewer_landmark(self):
+        reset_caches()
+        at = run(app("check.py"))
+        at.text_input[0].input("library staircase")
+        run(at)
+
+    def no_api_viewer(self):
+        reset_caches()
+        at = run(app("check_no_api.py"))
+        at.text_input[0].input("205")
+        run(at)
+
+    def no_api_probe(self):
+        from media_prober import MediaProber
+        from room_store import get_raw_url
+        folder = "Rooms/205"
+        MediaProber().probe_media(folder, lambda name: get_raw_url(f"{folder}/{name}"))
+
+    def admin_tabs(self):
+        reset_caches()
+        at = run(app("check.py", page="Admin Page"))
+        for tab in at.tabs[1:]:
+            at.session_state['admin_tab'] = tab.label
+            run(at)
+
+    def admin_expand_room(self):
+        at = run(app("check.py", page="Admin Page", admin_tab="Add Content"))
+        at.session_state['content_room_205'] = True
+        run(at)
+
+    def admin_upload(self):
+        from streamlit.testing.v1 import AppTest
+        at = AppTest.from_function(_upload_script, default_timeout=APP_TIMEOUT)
+        for section, values in SECRETS.items():
+            at.secrets[section] = values
+        at.session_state['benchmark_root'] = ROOT
+        at.session_state['benchmark_files'] = [_fake_upload(f"photo{i}.jpg") for i in range(3)]
+        run(at)
+        if not all(at.session_state['benchmark_results']):
+            raise RuntimeError("upload failed")
+
+
+def measure(github, scenarios, name):
+    github.reset_stats()
+    started = time.perf_counter()
+    getattr(scenarios, name)()
+    seconds = time.perf_counter() - started
+    by_kind = github.stats()
+    return {
+        'scenario': name,
+        'calls': sum(k['calls'] for k in by_kind.values()),
+        'bytes_out': sum(k['bytes_out'] for k in by_kind.values()),
+        'bytes_in': sum(k['bytes_in'] for k in by_kind.values()),
+        'seconds': round(seconds, 3),
+        'by_kind': {kind: k['calls'] for kind, k in sorted(by_kind.items())},
+    }
+
+
+def over_budget(result, latency):
+    budget = BUDGETS.get(result['scenario'])
+    if budget is None:
+        return []
+    problems = []
+    if result['calls'] > budget['calls']:
+        problems.append(f"{result['calls']} calls > {budget['calls']}")
+    # Time budgets are set for the default latency; scale for slower runs
+    seconds = budget['seconds'] * max(1.0, latency / 0.02)
+    if result['seconds'] > seconds:
+        problems.append(f"{result['seconds']}s > {seconds:g}s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page views and admin actions against a fake GitHub")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="delay added to every fake request")
+    parser.add_argument("--scenario", action="append", choices=list(BUDGETS), help="run only these scenarios")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--no-budgets", action="store_true", help="report only, never fail")
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    github, server = start(FakeRepo.from_directory(ROOT), latency)
+    # Must be set before anything imports room_store
+    os.environ['GITHUB_API_URL'] = f"{github.base_url}/api"
+    os.environ['GITHUB_RAW_URL'] = f"{github.base_url}/raw"
+    sys.path.insert(0, ROOT)
+
+    scenarios = Scenarios(github)
+    results = []
+    failed = False
+    print(f"{'scenario':<20}{'calls':>7}{'contents':>10}{'git':>6}{'raw':>6}{'KB out':>10}{'KB in':>9}{'seconds':>9}")
+    for name in args.scenario or list(BUDGETS):
+        if name == 'viewer_warm' and scenarios.viewer is None:
+            scenarios.viewer_cold()
+        result = measure(github, scenarios, name)
+        result['over_budget'] = [] if args.no_budgets else over_budget(result, latency)
+        failed = failed or bool(result['over_budget'])
+        results.append(result)
+        kinds = result['by_kind']
+        print(f"{name:<20}{result['calls']:>7}{kinds.get('contents', 0):>10}{kinds.get('git', 0):>6}"
+              f"{kinds.get('raw', 0):>6}{result['bytes_out'] / 1024:>10.1f}{result['bytes_in'] / 1024:>9.1f}"
+              f"{result['seconds']:>9.3f}  {'; '.join(result['over_budget']) or ''}")
+    server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({'latency_ms': args.latency_ms, 'results': results}, f, indent=2)
+    if failed:
+        print("Over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
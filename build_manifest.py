@@ -0,0 +1,101 @@
+import os
+import json
+import argparse
+from room_store import LocalRoomStore, BASE_PATH, MEDIA_EXTENSIONS, media_sort_key
+from git_data import blob_sha
+
+# Build step for check_no_api.py: walk Rooms/ once and write manifest.json
+# with every room, point, info text and ordered media list, so the viewer
+# renders from one fetched file instead of probing for media names. The
+# admin app rebuilds it the same way for every commit it makes. Each info
+# text is stored with the blob SHA of its info.txt, so a rebuild takes the
+# text from the manifest it replaces only while the file is unchanged, even
+# if it was edited outside the admin app.
+
+MANIFEST_VERSION = 2
+MANIFEST_PATH = "manifest.json"
+
+
+def _media(entries):
+    names = [e['name'] for e in entries
+             if e['type'] == 'file'
+             and e['name'] not in ['info.txt', 'thumbnail.jpg']
+             and e['name'].split('.')[-1].lower() in MEDIA_EXTENSIONS]
+    return sorted(names, key=media_sort_key)
+
+
+def _info(store, path, entries, previous):
+    """Return (info text, info.txt blob SHA) of a folder, reusing previous while the SHA matches"""
+    entry = next((e for e in entries if e['name'] == 'info.txt' and e['type'] == 'file'), None)
+    if entry is None:
+        return None, None
+    if entry['sha'] is not None and previous is not None and previous.get('info_sha') == entry['sha']:
+        return previous.get('info'), entry['sha']
+    text = store.read_text(f"{path}/info.txt")
+    if text is None:
+        return None, None
+    # Local checkouts do not list SHAs; hash the text as git would
+    return text.strip(), entry['sha'] or blob_sha(text.encode())
+
+
+def build_manifest(store, previous=None):
+    """Return the manifest dict for every room in store
+
+    With previous (the manifest being replaced), info texts whose info.txt
+    has the same blob SHA as recorded there are copied from it; the rest
+    are read from store. Media lists always come from store.
+    """
+    old_rooms = previous.get('rooms', {}) if previous is not None else {}
+    rooms = {}
+    for room in sorted(store.list_rooms()):
+        room_path = f"{BASE_PATH}/{room}"
+        old_room = old_rooms.get(room)
+        old_points = old_room.get('points', {}) if old_room is not None else {}
+        points = {}
+        for point in sorted(store.list_points(room)):
+            point_path = f"{room_path}/{point}"
+            entries = store.list_dir(point_path)
+            info, info_sha = _info(store, point_path, entries, old_points.get(point))
+            points[point] = {
+                'info': info,
+                'info_sha': info_sha,
+                'thumbnail': any(e['name'] == 'thumbnail.jpg' for e in entries),
+                'media': _media(entries),
+            }
+        entries = store.list_dir(room_path)
+        info, info_sha = _info(store, room_path, entries, old_room)
+        rooms[room] = {
+            'info': info,
+            'info_sha': info_sha,
+            'media': _media(entries),
+            'points': points,
+        }
+    return {'version': MANIFEST_VERSION, 'rooms': rooms}
+
+
+def manifest_bytes(manifest):
+    """Serialize a manifest the way it is committed"""
+    return (json.dumps(manifest, ensure_ascii=False, separators=(",", ":"), sort_keys=True) + "\n").encode()
+
+
+def write_manifest(manifest, output):
+    with open(output, "wb") as f:
+        f.write(manifest_bytes(manifest))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write manifest.json for the Rooms/ tree")
+    parser.add_argument("--root", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="repository checkout containing Rooms/")
+    parser.add_argument("--output", default="manifest.json")
+    args = parser.parse_args()
+
+    manifest = build_manifest(LocalRoomStore(args.root))
+    write_manifest(manifest, args.output)
+    media_count = sum(len(r['media']) + sum(len(p['media']) for p in r['points'].values())
+                      for r in manifest['rooms'].values())
+    print(f"Wrote {args.output}: {len(manifest['rooms'])} rooms, {media_count} media files")
+
+
+if __name__ == "__main__":
+    main()
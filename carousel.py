@@ -0,0 +1,241 @@
+import re
+import html
+import json
+import hashlib
+from functools import lru_cache
+import streamlit.components.v1 as components
+from derivatives import srcset_sources, smallest_variant
+from static_assets import asset_url
+
+# Swiper carousel markup shared by check.py and check_no_api.py.
+#
+# A room renders as one component: the Swiper assets and the stylesheet are
+# loaded once per page, and every point becomes a section with its own
+# carousel. Markup is memoized by content, so reruns over an unchanged room
+# reuse the same string instead of rebuilding it.
+
+SWIPER_CSS_URL = asset_url("swiper/swiper-bundle.min.css")
+SWIPER_JS_URL = asset_url("swiper/swiper-bundle.min.js")
+
+# Carousel images span the component iframe; cap at the Streamlit column width
+CAROUSEL_SIZES = "(max-width: 730px) 100vw, 730px"
+
+# Neutral grey shown until a slide without derivatives is loaded
+PLACEHOLDER_IMAGE = ("data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 4 3'%3E"
+                     "%3Crect width='4' height='3' fill='%23ddd'/%3E%3C/svg%3E")
+
+# Pixel heights used to size the component iframe
+CAROUSEL_HEIGHT = 480
+SECTION_HEADER_HEIGHT = 290
+EMPTY_SECTION_HEIGHT = 60
+
+
+def _minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{}:;,>])\s*", r"\1", css).replace(";}", "}").strip()
+
+
+CAROUSEL_CSS = _minify_css("""
+    body {
+        margin: 0;
+        font-family: "Source Sans Pro", sans-serif;
+    }
+    .swiper {
+        width: 100%;
+        height: auto;
+    }
+    .swiper-slide {
+        text-align: center;
+        display: flex;
+        justify-content: center;
+        align-items: center;
+    }
+    .swiper-slide img, .swiper-slide video {
+        max-height: 400px;
+        width: 100%;
+        border-radius: 10px;
+        box-shadow: 0px 5px 15px rgba(0,0,0,0.2);
+        object-fit: contain;
+    }
+    .swiper-pagination-fraction {
+        font-size: 18px;
+        font-weight: bold;
+        color: white;
+        text-shadow: 0 0 5px rgba(0,0,0,0.5);
+    }
+    .swiper-button-next,
+    .swiper-button-prev {
+        width: 30px;
+        height: 30px;
+        background-color: rgba(0, 0, 0, 0.4);
+        border-radius: 50%;
+    }
+    .swiper-button-next:after,
+    .swiper-button-prev:after {
+        font-size: 20px;
+        color: white;
+    }
+    .swiper-zoom-container {
+        cursor: zoom-in;
+    }
+    .swiper-slide-zoomed .swiper-zoom-container {
+        cursor: move;
+    }
+    .point-title {
+        color: green;
+        margin: 12px 0 8px;
+    }
+    .point-row {
+        display: flex;
+        gap: 16px;
+        align-items: flex-start;
+    }
+    .point-row img {
+        width: 200px;
+    }
+    .point-info-title {
+        color: #0D92F4;
+        margin: 0 0 8px;
+    }
+    .point-info {
+        margin: 0;
+        font-size: 14px;
+    }
+    .point-empty {
+        padding: 12px;
+        border-radius: 8px;
+        background: rgba(28, 131, 225, 0.1);
+        color: #004280;
+    }
+    hr {
+        border: 1px solid gray;
+        margin: 0;
+    }
+    @media screen and (max-width: 600px) {
+        .swiper-slide img, .swiper-slide video {
+            max-height: 300px;
+        }
+    }
+""")
+
+# Initialises every carousel on the page. The first one marked eager starts
+# at once; the others wait until they scroll into view. The implicit root of
+# an IntersectionObserver is the top-level viewport, so this also works from
+# inside the component iframe.
+CAROUSEL_JS = """
+document.querySelectorAll('.swiper').forEach((el) => {
+  const swiper = new Swiper(el, {
+    init: false,
+    rewind: true,
+    preloadImages: false,
+    lazy: {loadPrevNext: true, loadPrevNextAmount: 1, loadOnTransitionStart: true},
+    zoom: el.dataset.zoom === 'true',
+    pagination: {el: el.querySelector('.swiper-pagination'), type: 'fraction'},
+    navigation: {nextEl: el.querySelector('.swiper-button-next'), prevEl: el.querySelector('.swiper-button-prev')},
+  });
+  if (el.dataset.eager === 'true' || !('IntersectionObserver' in window)) {
+    swiper.init();
+    return;
+  }
+  const observer = new IntersectionObserver((entries) => {
+    if (entries.some((entry) => entry.isIntersecting)) {
+      observer.disconnect();
+      swiper.init();
+    }
+  }, {rootMargin: '200px'});
+  observer.observe(el);
+});
+"""
+
+
+def media_item(file):
+    """Convert a Contents-API-style entry (with optional 'variants') to a hashable item"""
+    return (file['name'], file['download_url'], tuple(file.get('variants', ())))
+
+
+def media_items_from_urls(urls):
+    return tuple((url.rsplit('/', 1)[-1], url, ()) for url in urls)
+
+
+def _slide(item, zoom, eager):
+    name, url, variants = item
+    if name.split('.')[-1].lower() in ['mp4', 'webm']:
+        media_html = (f'<video controls preload="{"metadata" if eager else "none"}">'
+                      f'<source src="{html.escape(url)}" type="video/mp4"></video>')
+    else:
+        # Let the browser pick a derivative that fits its viewport
+        sources = "".join(
+            f'<source type="{source["type"]}" data-srcset="{html.escape(source["srcset"])}" sizes="{CAROUSEL_SIZES}">'
+            for source in srcset_sources(variants)
+        )
+        placeholder = smallest_variant(variants) or PLACEHOLDER_IMAGE
+        media_html = (f'<div class="{"swiper-zoom-container" if zoom else ""}"><picture>{sources}'
+                      f'<img class="swiper-lazy" src="{html.escape(placeholder)}" data-src="{html.escape(url)}">'
+                      f'</picture><div class="swiper-lazy-preloader swiper-lazy-preloader-white"></div></div>')
+    return f'<div class="swiper-slide">{media_html}</div>'
+
+
+@lru_cache(maxsize=512)
+def carousel_markup(items, zoom=True, eager=True):
+    """Return the markup of one carousel; memoized by (items, zoom, eager)"""
+    content_hash = hashlib.sha1(json.dumps([items, zoom]).encode()).hexdigest()[:12]
+    slides = "".join(_slide(item, zoom, eager) for item in items)
+    return (f'<div class="swiper" id="c{content_hash}" data-zoom="{str(zoom).lower()}" '
+            f'data-eager="{str(eager).lower()}"><div class="swiper-wrapper">{slides}</div>'
+            '<div class="swiper-pagination"></div><div class="swiper-button-next"></div>'
+            '<div class="swiper-button-prev"></div></div>')
+
+
+def page_html(body, css_url=SWIPER_CSS_URL, js_url=SWIPER_JS_URL):
+    """Wrap body in a page that loads the Swiper assets and stylesheet once"""
+    return (f'<link rel="stylesheet" href="{css_url}"><style>{CAROUSEL_CSS}</style>{body}'
+            f'<script src="{js_url}"></script><script>{CAROUSEL_JS}</script>')
+
+
+def _section(section, eager):
+    title, thumbnail, info, intro, items = section
+    thumb = f'<img src="{html.escape(thumbnail)}" loading="lazy">' if thumbnail else ""
+    body = (f'<h4 class="point-title">From Point:</h4><div class="point-row">{thumb}<div>'
+            f'<h5 class="point-info-title">Location Info :</h5><h6 class="point-info">{html.escape(info)}</h6>'
+            '</div></div>')
+    if items:
+        body += f'<h5>Photos</h5>{f"<p>{html.escape(intro)}</p>" if intro else ""}{carousel_markup(items, True, eager)}'
+    else:
+        body += f'<p class="point-empty">No media available in {html.escape(title)}</p>'
+    return body + '<hr>'
+
+
+def sections_markup(sections):
+    """Return (body, height) for a sequence of sections without page assets
+
+    sections holds (title, thumbnail URL, info, intro, items) tuples; only
+    the first section with media gets an eagerly loaded carousel.
+    """
+    parts = []
+    height = 0
+    eager = True
+    for section in sections:
+        items = section[4]
+        parts.append(_section(section, eager and bool(items)))
+        if items:
+            eager = False
+        height += SECTION_HEADER_HEIGHT + (CAROUSEL_HEIGHT if items else EMPTY_SECTION_HEIGHT)
+    return "".join(parts), height
+
+
+@lru_cache(maxsize=128)
+def room_markup(sections):
+    """Return (html, height) for all points of a room in one page"""
+    body, height = sections_markup(sections)
+    return page_html(body), height
+
+
+def render_room(sections):
+    markup, height = room_markup(tuple(sections))
+    if sections:
+        components.html(markup, height=height)
+
+
+def render_carousel(items, zoom=False, eager=True):
+    components.html(page_html(carousel_markup(tuple(items), zoom, eager)), height=500)
@@ -1,245 +1,383 @@
 import os
-import base64
+import json
 import requests
 import streamlit as st
 from pathlib import Path
 import time
-import streamlit.components.v1 as components
-import string
+from token_pool import TokenPool, TokenPoolSession
+from room_store import API_URL, GitHubRoomStore, default_room_store, get_raw_url, media_sort_key
+from room_snapshot import SnapshotRoomStore, cached_text, load_snapshot, tree_listing
+from http_cache import cached_get, response_cache
+from http_metrics import metrics, start_metrics_server
+from git_data import GitDataClient, GitDataError, blob_entry, blob_sha
+from build_manifest import MANIFEST_PATH, build_manifest, manifest_bytes
+from media_sequence import SequenceAllocator, first_free_range, is_media_name, next_index, sequence_name
+from derivatives import derivative_path, derivatives_among, is_image, make_derivatives, smallest_variant
+from upload_pipeline import UploadExecutor, call_with_retries
+from streaming_upload import check_upload_size
+from static_assets import asset_url
+from room_search import search_rooms
+from info_search import InfoSearchIndex, documents_from_manifest, documents_from_store
+from carousel import media_item, render_carousel, render_room
 # Configuration
 
-GITHUB_TOKENS = st.secrets["github"]["tokens"]
-def get_active_github_token():
-    for token in GITHUB_TOKENS:
-        headers = {
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github+json"
-        }
-        resp = requests.get("https://api.github.com/rate_limit", headers=headers)
-        if resp.status_code == 200:
-            code_scan = resp.json()["resources"]["code_scanning_upload"]
-            if code_scan["remaining"] > 0:
-                return token, code_scan["remaining"]
-    return None  # All tokens exhausted
+@st.cache_resource
+def get_github_session():
+    """Process-wide GitHub session backed by the token pool
 
-# On app load
-GITHUB_TOKEN,TOKEN_REMAIN = get_active_github_token()
+    Created on first use and shared by every session; quota is tracked from
+    response headers, so no /rate_limit calls are made up front.
+    """
+    return TokenPoolSession(TokenPool(st.secrets["github"]["tokens"]))
+
+GITHUB = get_github_session()
+
+# Set METRICS_PORT to expose the outbound request metrics to Prometheus
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+
+@st.cache_resource
+def get_metrics_server():
+    """Start the /metrics endpoint once per process"""
+    return start_metrics_server(METRICS_PORT) if METRICS_PORT else None
+
+get_metrics_server()
 
 
 GITHUB_REPO = "2005lakshmi/locorom"
 BASE_PATH = "Rooms"
-HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
+LOGO_URL = asset_url("logo_locorom.png")
+
+# Viewer reads come from the tree snapshot of the branch head, falling back
+# to the local checkout (or the Contents API) if the snapshot is unavailable.
+# Admin reads that precede a write always go to GitHub so they see the live
+# branch.
+FALLBACK_STORE = default_room_store(session=GITHUB)
+GITHUB_STORE = GitHubRoomStore(session=GITHUB)
+
+
+def read_blob_text(sha):
+    return GIT_DATA.get_blob(sha).decode()
+
+
+def with_manifest(base_tree, entries):
+    """Add manifest.json, rebuilt for the tree a commit produces, to its entries
+
+    Every admin write goes through here, so the manifest check_no_api.py
+    reads is never behind the tree. Info texts are carried over from the
+    manifest being replaced while their info.txt blob SHA is unchanged.
+    """
+    blobs = dict(base_blobs(base_tree))
+    for entry in entries:
+        if entry['sha'] is None:
+            blobs.pop(entry['path'], None)
+        else:
+            blobs[entry['path']] = entry['sha']
+    store = SnapshotRoomStore(None, tree_listing(blobs), read_blob=read_blob_text)
+    try:
+        previous = json.loads(store.read_text(MANIFEST_PATH) or "null")
+    except ValueError:
+        previous = None
+    content = manifest_bytes(build_manifest(store, previous))
+    if blobs.get(MANIFEST_PATH) == blob_sha(content):
+        return entries
+    sha = create_text_blob(content.decode())
+    return entries + [blob_entry(MANIFEST_PATH, sha)]
+
+
+GIT_DATA = GitDataClient(session=GITHUB, finish_entries=with_manifest)
+
+def get_room_store():
+    snapshot = load_snapshot(session=GITHUB)
+    return snapshot if snapshot is not None else FALLBACK_STORE
 
 # Helper functions
 # Add this to the get_github_files function
 
 
 def get_github_files(path):
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{path}"
-    response = requests.get(url, headers=HEADERS)
+    url = f"{API_URL}/repos/{GITHUB_REPO}/contents/{path}"
+    # Always revalidate: admin writes need the live listing, and a 304 is free
+    response = cached_get(url, ttl=0, session=GITHUB)
     return response.json() if response.status_code == 200 else []
 
+def create_text_blob(text):
+    """Create a blob for a text file, remembering its text for later reads"""
+    sha = call_with_retries(GIT_DATA.create_blob, text.encode())
+    cached_text(sha, lambda: text)
+    return sha
+
 def create_room_folder(room_name):
-    folder_path = f"{BASE_PATH}/{room_name}"
-    info_file_path = f"{folder_path}/info.txt"
-    content = base64.b64encode("".encode()).decode()
-    data = {
-        "message": f"Create room {room_name}",
-        "content": content
-    }
-    response = requests.put(
-        f"https://api.github.com/repos/{GITHUB_REPO}/contents/{info_file_path}",
-        json=data,
-        headers=HEADERS
-    )
-    return response.status_code == 201
+    """Create a room with an empty info.txt; False if it already exists"""
+    info_file_path = f"{BASE_PATH}/{room_name}/info.txt"
 
-def get_subfolders(room_name):
-    contents = get_github_files(f"{BASE_PATH}/{room_name}")
-    return [item['name'] for item in contents if item['type'] == 'dir']
+    def entries(base_tree):
+        if info_file_path in base_blobs(base_tree):
+            raise GitDataError(f"Room {room_name} already exists")
+        return [blob_entry(info_file_path, info_sha)]
+
+    try:
+        info_sha = create_text_blob("")
+        GIT_DATA.commit_tree_entries(f"Create room {room_name}", entries)
+        return True
+    except (GitDataError, requests.RequestException):
+        return False
+
+def get_subfolders(room_name, store=None):
+    store = store or get_room_store()
+    return store.list_points(room_name)
 
 def create_subfolder(room_name, sub_name, thumbnail_file, info_content):
     try:
         sub_path = f"{BASE_PATH}/{room_name}/{sub_name}"
-        
-        # Create thumbnail
         thumbnail_path = f"{sub_path}/thumbnail.jpg"
-        content = base64.b64encode(thumbnail_file.getvalue()).decode()
-        data = {
-            "message": f"Create subfolder {sub_name} in {room_name}",
-            "content": content
-        }
-        response = requests.put(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{thumbnail_path}",
-            json=data,
-            headers=HEADERS
-        )
-        if response.status_code != 201:
-            return False
-
-        # Create info file
-        info_path = f"{sub_path}/info.txt"
-        encoded_info = base64.b64encode(info_content.encode()).decode()
-        data_info = {
-            "message": f"Add info for subfolder {sub_name}",
-            "content": encoded_info
-        }
-        response_info = requests.put(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{info_path}",
-            json=data_info,
-            headers=HEADERS
-        )
-        return response_info.status_code == 201
+        check_upload_size(thumbnail_file)
+
+        snapshot = load_snapshot(max_age=0, session=GITHUB)
+        thumbnail_sha, derived, _ = upload_media_blobs(thumbnail_file.getvalue(), thumbnail_path, snapshot, sub_path)
+        info_sha = create_text_blob(info_content)
+
+        # Thumbnail, its derivatives and info land together, so a point is
+        # never half-created
+        GIT_DATA.commit_tree_entries(
+            f"Create subfolder {sub_name} in {room_name}",
+            lambda base_tree: media_entries(thumbnail_path, thumbnail_sha, derived, base_blobs(base_tree))
+            + [blob_entry(f"{sub_path}/info.txt", info_sha)])
+        return True
     except Exception as e:
         st.error(f"Error creating subfolder: {str(e)}")
         return False
 
-def get_subfolder_info(room_name, subfolder):
+def get_subfolder_info(room_name, subfolder, store=None):
+    store = store or get_room_store()
     info_path = f"{BASE_PATH}/{room_name}/{subfolder}/info.txt"
-    response = requests.get(
-        f"https://api.github.com/repos/{GITHUB_REPO}/contents/{info_path}",
-        headers=HEADERS
-    )
-    if response.status_code == 200:
-        return base64.b64decode(response.json()['content']).decode()
-    return ""
+    content = store.read_text(info_path)
+    return content if content is not None else ""
 
 def update_subfolder_info(room_name, subfolder, content):
     info_path = f"{BASE_PATH}/{room_name}/{subfolder}/info.txt"
-    current_content = get_github_files(info_path)
-    sha = current_content['sha'] if 'sha' in current_content else None
-    encoded = base64.b64encode(content.encode()).decode()
-    data = {
-        "message": "Update info.txt",
-        "content": encoded,
-        "sha": sha
-    }
-    response = requests.put(
-        f"https://api.github.com/repos/{GITHUB_REPO}/contents/{info_path}",
-        json=data,
-        headers=HEADERS
-    )
-    return response.status_code == 200
+    try:
+        GIT_DATA.commit_tree_entries("Update info.txt", [blob_entry(info_path, create_text_blob(content))])
+        return True
+    except (GitDataError, requests.RequestException):
+        return False
 
 def delete_subfolder(subfolder_path):
-    """Delete a subfolder and its contents recursively"""
+    """Delete a subfolder and its contents in a single commit"""
     try:
-        contents = get_github_files(subfolder_path)
-        success = True
-        for item in contents:
-            if item['type'] == 'file':
-                if not delete_file(item['path'], item['sha']):
-                    success = False
-            elif item['type'] == 'dir':
-                if not delete_subfolder(f"{subfolder_path}/{item['name']}"):
-                    success = False
-        return success
-    except Exception as e:
+        get_name_allocator().forget(subfolder_path)
+        return GIT_DATA.delete_prefix(subfolder_path, f"Delete {subfolder_path}") is not None
+    except (GitDataError, requests.RequestException) as e:
         st.error(f"Error deleting subfolder: {str(e)}")
         return False
 
 def delete_room(room_name):
-    """Delete a room and all its contents"""
+    """Delete a room and all its contents in a single commit"""
     try:
-        contents = get_github_files(f"{BASE_PATH}/{room_name}")
-        success = True
-        for item in contents:
-            if item['type'] == 'file':
-                if not delete_file(item['path'], item['sha']):
-                    success = False
-            elif item['type'] == 'dir':
-                if not delete_subfolder(f"{BASE_PATH}/{room_name}/{item['name']}"):
-                    success = False
-        return success
-    except Exception as e:
+        get_name_allocator().forget(f"{BASE_PATH}/{room_name}")
+        return GIT_DATA.delete_prefix(f"{BASE_PATH}/{room_name}", f"Delete room {room_name}") is not None
+    except (GitDataError, requests.RequestException) as e:
         st.error(f"Error deleting room: {str(e)}")
         return False
-        
 
 
-def next_alphabetical_filename(existing_files):
-    """Find the next available alphabetical filename (a, b, ..., z, aa, ab, ...)"""
-    existing_names = [
-        f['name'].split('.')[0]
-        for f in existing_files
-        if (
-            f['type'] == 'file' 
-            and f['name'] not in ['info.txt', 'thumbnail.jpg']  # Add exclusion
-            and all(c in string.ascii_lowercase for c in f['name'].split('.')[0])
-        )
-    ]
-    existing_names = sorted(existing_names)
-    
 
-    if not existing_names:
-        return 'a'  # Start with 'a' if no valid files exist
-
-    last_name = existing_names[-1]
-
-    # Convert last name to next alphabetic sequence
-    if last_name == 'z':
-        return 'aa'
-    elif len(last_name) > 1 and all(c == 'z' for c in last_name):
-        return 'a' * (len(last_name) + 1)
-    else:
-        last_char_list = list(last_name)
-        for i in range(len(last_char_list)-1, -1, -1):
-            if last_char_list[i] != 'z':
-                last_char_list[i] = chr(ord(last_char_list[i]) + 1)
-                # Reset all characters to the right to 'a'
-                for j in range(i+1, len(last_char_list)):
-                    last_char_list[j] = 'a'
-                return ''.join(last_char_list)
-            last_char_list[i] = 'a'  # Reset 'z' to 'a' and continue left
-        
-        # If all characters were 'z' (e.g., 'zz'), return 'aaa'
-        return 'a' * (len(last_char_list) + 1)
+@st.cache_resource
+def get_name_allocator():
+    """Process-wide next-free-name counters for media folders"""
+    return SequenceAllocator()
+
+def list_file_names(path):
+    return [f['name'] for f in get_github_files(path) if f['type'] == 'file']
+
+def in_carousel(path, folder):
+    """True if path is one of the media files shown in folder's carousel"""
+    parent, _, name = path.rpartition("/")
+    return parent == folder and is_media_name(name)
+
+
+def find_duplicate(snapshot, sha, folder):
+    """Return a Rooms/ file with exactly this content, preferring one in folder's carousel
+
+    Only a match in the carousel means the file is already there; any other
+    match (a thumbnail, another point) can still be referenced by a new name.
+    """
+    paths = snapshot.paths_for_blob(sha) if snapshot is not None else []
+    for path in paths:
+        if in_carousel(path, folder):
+            return path
+    return paths[0] if paths else None
+
+
+def existing_derivatives(snapshot, path):
+    """Return {(width, fmt): blob SHA} of the derivatives already made for path"""
+    derived = {}
+    for width, fmt, _ in snapshot.derivatives_for(path):
+        sha = snapshot.blobs.get(derivative_path(path, width, fmt))
+        if sha is not None:
+            derived[(width, fmt)] = sha
+    return derived
+
+
+def upload_media_blobs(content, filename, snapshot, folder):
+    """Create the blobs for one file and its derivatives
+
+    Returns (blob SHA, {(width, fmt): blob SHA}, path of a Rooms/ file with
+    the same content or None). Content already in Rooms/ is not sent again,
+    nor are its derivatives when it has them. Blobs are content addressed,
+    so every call here is safe to retry.
+    """
+    sha = blob_sha(content)
+    duplicate = find_duplicate(snapshot, sha, folder)
+    if duplicate is None:
+        sha = call_with_retries(GIT_DATA.create_blob, content)
+    derived = existing_derivatives(snapshot, duplicate) if duplicate is not None else {}
+    if is_image(filename) and not derived:
+        for key, data in make_derivatives(content).items():
+            derived[key] = call_with_retries(GIT_DATA.create_blob, data)
+    return sha, derived, duplicate
+
+
+def base_blobs(base_tree):
+    """Return {path: blob SHA} of the tree a commit is based on
+
+    Usually that is the tree of the snapshot just revalidated, so no extra
+    listing is needed.
+    """
+    snapshot = load_snapshot(session=GITHUB)
+    if snapshot is not None and snapshot.tree_sha == base_tree:
+        return snapshot.blobs
+    return GIT_DATA.tree_blobs(base_tree)
+
+
+def media_entries(path, sha, derived, blobs):
+    """Tree entries that put a file and its derivatives at path
+
+    Derivatives left at path by an earlier file, at widths or formats this
+    one does not have, are removed so they never show the old picture.
+    """
+    entries = [blob_entry(path, sha)]
+    written = set()
+    for (width, fmt), derived_sha in derived.items():
+        written.add(derivative_path(path, width, fmt))
+        entries.append(blob_entry(derivative_path(path, width, fmt), derived_sha))
+    entries += [blob_entry(stale, None) for stale in derivatives_among(blobs, path) if stale not in written]
+    return entries
+
+
+def upload_room_files(room, uploaded_files, subfolder=None, on_progress=None):
+    """Upload several files in parallel as one commit
+
+    Blobs are created concurrently with retries; names are then given to
+    the files that made it, in selection order, so a failed file leaves no
+    gap in the sequence. Each file's blob SHA is computed locally first:
+    exact copies of a file already in this folder (or earlier in the
+    selection) are skipped, and copies of a file elsewhere in Rooms/ point
+    at its blobs without uploading anything. Returns [(assigned name or
+    None, error or None, path of the identical file or None)] in selection
+    order; a skipped file gets the name of its existing copy.
+    on_progress(index, result, error) runs as each file finishes.
+    """
+    base_path = f"{BASE_PATH}/{room}"
+    if subfolder:
+        base_path += f"/{subfolder}"
+    snapshot = load_snapshot(max_age=0, session=GITHUB)
+
+    def work(uploaded_file):
+        check_upload_size(uploaded_file)
+        # Images are decoded for derivatives anyway; anything else is streamed
+        content = uploaded_file.getvalue() if is_image(uploaded_file.name) else uploaded_file
+        return upload_media_blobs(content, uploaded_file.name, snapshot, base_path)
+
+    outcomes = UploadExecutor().run(uploaded_files, work, on_progress)
+
+    # Files with content already in this folder get no new name: same_as
+    # holds the existing path, or the index of an earlier copy in the batch
+    same_as = [None] * len(outcomes)
+    first_with_sha = {}
+    for index, (blobs, error) in enumerate(outcomes):
+        if error is not None:
+            continue
+        sha, _, duplicate = blobs
+        if duplicate is not None and in_carousel(duplicate, base_path):
+            same_as[index] = duplicate
+        elif sha in first_with_sha:
+            same_as[index] = first_with_sha[sha]
+        else:
+            first_with_sha[sha] = index
+    uploaded = len(first_with_sha)
+    if not uploaded:
+        return [(path.rpartition("/")[2] if path else None, error, path)
+                for (_, error), path in zip(outcomes, same_as)]
+
+    allocator = get_name_allocator()
+    # Start of the names reserved for the batch, and the results using them
+    reservation = []
+    named = []
+
+    def name_batch(start):
+        """Return ([(path, blob SHA, derivatives)], results) with names from start"""
+        placed = []
+        results = []
+        index = start
+        for uploaded_file, (blobs, error), existing in zip(uploaded_files, outcomes, same_as):
+            if error is not None:
+                results.append((None, error, None))
+                continue
+            if isinstance(existing, int):
+                existing = f"{base_path}/{results[existing][0]}"
+            if existing is not None:
+                results.append((existing.rpartition("/")[2], None, existing))
+                continue
+            ext = uploaded_file.type.split('/')[-1].lower()
+            if ext == 'jpeg':
+                ext = 'jpg'
+            filename = f"{sequence_name(index)}.{ext}"
+            index += 1
+            sha, derived, duplicate = blobs
+            placed.append((f"{base_path}/{filename}", sha, derived))
+            results.append((filename, None, duplicate))
+        return placed, results
+
+    def entries(base_tree):
+        # The counter may predate files another process added, and a batch
+        # may run into a hand-inserted name: names are checked against the
+        # tree this commit builds on, every attempt
+        blobs = base_blobs(base_tree)
+        prefix = base_path + "/"
+        names = [path[len(prefix):] for path in blobs
+                 if path.startswith(prefix) and "/" not in path[len(prefix):]]
+        start = reservation[0]
+        while start < next_index(names) or first_free_range(names, start, uploaded) != start:
+            allocator.release(base_path, start, uploaded)
+            allocator.seed(base_path, first_free_range(names, max(start, next_index(names)), uploaded))
+            start = allocator.reserve(base_path, uploaded, lambda: list_file_names(base_path))
+        reservation[0] = start
+        placed, results = name_batch(reservation[0])
+        named[:] = results
+        # Ship the responsive derivatives in the same commit
+        return [entry for path, sha, derived in placed
+                for entry in media_entries(path, sha, derived, blobs)]
 
-def upload_room_file(room, uploaded_file, file_type, subfolder=None):
-    """Upload file to room or subfolder with alphabetical filenames"""
     try:
-        ext = file_type.split('/')[-1].lower()
-        if ext == 'jpeg':
-            ext = 'jpg'
-            
-        base_path = f"{BASE_PATH}/{room}"
-        if subfolder:
-            base_path += f"/{subfolder}"
-            
-        # Get next available alphabetical filename
-        files = get_github_files(base_path)
-        next_filename = next_alphabetical_filename(files)
+        # One O(1) reservation names the whole batch
+        reservation.append(allocator.reserve(base_path, uploaded, lambda: list_file_names(base_path)))
+        GIT_DATA.commit_tree_entries(f"Add {uploaded} files to {base_path}", entries)
+        return named
 
-        file_path = f"{base_path}/{next_filename}.{ext}"
-        content = base64.b64encode(uploaded_file.read()).decode()
-        
-        data = {
-            "message": f"Add file {next_filename}.{ext} to {base_path}",
-            "content": content
-        }
-        
-        response = requests.put(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}",
-            json=data,
-            headers=HEADERS
-        )
-        return response.status_code == 201
-        
-    except Exception as e:
-        st.error(f"Upload error: {str(e)}")
-        return False
+    except (GitDataError, requests.RequestException) as e:
+        # Nothing was committed, so no file made it and the names are unused
+        if reservation:
+            allocator.release(base_path, reservation[0], uploaded)
+        return [(None, error or e, None) for _, error in outcomes]
 
         
-def get_room_info(room_name):
+def get_room_info(room_name, store=None):
     """Get room information from info.txt"""
+    store = store or get_room_store()
     info_path = f"{BASE_PATH}/{room_name}/info.txt"
     try:
-        response = requests.get(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{info_path}",
-            headers=HEADERS
-        )
-        if response.status_code == 200:
-            content = base64.b64decode(response.json()['content']).decode()
+        content = store.read_text(info_path)
+        if content is not None:
             return content
         return "No information available"
     except Exception as e:
@@ -247,16 +385,11 @@ def get_room_info(room_name):
         return "Information unavailable"
 
 def delete_file(file_path, sha):
-    """Delete a file from GitHub repository"""
+    """Delete a file and its derivatives, if it still has the content listed"""
     try:
-        url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}"
-        data = {
-            "message": f"Delete file {Path(file_path).name}",
-            "sha": sha
-        }
-        response = requests.delete(url, json=data, headers=HEADERS)
-        return response.status_code == 200
-    except Exception as e:
+        GIT_DATA.delete_paths({file_path: sha}, f"Delete file {Path(file_path).name}")
+        return True
+    except (GitDataError, requests.RequestException) as e:
         st.error(f"Delete failed: {str(e)}")
         return False
 
@@ -264,359 +397,103 @@ def delete_file(file_path, sha):
 
 def display_main_content(room_name):
     """Display main content for a room with subfolders"""
+    # Render the whole room from one snapshot
+    store = get_room_store()
+
     # Get room info
-    info_content = get_room_info(room_name)
-    
+    info_content = get_room_info(room_name, store)
+
+    # Every point of the room goes into a single component
+    sections = []
+
     # Main Area Section
-    #st.markdown("### From Point:")
-    main_files = get_github_files(f"{BASE_PATH}/{room_name}")
+    main_files = store.list_dir(f"{BASE_PATH}/{room_name}")
     
     # Filter out info.txt and include only media files
-    main_media = [f for f in main_files 
+    main_media = with_variants(store, [f for f in main_files 
                  if f['name'] != 'info.txt' 
-                 and f['name'].split('.')[-1].lower() in ['jpg', 'jpeg', 'png', 'gif', 'mp4']]
+                 and f['name'].split('.')[-1].lower() in ['jpg', 'jpeg', 'png', 'gif', 'mp4']])
     
     # Show thumbnail and info in row
     if main_media:
-        st.markdown("<h4 style='color: green;'>From Point:</h4>", unsafe_allow_html=True)
-
-        col1, col2 = st.columns([2, 3])
-        with col1:
-            first_file = main_media[0]
-            st.image(first_file['download_url'], width=200)
-        with col2:
-            st.markdown("<h5 style='color:#0D92F4;'>Location Info :</h5>", unsafe_allow_html=True)
-
-            st.markdown(f"###### {info_content}")
-            
-        # Main Area Carousel
-        st.markdown("##### Photos ")
-        st.write("Path through Photos")
-        display_carousel(main_media, zoom=True)
-        st.markdown("<hr style='border: 1px solid gray; margin: 0px 0;'>", unsafe_allow_html=True)
-
-    #else:
-    #   st.info("No media available in main area")
+        first_file = main_media[0]
+        thumbnail = smallest_variant(first_file['variants']) or first_file['download_url']
+        sections.append((room_name, thumbnail, info_content, "Path through Photos",
+                         tuple(media_item(f) for f in main_media)))
 
     # Subfolders Section
-    subfolders = get_subfolders(room_name)
+    subfolders = get_subfolders(room_name, store)
     for sub in subfolders:
-        st.markdown("<h4 style='color: green;'>From Point:</h4>", unsafe_allow_html=True)
-
         sub_path = f"{BASE_PATH}/{room_name}/{sub}"
-        sub_files = get_github_files(sub_path)
+        sub_files = store.list_dir(sub_path)
         
         # Filter subfolder files
-        sub_media = [f for f in sub_files 
+        sub_media = with_variants(store, [f for f in sub_files 
                     if f['name'] not in ['info.txt', 'thumbnail.jpg'] 
-                    and f['name'].split('.')[-1].lower() in ['jpg', 'jpeg', 'png', 'gif', 'mp4']]
+                    and f['name'].split('.')[-1].lower() in ['jpg', 'jpeg', 'png', 'gif', 'mp4']])
         
         # Subfolder thumbnail and info
-        col1, col2 = st.columns([2, 3])
-        with col1:
-            thumbnail_url = f"https://raw.githubusercontent.com/{GITHUB_REPO}/main/{sub_path}/thumbnail.jpg"
-            st.image(thumbnail_url, width=200)
-            
-
-        with col2:
-            sub_info = get_subfolder_info(room_name, sub)
-            st.markdown("<h5 style='color:#0D92F4;'>Location Info :</h5>", unsafe_allow_html=True)
-            st.markdown(f"###### {sub_info}")
-        
-        # Subfolder media carousel
-        if sub_media:
-            st.markdown("##### Photos")
-            display_carousel(sub_media, zoom=True)
-        else:
-            st.info(f"No media available in {sub}")
-        st.markdown("<hr style='border: 1px solid gray; margin: 0px 0;'>", unsafe_allow_html=True)
-
-
-def display_carousel(files, zoom=False):
-    """Display media files in a carousel with zoom capability"""
-    carousel_items = ""
-    for file in files:
-        ext = file['name'].split('.')[-1].lower()
-        if ext == "mp4":
-            media_html = f"""
-                <video controls style="max-height: 400px; width: 100%;">
-                    <source src="{file['download_url']}" type="video/mp4">
-                </video>
-            """
-        else:
-            zoom_class = "swiper-zoom-container" if zoom else ""
-            media_html = f'''
-            <div class="{zoom_class}">
-                <img src="{file['download_url']}" 
-                     style="max-height: 400px; width: 100%; object-fit: contain;">
-            </div>
-            '''
-        carousel_items += f'<div class="swiper-slide">{media_html}</div>'
-
-    carousel_html = f"""
-    <link rel="stylesheet" href="https://unpkg.com/swiper@8/swiper-bundle.min.css">
-    <style>
-        .swiper {{
-            width: 100%;
-            height: auto;
-        }}
-        .swiper-slide {{
-            text-align: center;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-        }}
-        .swiper-slide img, .swiper-slide video {{
-            max-height: 400px;
-            width: 100%;
-            border-radius: 10px;
-            box-shadow: 0px 5px 15px rgba(0,0,0,0.2);
-            object-fit: contain;
-        }}
-        .swiper-pagination-fraction {{
-            font-size: 18px;
-            font-weight: bold;
-            color: white;
-            text-shadow: 0 0 5px rgba(0,0,0,0.5);
-        }}
-        .swiper-button-next,
-        .swiper-button-prev {{
-            width: 30px;
-            height: 30px;
-            background-color: rgba(0, 0, 0, 0.4);
-            border-radius: 50%;
-        }}
-        .swiper-button-next:after,
-        .swiper-button-prev:after {{
-            font-size: 20px;
-            color: white;
-        }}
-        .swiper-zoom-container {{
-            cursor: zoom-in;
-        }}
-        .swiper-slide-zoomed .swiper-zoom-container {{
-            cursor: move;
-        }}
-        @media screen and (max-width: 600px) {{
-            .swiper-slide img, .swiper-slide video {{
-                max-height: 300px;
-            }}
-        }}
-    </style>
-    
-    <div class="swiper mySwiper">
-        <div class="swiper-wrapper">
-            {carousel_items}
-        </div>
-        <div class="swiper-pagination"></div>
-        <div class="swiper-button-next"></div>
-        <div class="swiper-button-prev"></div>
-    </div>
-    
-    <script src="https://unpkg.com/swiper@8/swiper-bundle.min.js"></script>
-    <script>
-        const swiper = new Swiper('.mySwiper', {{
-            loop: true,
-            zoom: {'true' if zoom else 'false'},
-            pagination: {{
-                el: '.swiper-pagination',
-                type: 'fraction',
-            }},
-            navigation: {{
-                nextEl: '.swiper-button-next',
-                prevEl: '.swiper-button-prev',
-            }},
-        }});
-    </script>
-    """
-    components.html(carousel_html, height=500)
-
+        thumbnail_url = get_raw_url(f"{sub_path}/thumbnail.jpg")
+        thumbnail_variants = store.derivatives_for(f"{sub_path}/thumbnail.jpg")
+        sub_info = get_subfolder_info(room_name, sub, store)
+        sections.append((sub, smallest_variant(thumbnail_variants) or thumbnail_url, sub_info, "",
+                         tuple(media_item(f) for f in sub_media)))
 
+    render_room(sections)
 
-def display_subfolder_content(room_name, subfolder):
-    info = get_subfolder_info(room_name, subfolder)
-    st.markdown(f"### {subfolder}")
-    st.markdown(f"*Location Details:*\n\n{info}")
-    
-    path = f"{BASE_PATH}/{room_name}/{subfolder}"
-    files = get_github_files(path)
-    media_files = [f for f in files if f['name'] not in ['info.txt', 'thumbnail.jpg']]
-    
-    if media_files:
-        carousel_items = ""
-        for file in media_files:
-            ext = file['name'].split('.')[-1].lower()
-            if ext == "mp4":
-                media_html = f"""
-                    <video controls style="max-height: 400px; width: 100%;">
-                        <source src="{file['download_url']}" type="video/mp4">
-                    </video>
-                """
-            else:
-                media_html = f'<img src="{file["download_url"]}" style="max-height: 400px; width: 100%; object-fit: contain;">'
-            carousel_items += f'<div class="swiper-slide">{media_html}</div>'
-
-        components.html(f"""
-        <link rel="stylesheet" href="https://unpkg.com/swiper@8/swiper-bundle.min.css">
-        <div class="swiper">
-            <div class="swiper-wrapper">
-                {carousel_items}
-            </div>
-        </div>
-        <script src="https://unpkg.com/swiper@8/swiper-bundle.min.js"></script>
-        """, height=500)
-    else:
-        st.info("No media files available for this access point")
 
+def with_variants(store, files):
+    """Attach the stored derivatives of each media file as 'variants', in walkthrough order
 
+    The order is media_sort_key's, as in manifest.json, so both viewers
+    show a folder the same way.
+    """
+    return [dict(f, variants=store.derivatives_for(f['path']))
+            for f in sorted(files, key=lambda f: media_sort_key(f['name']))]
 
-def display_subfolder_content(room, subfolder):
-    st.markdown(f"### {subfolder}")
-    info = get_subfolder_info(room, subfolder)
-    st.markdown(f"*Location Details:*\n\n{info}")
-    
-    path = f"{BASE_PATH}/{room}/{subfolder}"
-    files = get_github_files(path)
-    media_files = [f for f in files if f['name'] not in ['info.txt', 'thumbnail.jpg']]
-    
-    if media_files:
-        carousel_items = ""
-        for file in media_files:
-            ext = file['name'].split('.')[-1].lower()
-            if ext == "mp4":
-                media_html = f"""
-                <video controls style="max-height: 400px; width: 100%;">
-                    <source src="{file['download_url']}" type="video/mp4">
-                </video>
-                """
-            else:
-                media_html = f'<img src="{file["download_url"]}" style="max-height: 400px; width: 100%; object-fit: contain;">'
-            carousel_items += f'<div class="swiper-slide">{media_html}</div>'
-
-        components.html(f"""
-        <!-- Swiper carousel implementation -->
-        {carousel_items}
-        """, height=500)
-    else:
-        st.info("No media files available for this access point")
+def display_carousel(files, zoom=False, eager=True):
+    """Display media files in a carousel with zoom capability"""
+    render_carousel([media_item(f) for f in files], zoom, eager)
 
 
 def rename_file(old_path, new_name):
-    """Rename a file in the GitHub repository"""
+    """Rename a file in the GitHub repository without re-uploading it"""
     try:
         # Validate inputs
         if not old_path or not new_name:
             st.error("Invalid file paths provided")
             return False
 
-        # Get file details from GitHub
-        file_url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{old_path}"
-        response = requests.get(file_url, headers=HEADERS)
-        
-        if response.status_code != 200:
-            st.error(f"Failed to fetch file details (HTTP {response.status_code})")
-            return False
-
-        file_data = response.json()
-        
-        # Validate required fields
-        required_keys = ['sha', 'content', 'download_url', 'path']
-        if not all(key in file_data for key in required_keys):
-            st.error("Missing required file metadata from GitHub")
-            return False
-
-        # Get file content
-        file_content = file_data['content']
-        if not file_content:
-            # Fallback to direct download
-            download_response = requests.get(file_data['download_url'])
-            if download_response.status_code == 200:
-                file_content = base64.b64encode(download_response.content).decode()
-            else:
-                st.error("Failed to retrieve file content")
-                return False
-
         # Construct new path
         new_path = str(Path(old_path).parent / new_name)
-        
-        # Check if new path already exists
-        existing_files = get_github_files(str(Path(new_path).parent))
-        if any(f['name'] == new_name for f in existing_files):
-            st.error("A file with this name already exists")
-            return False
-
-        # Create new file
-        create_response = requests.put(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{new_path}",
-            headers=HEADERS,
-            json={
-                "message": f"Rename {Path(old_path).name} to {new_name}",
-                "content": file_content,
-                "branch": "main"
-            }
-        )
-
-        if create_response.status_code not in [200, 201]:
-            st.error(f"Failed to create new file (HTTP {create_response.status_code})")
-            return False
-
-        # Delete old file
-        delete_response = requests.delete(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{old_path}",
-            headers=HEADERS,
-            json={
-                "message": f"Delete original file after rename",
-                "sha": file_data['sha'],
-                "branch": "main"
-            }
-        )
-
-        if delete_response.status_code != 200:
-            # Rollback creation
-            requests.delete(
-                f"https://api.github.com/repos/{GITHUB_REPO}/contents/{new_path}",
-                headers=HEADERS,
-                json={
-                    "message": "Rollback failed rename",
-                    "sha": create_response.json()['content']['sha']
-                }
-            )
-            st.error("Failed to complete rename operation - rolled back changes")
-            return False
 
+        # Point a new tree entry at the existing blob and drop the old one
+        GIT_DATA.move_paths({old_path: new_path}, f"Rename {Path(old_path).name} to {new_name}")
+        # The new name may be ahead of the folder's counter
+        get_name_allocator().forget(str(Path(old_path).parent))
         return True
 
-    except Exception as e:
+    except (GitDataError, requests.RequestException) as e:
         st.error(f"Error during renaming: {str(e)}")
         return False
 
 def update_subfolder_thumbnail(room_name, subfolder_name, new_thumbnail):
-    """Replace existing thumbnail in a subfolder"""
+    """Replace a subfolder's thumbnail and its derivatives in one commit"""
     try:
-        # Define thumbnail path
-        thumbnail_path = f"{BASE_PATH}/{room_name}/{subfolder_name}/thumbnail.jpg"
-        
-        # Delete existing thumbnail if exists
-        existing_thumb = get_github_files(f"{BASE_PATH}/{room_name}/{subfolder_name}")
-        for item in existing_thumb:
-            if item['name'].lower() == "thumbnail.jpg":
-                if not delete_file(item['path'], item['sha']):
-                    return False
-        
-        # Upload new thumbnail
-        content = base64.b64encode(new_thumbnail.read()).decode()
-        data = {
-            "message": f"Update thumbnail for {subfolder_name}",
-            "content": content
-        }
-        response = requests.put(
-            f"https://api.github.com/repos/{GITHUB_REPO}/contents/{thumbnail_path}",
-            headers=HEADERS,
-            json=data
-        )
-        
-        return response.status_code == 201
-        
+        sub_path = f"{BASE_PATH}/{room_name}/{subfolder_name}"
+        thumbnail_path = f"{sub_path}/thumbnail.jpg"
+
+        # Refuse oversized files before touching the existing thumbnail
+        check_upload_size(new_thumbnail)
+
+        snapshot = load_snapshot(max_age=0, session=GITHUB)
+        sha, derived, _ = upload_media_blobs(new_thumbnail.getvalue(), thumbnail_path, snapshot, sub_path)
+        # The old thumbnail is replaced in place, so there is no moment without one
+        GIT_DATA.commit_tree_entries(
+            f"Update thumbnail for {subfolder_name}",
+            lambda base_tree: media_entries(thumbnail_path, sha, derived, base_blobs(base_tree)))
+        return True
+
     except Exception as e:
         st.error(f"Thumbnail update error: {str(e)}")
         return False
@@ -625,26 +502,63 @@ def update_subfolder_thumbnail(room_name, subfolder_name, new_thumbnail):
 
 
 # Admin Page
+def display_http_dashboard():
+    """Token quota, API cache and outbound request metrics"""
+    with st.expander("📈 GitHub usage and HTTP metrics"):
+        for token, remaining, limit, reset in GITHUB.pool.status():
+            quota = "unknown" if remaining is None else f"{remaining}/{limit}"
+            st.write(f"Token {token}: remaining {quota}, resets {time.strftime('%H:%M:%S', time.localtime(reset)) if reset else '-'}")
+        cache_stats = response_cache.stats()
+        st.caption(
+            f"API cache: {cache_stats['entries']} entries, {cache_stats['hits']} hits, "
+            f"{cache_stats['misses']} misses, {cache_stats['not_modified']} not modified (304)"
+        )
+
+        st.subheader("Requests by endpoint")
+        st.dataframe(metrics.endpoint_rows())
+
+        st.subheader("Recent reruns")
+        reruns = list(metrics.reruns)[::-1]
+        if reruns:
+            st.dataframe([
+                {**run, 'time': time.strftime('%H:%M:%S', time.localtime(run['time']))} for run in reruns
+            ])
+        else:
+            st.info("No reruns recorded yet")
+
+        exposition = metrics.prometheus()
+        st.download_button("Download Prometheus metrics", exposition, file_name="metrics.txt")
+        if METRICS_PORT:
+            st.caption(f"Prometheus can scrape :{METRICS_PORT}/metrics")
+
 def admin_page():
-    st.write(f"Current active token: {GITHUB_TOKEN}, Remaining : {TOKEN_REMAIN}")
+    display_http_dashboard()
     st.title("Admin Panel")
-    tab1, tab2, tab3, tab4, tab5 , tab6 = st.tabs(["Create Room", "Add Content", "Manage Subfolders", "Manage Files", "🚮 Delete Rooms","📷 Change Subfolder Thumbnail"])
+    # One tree read per rerun (revalidated against the branch head) serves
+    # every tab, and only the open tab and open room expanders render
+    snapshot = load_snapshot(max_age=0, session=GITHUB) or GITHUB_STORE
+    all_rooms = snapshot.list_rooms()
+    tab1, tab2, tab3, tab4, tab5 , tab6 = st.tabs(
+        ["Create Room", "Add Content", "Manage Subfolders", "Manage Files", "🚮 Delete Rooms","📷 Change Subfolder Thumbnail"],
+        key="admin_tab", on_change="rerun"
+    )
 
 
     # Create Room Tab (Tab1)
     with tab1:
-        with st.form(key="create_room_form"):
-            room_name = st.text_input("Room Name", key="room_name_input")
-            submit_button = st.form_submit_button("Create Room")
-            if submit_button:
-                existing_rooms = [item['name'] for item in get_github_files(BASE_PATH) if item['type'] == 'dir']
-                if room_name in existing_rooms:
-                    st.error("Room already exists")
-                else:
-                    if create_room_folder(room_name):
-                        st.success(f"Room **{room_name}** created successfully!")
+        if tab1.open:
+            with st.form(key="create_room_form"):
+                room_name = st.text_input("Room Name", key="room_name_input")
+                submit_button = st.form_submit_button("Create Room")
+                if submit_button:
+                    existing_rooms = all_rooms
+                    if room_name in existing_rooms:
+                        st.error("Room already exists")
                     else:
-                        st.error("Failed to create room")
+                        if create_room_folder(room_name):
+                            st.success(f"Room **{room_name}** created successfully!")
+                        else:
+                            st.error("Failed to create room")
 
                         
     if 'upload_counter' not in st.session_state:
@@ -652,96 +566,124 @@ def admin_page():
     
 # In the "Add Content" tab (tab2) of admin_page():
     with tab2:
-        st.header("📤 Add Content")
-        search_term = st.text_input("Search rooms by name", key="content_search").lower()
+        if tab2.open:
+            st.header("📤 Add Content")
+            search_term = st.text_input("Search rooms by name", key="content_search").lower()
         
-        all_rooms = [item['name'] for item in get_github_files(BASE_PATH) if item['type'] == 'dir']
-        filtered_rooms = [room for room in all_rooms if search_term in room.lower()]
+            filtered_rooms = [room for room in all_rooms if search_term in room.lower()]
         
-        if not filtered_rooms:
-            st.info("No rooms found matching your search")
-            return
+            if not filtered_rooms:
+                st.info("No rooms found matching your search")
+                return
     
-        for room in filtered_rooms:
-            with st.expander(f"Room: **{room}**", expanded=False):
-                subfolders = get_subfolders(room)
-                selected_sub = st.selectbox(
-                    "Select Subfolder", 
-                    ["Main"] + subfolders,
-                    key=f"sub_{room}"
-                )
+            for room in filtered_rooms:
+                room_expander = st.expander(f"Room: **{room}**", key=f"content_room_{room}", on_change="rerun")
+                with room_expander:
+                    if not room_expander.open:
+                        continue
+                    subfolders = get_subfolders(room, snapshot)
+                    selected_sub = st.selectbox(
+                        "Select Subfolder", 
+                        ["Main"] + subfolders,
+                        key=f"sub_{room}"
+                    )
                 
-                # Modified file uploader to accept multiple files
-                uploaded_files = st.file_uploader(
-                    "Choose files (multiple allowed)",
-                    type=['jpg', 'jpeg', 'png', 'gif', 'mp4'],
-                    key=f"upload_{room}_{st.session_state.upload_counter}",
-                    accept_multiple_files=True  # Enable multiple selection
-                )
+                    # Modified file uploader to accept multiple files
+                    uploaded_files = st.file_uploader(
+                        "Choose files (multiple allowed)",
+                        type=['jpg', 'jpeg', 'png', 'gif', 'mp4'],
+                        key=f"upload_{room}_{st.session_state.upload_counter}",
+                        accept_multiple_files=True  # Enable multiple selection
+                    )
                 
-                if uploaded_files:
-                    # Process files in selection order
-                    for idx, uploaded_file in enumerate(uploaded_files, 1):
-                        success = upload_room_file(
+                    summary = st.session_state.pop(f"upload_summary_{room}", None)
+                    if summary:
+                        uploaded = sum(1 for _, uploaded_as, _, _ in summary if uploaded_as)
+                        st.info(f"{uploaded} of {len(summary)} files uploaded")
+                        for name, uploaded_as, error, same_as in summary:
+                            if not uploaded_as:
+                                st.error(f"Failed to upload {name}: {error}")
+                            elif same_as and same_as.endswith(f"/{uploaded_as}"):
+                                st.info(f"Skipped {name}: already uploaded as {uploaded_as}")
+                            elif same_as:
+                                st.success(f"Uploaded {name} as {uploaded_as} (same file as {same_as}, nothing re-sent)")
+                            else:
+                                st.success(f"Uploaded {name} as {uploaded_as}")
+
+                    if uploaded_files:
+                        # Upload the selection in parallel as one commit, named in selection order
+                        progress = st.progress(0.0, text=f"Uploading {len(uploaded_files)} files...")
+                        finished = []
+
+                        def report(index, result, error):
+                            finished.append(index)
+                            status = "failed" if error else "uploaded"
+                            progress.progress(len(finished) / len(uploaded_files),
+                                              text=f"{uploaded_files[index].name} {status} "
+                                                   f"({len(finished)}/{len(uploaded_files)})")
+
+                        results = upload_room_files(
                             room=room,
-                            uploaded_file=uploaded_file,
-                            file_type=uploaded_file.type,
-                            subfolder=selected_sub if selected_sub != "Main" else None
+                            uploaded_files=uploaded_files,
+                            subfolder=selected_sub if selected_sub != "Main" else None,
+                            on_progress=report
                         )
-                        if success:
-                            st.success(f"Uploaded ({idx}/{len(uploaded_files)}) {uploaded_file.name}")
-                        else:
-                            st.error(f"Failed to upload {uploaded_file.name}")
+                        # Keep the summary across the rerun that clears the uploader
+                        st.session_state[f"upload_summary_{room}"] = [
+                            (uploaded_file.name, name, str(error) if error else None, same_as)
+                            for uploaded_file, (name, error, same_as) in zip(uploaded_files, results)
+                        ]
                     
-                    # Refresh after all uploads complete
-                    st.session_state.upload_counter += 1
-                    st.rerun()
+                        # Refresh after all uploads complete
+                        st.session_state.upload_counter += 1
+                        st.rerun()
 
 
     with tab3:
-        st.header("📂 Manage Subfolders")
-        room = st.selectbox("Select Room", [item['name'] for item in get_github_files(BASE_PATH) if item['type'] == 'dir'])
+        if tab3.open:
+            st.header("📂 Manage Subfolders")
+            room = st.selectbox("Select Room", all_rooms)
         
-        with st.form(key=f"create_subfolder_{room}"):
-            st.subheader("Create New Access Point")
-            col1, col2 = st.columns(2)
-            with col1:
-                sub_name = st.text_input("Access Point Name")
-                thumbnail = st.file_uploader("Thumbnail Image", type=['jpg', 'jpeg', 'png'])
-            with col2:
-                sub_info = st.text_area("Access Point Information", height=200)
-            if st.form_submit_button("Create Access Point"):
-                if sub_name and thumbnail and sub_info:
-                    if create_subfolder(room, sub_name, thumbnail, sub_info):
-                        st.success("Access point created!")
-                        st.rerun()
-                    else:
-                        st.error("Creation failed")
-                else:
-                    st.warning("Please fill all fields")
-
-        st.subheader("Existing Access Points")
-        subfolders = get_subfolders(room)
-        for sub in subfolders:
-            with st.expander(f"Access Point: {sub}", expanded=False):
-                col1, col2 = st.columns([3, 1])
+            with st.form(key=f"create_subfolder_{room}"):
+                st.subheader("Create New Access Point")
+                col1, col2 = st.columns(2)
                 with col1:
-                    thumbnail_url = f"https://raw.githubusercontent.com/{GITHUB_REPO}/main/{BASE_PATH}/{room}/{sub}/thumbnail.jpg"
-                    st.image(thumbnail_url, width=200)
-                    current_info = get_subfolder_info(room, sub)
-                    new_info = st.text_area("Edit information", value=current_info, key=f"info_{sub}")
-                    if st.button(f"Update Info for {sub}"):
-                        if update_subfolder_info(room, sub, new_info):
-                            st.success("Info updated!")
-                        else:
-                            st.error("Update failed")
+                    sub_name = st.text_input("Access Point Name")
+                    thumbnail = st.file_uploader("Thumbnail Image", type=['jpg', 'jpeg', 'png'])
                 with col2:
-                    if st.button(f"🗑️ Delete {sub}", key=f"del_{sub}"):
-                        if delete_subfolder(room, sub):
-                            st.success("Deleted!")
+                    sub_info = st.text_area("Access Point Information", height=200)
+                if st.form_submit_button("Create Access Point"):
+                    if sub_name and thumbnail and sub_info:
+                        if create_subfolder(room, sub_name, thumbnail, sub_info):
+                            st.success("Access point created!")
                             st.rerun()
                         else:
-                            st.error("Deletion failed")
+                            st.error("Creation failed")
+                    else:
+                        st.warning("Please fill all fields")
+
+            st.subheader("Existing Access Points")
+            subfolders = get_subfolders(room, snapshot)
+            for sub in subfolders:
+                with st.expander(f"Access Point: {sub}", expanded=False):
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        thumbnail_url = get_raw_url(f"{BASE_PATH}/{room}/{sub}/thumbnail.jpg")
+                        st.image(thumbnail_url, width=200)
+                        current_info = get_subfolder_info(room, sub, snapshot)
+                        new_info = st.text_area("Edit information", value=current_info, key=f"info_{sub}")
+                        if st.button(f"Update Info for {sub}"):
+                            if update_subfolder_info(room, sub, new_info):
+                                st.success("Info updated!")
+                            else:
+                                st.error("Update failed")
+                    with col2:
+                        if st.button(f"🗑️ Delete {sub}", key=f"del_{sub}"):
+                            if delete_subfolder(f"{BASE_PATH}/{room}/{sub}"):
+                                st.success("Deleted!")
+                                st.rerun()
+                            else:
+                                st.error("Deletion failed")
 
     # Remaining tabs (Manage Files, Delete Rooms) remain similar to previous implementation
 
@@ -749,198 +691,227 @@ def admin_page():
 
 
     with tab4:
-        st.header("🗂 Manage Files")
-        search_term = st.text_input("Search rooms by name", key="manage_search").lower()
+        if tab4.open:
+            st.header("🗂 Manage Files")
+            search_term = st.text_input("Search rooms by name", key="manage_search").lower()
         
-        # Get all rooms
-        all_rooms = [item['name'] for item in get_github_files(BASE_PATH) if item['type'] == 'dir']
-        filtered_rooms = [room for room in all_rooms if search_term in room.lower()]
+            # Get all rooms
+            filtered_rooms = [room for room in all_rooms if search_term in room.lower()]
         
-        if not filtered_rooms:
-            st.info("No rooms found matching your search")
-            return
+            if not filtered_rooms:
+                st.info("No rooms found matching your search")
+                return
     
-        for room in filtered_rooms:
-            with st.expander(f"Room: **{room}**", expanded=False):
-                # Add subfolder selection
-                subfolders = get_subfolders(room)
-                selected_sub = st.selectbox(
-                    "Select Location",
-                    ["Main Area"] + subfolders,
-                    key=f"sub_select_{room}"
-                )
+            for room in filtered_rooms:
+                room_expander = st.expander(f"Room: **{room}**", key=f"manage_room_{room}", on_change="rerun")
+                with room_expander:
+                    if not room_expander.open:
+                        continue
+                    # Add subfolder selection
+                    subfolders = get_subfolders(room, snapshot)
+                    selected_sub = st.selectbox(
+                        "Select Location",
+                        ["Main Area"] + subfolders,
+                        key=f"sub_select_{room}"
+                    )
                 
-                # Determine the path
-                path = f"{BASE_PATH}/{room}"
-                if selected_sub != "Main Area":
-                    path += f"/{selected_sub}"
+                    # Determine the path
+                    path = f"{BASE_PATH}/{room}"
+                    if selected_sub != "Main Area":
+                        path += f"/{selected_sub}"
                 
-                # File management section
-                files = get_github_files(path)
-                files = [f for f in files if f['type'] == 'file' and f['name'] not in ['info.txt', 'thumbnail.jpg']]
+                    # File management section
+                    files = snapshot.list_dir(path)
+                    files = sorted((f for f in files if f['type'] == 'file' and f['name'] not in ['info.txt', 'thumbnail.jpg']),
+                                   key=lambda f: media_sort_key(f['name']))
                 
-                if not files:
-                    st.info("No files to manage in this location")
-                else:
-                    st.subheader(f"Files in {selected_sub}")
+                    if not files:
+                        st.info("No files to manage in this location")
+                    else:
+                        st.subheader(f"Files in {selected_sub}")
                     
-                    for file in files:
-                        col1, col2, col3, col4 = st.columns([2, 3, 2, 2])
-                        with col1:
-                            # File preview
-                            file_ext = file['name'].split('.')[-1].lower()
-                            if file_ext in ['jpg', 'jpeg', 'png', 'gif']:
-                                st.image(file['download_url'], width=100)
-                            elif file_ext in ['mp4']:
-                                st.video(file['download_url'])
-                            else:
-                                st.markdown(f"📄 `{file['name']}`")
+                        for file in files:
+                            col1, col2, col3, col4 = st.columns([2, 3, 2, 2])
+                            with col1:
+                                # File preview
+                                file_ext = file['name'].split('.')[-1].lower()
+                                if file_ext in ['jpg', 'jpeg', 'png', 'gif']:
+                                    st.image(file['download_url'], width=100)
+                                elif file_ext in ['mp4']:
+                                    st.video(file['download_url'])
+                                else:
+                                    st.markdown(f"📄 `{file['name']}`")
                         
-                        with col2:
-                            st.markdown(f"**File:** `{file['name']}`")
+                            with col2:
+                                st.markdown(f"**File:** `{file['name']}`")
                         
-                        with col3:
-                            # Rename functionality
-                            new_name = st.text_input(
-                                "New name",
-                                value=file['name'],
-                                key=f"rename_{room}_{file['name']}"
-                            )
+                            with col3:
+                                # Rename functionality
+                                new_name = st.text_input(
+                                    "New name",
+                                    value=file['name'],
+                                    key=f"rename_{room}_{file['name']}"
+                                )
                         
-                        with col4:
-                            # Delete button
-                            if st.button("🗑️ Delete", key=f"del_{room}_{file['name']}"):
-                                if delete_file(file['path'], file['sha']):
-                                    st.success("File deleted!")
-                                    st.rerun()
-                                else:
-                                    st.error("Failed to delete file")
-                            
-                            # Rename button
-                            if st.button("✏️ Rename", key=f"ren_{room}_{file['name']}"):
-                                if new_name.strip() == file['name']:
-                                    st.warning("Name unchanged")
-                                elif not new_name.strip():
-                                    st.error("Please enter a new name")
-                                else:
-                                    if rename_file(file['path'], new_name.strip()):
-                                        st.success("File renamed!")
+                            with col4:
+                                # Delete button
+                                if st.button("🗑️ Delete", key=f"del_{room}_{file['name']}"):
+                                    if delete_file(file['path'], file['sha']):
+                                        st.success("File deleted!")
                                         st.rerun()
                                     else:
-                                        st.error("Failed to rename file")
+                                        st.error("Failed to delete file")
+                            
+                                # Rename button
+                                if st.button("✏️ Rename", key=f"ren_{room}_{file['name']}"):
+                                    if new_name.strip() == file['name']:
+                                        st.warning("Name unchanged")
+                                    elif not new_name.strip():
+                                        st.error("Please enter a new name")
+                                    else:
+                                        if rename_file(file['path'], new_name.strip()):
+                                            st.success("File renamed!")
+                                            st.rerun()
+                                        else:
+                                            st.error("Failed to rename file")
     
-                # Carousel preview
-                st.markdown("---")
-                st.subheader("Current Media Preview")
-                if files:
-                    display_carousel(files)
-                else:
-                    st.info("No media files available in this location")
+                    # Carousel preview
+                    st.markdown("---")
+                    st.subheader("Current Media Preview")
+                    if files:
+                        display_carousel(files)
+                    else:
+                        st.info("No media files available in this location")
                 
     # Delete Rooms Tab (Tab5)
     with tab5:
-        st.header("🚮 Delete Content")
-        search_term = st.text_input("Search rooms by name", key="delete_search").lower()
+        if tab5.open:
+            st.header("🚮 Delete Content")
+            search_term = st.text_input("Search rooms by name", key="delete_search").lower()
         
-        all_rooms = [item['name'] for item in get_github_files(BASE_PATH) if item['type'] == 'dir']
-        filtered_rooms = [room for room in all_rooms if search_term in room.lower()]
+            filtered_rooms = [room for room in all_rooms if search_term in room.lower()]
         
-        if not filtered_rooms:
-            st.info("No rooms found matching your search")
+            if not filtered_rooms:
+                st.info("No rooms found matching your search")
            
     
-        for room in filtered_rooms:
-            with st.expander(f"Room: **{room}**", expanded=False):
-                col1, col2 = st.columns([3, 2])
+            for room in filtered_rooms:
+                room_expander = st.expander(f"Room: **{room}**", key=f"delete_room_{room}", on_change="rerun")
+                with room_expander:
+                    if not room_expander.open:
+                        continue
+                    col1, col2 = st.columns([3, 2])
                 
-                with col1:
-                    st.subheader("Delete Subfolder")
-                    subfolders = get_subfolders(room)
-                    if subfolders:
-                        selected_sub = st.selectbox(
-                            "Select subfolder to delete",
-                            subfolders,
-                            key=f"sub_del_{room}"
-                        )
-                        if st.button(f"🗑️ Delete Subfolder", key=f"sub_del_btn_{room}"):
-                            if delete_subfolder(f"{BASE_PATH}/{room}/{selected_sub}"):
-                                st.success(f"Subfolder '{selected_sub}' deleted!")
+                    with col1:
+                        st.subheader("Delete Subfolder")
+                        subfolders = get_subfolders(room, snapshot)
+                        if subfolders:
+                            selected_sub = st.selectbox(
+                                "Select subfolder to delete",
+                                subfolders,
+                                key=f"sub_del_{room}"
+                            )
+                            if st.button(f"🗑️ Delete Subfolder", key=f"sub_del_btn_{room}"):
+                                if delete_subfolder(f"{BASE_PATH}/{room}/{selected_sub}"):
+                                    st.success(f"Subfolder '{selected_sub}' deleted!")
+                                    st.rerun()
+                                else:
+                                    st.error("Failed to delete subfolder")
+                        else:
+                            st.info("No subfolders in this room")
+    
+                    with col2:
+                        st.subheader("Delete Entire Room")
+                        if st.button("⚠️ Delete Entire Room", key=f"room_del_{room}"):
+                            if delete_room(room):
+                                st.success("Room deleted successfully!")
                                 st.rerun()
                             else:
-                                st.error("Failed to delete subfolder")
-                    else:
-                        st.info("No subfolders in this room")
-    
-                with col2:
-                    st.subheader("Delete Entire Room")
-                    if st.button("⚠️ Delete Entire Room", key=f"room_del_{room}"):
-                        if delete_room(room):
-                            st.success("Room deleted successfully!")
-                            st.rerun()
-                        else:
-                            st.error("Failed to delete room")
+                                st.error("Failed to delete room")
     
         
     with tab6:
-        st.header("📷 Change Subfolder Thumbnail")
+        if tab6.open:
+            st.header("📷 Change Subfolder Thumbnail")
         
-        # Room selection
-        rooms = [item['name'] for item in get_github_files(BASE_PATH) if item['type'] == 'dir']
-        selected_room = st.selectbox("Select Room", rooms, key="thumb_room_select")
+            # Room selection
+            rooms = all_rooms
+            selected_room = st.selectbox("Select Room", rooms, key="thumb_room_select")
         
-        if selected_room:
-            # Subfolder selection with thumbnail preview
-            subfolders = get_subfolders(selected_room)
-            if not subfolders:
-                st.info("This room has no subfolders")
-                return
+            if selected_room:
+                # Subfolder selection with thumbnail preview
+                subfolders = get_subfolders(selected_room, snapshot)
+                if not subfolders:
+                    st.info("This room has no subfolders")
+                    return
             
-            # Create columns for dropdown and preview
-            col1, col2 = st.columns([3, 2])
+                # Create columns for dropdown and preview
+                col1, col2 = st.columns([3, 2])
             
-            with col1:
-                selected_sub = st.selectbox("Select Subfolder", subfolders, key="thumb_sub_select")
+                with col1:
+                    selected_sub = st.selectbox("Select Subfolder", subfolders, key="thumb_sub_select")
             
-            with col2:
-                # Display current thumbnail
-                thumbnail_url = f"https://raw.githubusercontent.com/{GITHUB_REPO}/main/{BASE_PATH}/{selected_room}/{selected_sub}/thumbnail.jpg"
-                st.image(thumbnail_url, 
-                        width=150,  # Set fixed small size
-                        caption="Current Thumbnail",
-                        use_column_width=False)
+                with col2:
+                    # Display current thumbnail
+                    thumbnail_url = get_raw_url(f"{BASE_PATH}/{selected_room}/{selected_sub}/thumbnail.jpg")
+                    st.image(thumbnail_url, 
+                            width=150,  # Set fixed small size
+                            caption="Current Thumbnail",
+                            use_column_width=False)
             
-            # Thumbnail upload section
-            new_thumbnail = st.file_uploader("Upload New Thumbnail", 
-                                           type=['jpg', 'jpeg', 'png'], 
-                                           key="thumb_upload")
+                # Thumbnail upload section
+                new_thumbnail = st.file_uploader("Upload New Thumbnail", 
+                                               type=['jpg', 'jpeg', 'png'], 
+                                               key="thumb_upload")
             
-            # Preview new thumbnail before upload
-            if new_thumbnail:
-                st.image(new_thumbnail, 
-                        width=150,
-                        caption="New Thumbnail Preview",
-                        use_column_width=False)
+                # Preview new thumbnail before upload
+                if new_thumbnail:
+                    st.image(new_thumbnail, 
+                            width=150,
+                            caption="New Thumbnail Preview",
+                            use_column_width=False)
                 
-                if st.button("Update Thumbnail", key="thumb_update_btn"):
-                    if update_subfolder_thumbnail(selected_room, selected_sub, new_thumbnail):
-                        st.success("Thumbnail updated successfully!")
-                        st.rerun()
-                    else:
-                        st.error("Failed to update thumbnail")
+                    if st.button("Update Thumbnail", key="thumb_update_btn"):
+                        if update_subfolder_thumbnail(selected_room, selected_sub, new_thumbnail):
+                            st.success("Thumbnail updated successfully!")
+                            st.rerun()
+                        else:
+                            st.error("Failed to update thumbnail")
+
 
 
 
+@st.cache_resource(max_entries=2)
+def get_info_index(version, _store, _manifest):
+    """Landmark index over every info text; rebuilt when version changes"""
+    if _manifest is not None:
+        return InfoSearchIndex(documents_from_manifest(json.loads(_manifest)))
+    return InfoSearchIndex(documents_from_store(_store))
+
+
+def landmark_index(store):
+    """Landmark index of store, keyed on the content of its manifest.json
+
+    The manifest already carries every info text, so one read replaces one
+    per room and point. Without a manifest the texts are read one by one,
+    keyed on the snapshot's tree.
+    """
+    manifest = store.read_text(MANIFEST_PATH)
+    if manifest is None:
+        return get_info_index(getattr(store, 'tree_sha', None) or type(store).__name__, store, None)
+    return get_info_index(blob_sha(manifest.encode()), store, manifest)
+
 
 def default_page():
     
     #st.markdown("""<h1>🔍 Room <span style="color: green;font-size: 15px;">[MITM]</span></h1>""", unsafe_allow_html=True)
-    st.markdown("""
+    st.markdown(f"""
     <style>
-        .logo-container {
+        .logo-container {{
             display: flex;
             align-items: center;
-        }
-        .logo {
+        }}
+        .logo {{
             width: 83px;  /* Increased from 55px by 1.5x */
             height: 83px; /* Increased from 55px by 1.5x */
             background-color: white;
@@ -948,25 +919,25 @@ def default_page():
             justify-content: center;
             align-items: center;
             margin-right: 10px;
-        }
-        .logo img {
+        }}
+        .logo img {{
             width: 68px;  /* Increased from 45px by 1.5x */
             height: 68px;
-        }
-        .room-title {
+        }}
+        .room-title {{
             font-size: 24px;
             font-weight: bold;
-        }
-        .room-code {
+        }}
+        .room-code {{
             color: green;
             font-size: 15px;
-        }
+        }}
     </style>
 
     <div class="logo-container">
         <h1 class="room-title">🔍 Room <span class="room-code">[MITM]</span></h1>
         <div class="logo">
-            <img src="https://raw.githubusercontent.com/2005lakshmi/locorom/main/logo_locorom.png" alt="Logo">
+            <img src="{LOGO_URL}" alt="Logo">
         </div>
     </div>
     """, unsafe_allow_html=True)
@@ -987,8 +958,15 @@ def default_page():
         return
 
     # Get filtered rooms
-    rooms = [item['name'] for item in get_github_files(BASE_PATH) if item['type'] == 'dir']
-    filtered_rooms = [room for room in rooms if search_term in room.lower()]
+    store = get_room_store()
+    rooms = store.list_rooms()
+    filtered_rooms = search_rooms(rooms, search_term)
+
+    # No room name matches: treat the query as a landmark description
+    landmark_hits = []
+    if search_term and not filtered_rooms:
+        landmark_hits = landmark_index(store).search(search_term)
+        filtered_rooms = list(dict.fromkeys(room for _, room, _, _ in landmark_hits))
 
     if not filtered_rooms:
         st.error("No rooms found" if search_term else "Please enter room number to search..!")
@@ -1000,6 +978,10 @@ def default_page():
 
     st.header(f"Room: :red[{selected_room}]")
 
+    for _, room, point, text in landmark_hits:
+        if room == selected_room:
+            st.info(f"Matches **{point or 'Main area'}**: {text}")
+
     # Display main content
     display_main_content(selected_room)
         
@@ -1011,11 +993,12 @@ def main():
         st.session_state.page = "Default Page"
 
     # Check current page state
-    if st.session_state.page == "Admin Page":
-        admin_page()
-    else:
-        default_page()
-        # Footer content
+    with metrics.rerun(st.session_state.page):
+        if st.session_state.page == "Admin Page":
+            admin_page()
+        else:
+            default_page()
+            # Footer content
 
 
 
@@ -1,21 +1,47 @@
 import streamlit as st
-import requests
-import streamlit.components.v1 as components
+from http_metrics import default_session, metrics
 import string
+from media_prober import MediaProber
+from room_store import API_URL, RAW_URL
+from static_assets import asset_url
+from room_search import search_rooms
+from info_search import InfoSearchIndex, documents_from_manifest
+from carousel import media_items_from_urls, render_carousel, render_room
 
 # Configuration
 GITHUB_REPO = "2005lakshmi/locorom"
 BASE_PATH = "Rooms"
 BRANCH = "main"
+LOGO_URL = asset_url("logo_locorom.png")
 
 def get_raw_url(*path_parts):
     """Construct raw GitHub URL for a file"""
-    return f"https://raw.githubusercontent.com/{GITHUB_REPO}/{BRANCH}/{'/'.join(path_parts)}"
+    return f"{RAW_URL}/{GITHUB_REPO}/{BRANCH}/{'/'.join(path_parts)}"
+
+@st.cache_data(ttl=600)
+def load_manifest():
+    """Fetch manifest.json (build_manifest.py, rewritten by every admin commit), or None if missing"""
+    response = default_session.get(get_raw_url("manifest.json"))
+    if response.status_code != 200:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+@st.cache_resource(ttl=600)
+def get_info_index():
+    """Landmark index over the manifest's info texts, or None without a manifest"""
+    manifest = load_manifest()
+    return InfoSearchIndex(documents_from_manifest(manifest)) if manifest is not None else None
 
 def get_rooms():
-    """Get list of rooms using GitHub API"""
-    api_url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{BASE_PATH}"
-    response = requests.get(api_url)
+    """Get list of rooms from the manifest, falling back to the GitHub API"""
+    manifest = load_manifest()
+    if manifest is not None:
+        return list(manifest['rooms'])
+    api_url = f"{API_URL}/repos/{GITHUB_REPO}/contents/{BASE_PATH}"
+    response = default_session.get(api_url)
     if response.status_code == 200:
         return [item['name'] for item in response.json() if item['type'] == 'dir']
     return []
@@ -23,182 +49,84 @@ def get_rooms():
 def get_room_info(room_name):
     """Fetch room information from info.txt"""
     info_url = get_raw_url(BASE_PATH, room_name, "info.txt")
-    response = requests.get(info_url)
+    response = default_session.get(info_url)
     return response.text if response.status_code == 200 else "No information available"
 
+@st.cache_resource
+def get_prober():
+    """Process-wide prober so its connection pool and miss cache are shared"""
+    return MediaProber()
+
 def generate_alphabetical_files(room_name, subfolder=None):
-    """Generate possible alphabetical filenames and check existence"""
+    """Discover the alphabetical media sequence, stopping at the first gap"""
     base_path = [BASE_PATH, room_name]
     if subfolder:
         base_path.append(subfolder)
-    
-    files = []
-    sequence = ['']
-    
-    while True:
-        current = sequence.pop(0)
-        for letter in string.ascii_lowercase:
-            candidate = current + letter
-            for ext in ['jpg', 'jpeg', 'png', 'gif', 'mp4']:
-                url = get_raw_url(*base_path, f"{candidate}.{ext}")
-                if requests.head(url).status_code == 200:
-                    files.append(url)
-            sequence.append(candidate)
-        if len(current) > 1:  # Limit depth for practical purposes
-            break
-    return files
+    return get_prober().probe_media(
+        "/".join(base_path),
+        lambda filename: get_raw_url(*base_path, filename)
+    )
 
 def get_subfolders(room_name):
     """Detect subfolders by checking for thumbnail.jpg"""
-    subfolders = []
-    for char in string.ascii_lowercase:
-        thumb_url = get_raw_url(BASE_PATH, room_name, char, "thumbnail.jpg")
-        if requests.head(thumb_url).status_code == 200:
-            subfolders.append(char)
-    return subfolders
+    candidates = list(string.ascii_lowercase) + [f"Point {c}" for c in string.ascii_uppercase]
+    thumb_urls = {get_raw_url(BASE_PATH, room_name, sub, "thumbnail.jpg"): sub for sub in candidates}
+    found = get_prober().probe_existing(f"{BASE_PATH}/{room_name}", list(thumb_urls))
+    return [thumb_urls[url] for url in found]
 
 def display_carousel(files, zoom=True):
     """Display media files in a carousel matching original styling"""
-    carousel_items = ""
-    for file_url in files:
-        if file_url.split('.')[-1].lower() in ['mp4', 'webm']:
-            media_html = f"""
-                <video controls style="max-height: 400px; width: 100%;">
-                    <source src="{file_url}" type="video/mp4">
-                </video>
-            """
-        else:
-            zoom_class = "swiper-zoom-container" if zoom else ""
-            media_html = f'''
-            <div class="{zoom_class}">
-                <img src="{file_url}" 
-                     style="max-height: 400px; width: 100%; object-fit: contain;">
-            </div>
-            '''
-        carousel_items += f'<div class="swiper-slide">{media_html}</div>'
-
-    carousel_html = f"""
-    <link rel="stylesheet" href="https://unpkg.com/swiper@8/swiper-bundle.min.css">
-    <style>
-        .swiper {{
-            width: 100%;
-            height: auto;
-        }}
-        .swiper-slide {{
-            text-align: center;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-        }}
-        .swiper-slide img, .swiper-slide video {{
-            max-height: 400px;
-            width: 100%;
-            border-radius: 10px;
-            box-shadow: 0px 5px 15px rgba(0,0,0,0.2);
-            object-fit: contain;
-        }}
-        .swiper-pagination-fraction {{
-            font-size: 18px;
-            font-weight: bold;
-            color: white;
-            text-shadow: 0 0 5px rgba(0,0,0,0.5);
-        }}
-        .swiper-button-next,
-        .swiper-button-prev {{
-            width: 30px;
-            height: 30px;
-            background-color: rgba(0, 0, 0, 0.4);
-            border-radius: 50%;
-        }}
-        .swiper-button-next:after,
-        .swiper-button-prev:after {{
-            font-size: 20px;
-            color: white;
-        }}
-        .swiper-zoom-container {{
-            cursor: zoom-in;
-        }}
-        .swiper-slide-zoomed .swiper-zoom-container {{
-            cursor: move;
-        }}
-    </style>
-    
-    <div class="swiper mySwiper">
-        <div class="swiper-wrapper">
-            {carousel_items}
-        </div>
-        <div class="swiper-pagination"></div>
-        <div class="swiper-button-next"></div>
-        <div class="swiper-button-prev"></div>
-    </div>
-    
-    <script src="https://unpkg.com/swiper@8/swiper-bundle.min.js"></script>
-    <script>
-        const swiper = new Swiper('.mySwiper', {{
-            loop: true,
-            zoom: {'true' if zoom else 'false'},
-            pagination: {{
-                el: '.swiper-pagination',
-                type: 'fraction',
-            }},
-            navigation: {{
-                nextEl: '.swiper-button-next',
-                prevEl: '.swiper-button-prev',
-            }},
-        }});
-    </script>
-    """
-    components.html(carousel_html, height=500)
+    render_carousel(media_items_from_urls(files), zoom)
+
+def get_room_content(room_name):
+    """Return (info, media URLs, [(point, thumbnail URL, info, media URLs)])"""
+    manifest = load_manifest()
+    room = manifest['rooms'].get(room_name) if manifest is not None else None
+    if room is None:
+        # No manifest entry: discover media by probing raw URLs
+        points = []
+        for sub in get_subfolders(room_name):
+            sub_info = default_session.get(get_raw_url(BASE_PATH, room_name, sub, "info.txt")).text
+            points.append((
+                sub,
+                get_raw_url(BASE_PATH, room_name, sub, "thumbnail.jpg"),
+                sub_info,
+                generate_alphabetical_files(room_name, sub),
+            ))
+        return get_room_info(room_name), generate_alphabetical_files(room_name), points
+
+    points = []
+    for sub, point in room['points'].items():
+        points.append((
+            sub,
+            get_raw_url(BASE_PATH, room_name, sub, "thumbnail.jpg") if point['thumbnail'] else None,
+            point['info'] or "",
+            [get_raw_url(BASE_PATH, room_name, sub, name) for name in point['media']],
+        ))
+    info = room['info'] if room['info'] is not None else "No information available"
+    return info, [get_raw_url(BASE_PATH, room_name, name) for name in room['media']], points
 
 def display_main_content(room_name):
     """Display room content matching original layout"""
-    # Main area
-    main_files = generate_alphabetical_files(room_name)
-    info_content = get_room_info(room_name)
-    
-    if main_files:
-        st.markdown("<h4 style='color: green;'>From Point:</h4>", unsafe_allow_html=True)
-        col1, col2 = st.columns([2, 3])
-        with col1:
-            st.image(main_files[0], width=200)
-        with col2:
-            st.markdown("<h5 style='color:#0D92F4;'>Location Info :</h5>", unsafe_allow_html=True)
-            st.markdown(f"###### {info_content}")
-        
-        st.markdown("##### Photos")
-        st.write("Path through Photos")
-        display_carousel(main_files, zoom=True)
-        st.markdown("<hr style='border: 1px solid gray; margin: 0px 0;'>", unsafe_allow_html=True)
+    info_content, main_files, points = get_room_content(room_name)
 
-    # Subfolders
-    for sub in get_subfolders(room_name):
-        st.markdown("<h4 style='color: green;'>From Point:</h4>", unsafe_allow_html=True)
-        col1, col2 = st.columns([2, 3])
-        with col1:
-            thumb_url = get_raw_url(BASE_PATH, room_name, sub, "thumbnail.jpg")
-            st.image(thumb_url, width=200)
-        with col2:
-            sub_info_url = get_raw_url(BASE_PATH, room_name, sub, "info.txt")
-            sub_info = requests.get(sub_info_url).text
-            st.markdown("<h5 style='color:#0D92F4;'>Location Info :</h5>", unsafe_allow_html=True)
-            st.markdown(f"###### {sub_info}")
-        
-        sub_files = generate_alphabetical_files(room_name, sub)
-        if sub_files:
-            st.markdown("##### Photos")
-            display_carousel(sub_files, zoom=True)
-        else:
-            st.info(f"No media available in {sub}")
-        st.markdown("<hr style='border: 1px solid gray; margin: 0px 0;'>", unsafe_allow_html=True)
+    # Every point of the room goes into a single component
+    sections = []
+    if main_files:
+        sections.append((room_name, main_files[0], info_content, "Path through Photos",
+                         media_items_from_urls(main_files)))
+    for sub, thumb_url, sub_info, sub_files in points:
+        sections.append((sub, thumb_url, sub_info, "", media_items_from_urls(sub_files)))
+    render_room(sections)
 
 # Streamlit UI
-st.markdown("""
+st.markdown(f"""
     <style>
-        .logo-container {
+        .logo-container {{
             display: flex;
             align-items: center;
-        }
-        .logo {
+        }}
+        .logo {{
             width: 83px;
             height: 83px;
             background-color: white;
@@ -206,40 +134,51 @@ st.markdown("""
             justify-content: center;
             align-items: center;
             margin-right: 10px;
-        }
-        .logo img {
+        }}
+        .logo img {{
             width: 68px;
             height: 68px;
-        }
-        .room-title {
+        }}
+        .room-title {{
             font-size: 24px;
             font-weight: bold;
-        }
-        .room-code {
+        }}
+        .room-code {{
             color: green;
             font-size: 15px;
-        }
+        }}
     </style>
 
     <div class="logo-container">
         <h1 class="room-title">🔍 Room <span class="room-code">[MITM]</span></h1>
         <div class="logo">
-            <img src="https://raw.githubusercontent.com/2005lakshmi/locorom/main/logo_locorom.png" alt="Logo">
+            <img src="{LOGO_URL}" alt="Logo">
         </div>
     </div>
     """, unsafe_allow_html=True)
 
 st.markdown("<hr style='border: 1px solid gray; margin: 5px 0;'>", unsafe_allow_html=True)
 
-# Room search and selection
-search_term = st.text_input("**Search Room**", "", placeholder="example., 415B").strip().lower()
-all_rooms = get_rooms()
-filtered_rooms = [room for room in all_rooms if search_term in room.lower()]
-
-if not filtered_rooms:
-    st.error("No rooms found" if search_term else "Please enter room number to search..!")
-else:
-    selected_room = st.radio("Select Room", filtered_rooms)
-    st.markdown("<hr style='border: 1px solid gray; margin: 0px 0;'>", unsafe_allow_html=True)
-    st.header(f"Room: :red[{selected_room}]")
-    display_main_content(selected_room)
+# Room search and selection, with its outbound calls recorded as one rerun
+with metrics.rerun("viewer (no API)"):
+    search_term = st.text_input("**Search Room**", "", placeholder="example., 415B").strip().lower()
+    all_rooms = get_rooms()
+    filtered_rooms = search_rooms(all_rooms, search_term)
+
+    # No room name matches: treat the query as a landmark description
+    landmark_hits = []
+    info_index = get_info_index()
+    if search_term and not filtered_rooms and info_index is not None:
+        landmark_hits = info_index.search(search_term)
+        filtered_rooms = list(dict.fromkeys(room for _, room, _, _ in landmark_hits))
+
+    if not filtered_rooms:
+        st.error("No rooms found" if search_term else "Please enter room number to search..!")
+    else:
+        selected_room = st.radio("Select Room", filtered_rooms)
+        st.markdown("<hr style='border: 1px solid gray; margin: 0px 0;'>", unsafe_allow_html=True)
+        st.header(f"Room: :red[{selected_room}]")
+        for _, room, point, text in landmark_hits:
+            if room == selected_room:
+                st.info(f"Matches **{point or 'Main area'}**: {text}")
+        display_main_content(selected_room)
@@ -0,0 +1,22 @@
+import os
+import pytest
+from fake_github import FakeRepo, start
+
+# Every test talks to fake_github.py instead of GitHub.
+#
+# room_store reads GITHUB_API_URL and GITHUB_RAW_URL when it is imported,
+# so the fake is started and the variables are set here, before any test
+# module is collected. Each test that uses `repo` swaps in a fresh
+# in-memory repository.
+
+GITHUB, SERVER = start(FakeRepo({}))
+os.environ['GITHUB_API_URL'] = f"{GITHUB.base_url}/api"
+os.environ['GITHUB_RAW_URL'] = f"{GITHUB.base_url}/raw"
+
+
+@pytest.fixture
+def repo():
+    def make(files):
+        GITHUB.repo = FakeRepo(files)
+        return GITHUB.repo
+    return make
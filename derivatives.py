@@ -0,0 +1,135 @@
+import os
+import io
+import argparse
+from urllib.parse import quote
+from PIL import Image, ImageOps, features
+
+# Responsive image derivatives for the carousels.
+#
+# Every photo under Rooms/ gets downscaled copies in modern formats stored
+# under Derivatives/, mirroring the source path with its full file name, so
+# a.jpg and a.png in one folder keep apart:
+#   Rooms/205/Point A/a.jpg -> Derivatives/Rooms/205/Point A/a.jpg.640.webp
+# The carousel lists them in srcset so each client fetches only the width
+# its viewport needs. Run this module to backfill a local checkout.
+
+DERIVATIVE_ROOT = "Derivatives"
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif']
+# Listed in order of preference for <source> elements
+FORMATS = [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
+SAVE_OPTIONS = {'avif': {'quality': 50, 'speed': 8}, 'webp': {'quality': 75}}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+def is_image(path):
+    return path.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS
+
+
+def derivative_path(source_path, width, fmt):
+    return f"{DERIVATIVE_ROOT}/{source_path}.{width}.{fmt}"
+
+
+def make_derivatives(data):
+    """Return {(width, fmt): encoded bytes} for the given image bytes
+
+    Widths wider than the original are skipped, except the smallest, which
+    is always produced so every image has a small placeholder.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    results = {}
+    for width in DERIVATIVE_WIDTHS:
+        if width > image.width and width != DERIVATIVE_WIDTHS[0]:
+            continue
+        resized = image
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.LANCZOS)
+        for fmt in FORMATS:
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt.upper(), **SAVE_OPTIONS[fmt])
+            results[(width, fmt)] = buffer.getvalue()
+    return results
+
+
+def derivative_files(source_path, data):
+    """Return {repository path: bytes} of the derivatives for one source file"""
+    return {derivative_path(source_path, width, fmt): content
+            for (width, fmt), content in make_derivatives(data).items()}
+
+
+def parse_derivative(path):
+    """Split a derivative path into (source path, width, fmt), or None"""
+    if not path.startswith(DERIVATIVE_ROOT + "/"):
+        return None
+    parts = path[len(DERIVATIVE_ROOT) + 1:].rsplit('.', 2)
+    if len(parts) != 3 or not parts[1].isdigit() or parts[2] not in MIME_TYPES:
+        return None
+    return parts[0], int(parts[1]), parts[2]
+
+
+def derivatives_among(paths, source_path):
+    """Return the derivatives of source_path found in paths"""
+    prefix = f"{DERIVATIVE_ROOT}/{source_path}."
+    return [path for path in paths if path.startswith(prefix) and (parse_derivative(path) or (None,))[0] == source_path]
+
+
+def srcset_sources(variants):
+    """Turn (width, fmt, url) variants into <source> attributes, best format first
+
+    Variant URLs are expected unquoted, as get_raw_url() builds them.
+    """
+    sources = []
+    for fmt in ('avif', 'webp'):
+        urls = sorted((width, url) for width, f, url in variants if f == fmt)
+        if urls:
+            # srcset is whitespace-separated, so spaces in paths must be escaped
+            srcset = ", ".join(f"{quote(url, safe=':/')} {width}w" for width, url in urls)
+            sources.append({'type': MIME_TYPES[fmt], 'srcset': srcset})
+    return sources
+
+
+def smallest_variant(variants, fmt='webp'):
+    """Return the URL of the narrowest variant in fmt, or None"""
+    urls = sorted((width, url) for width, f, url in variants if f == fmt)
+    return urls[0][1] if urls else None
+
+
+def backfill(root, force=False):
+    """Write missing derivatives for every image under root/Rooms"""
+    written = 0
+    for dirpath, dirnames, filenames in os.walk(os.path.join(root, "Rooms")):
+        for name in sorted(filenames):
+            source = os.path.join(dirpath, name)
+            rel = os.path.relpath(source, root).replace(os.sep, "/")
+            if not is_image(rel):
+                continue
+            expected = [os.path.join(root, derivative_path(rel, DERIVATIVE_WIDTHS[0], fmt)) for fmt in FORMATS]
+            source_mtime = os.path.getmtime(source)
+            if not force and all(os.path.exists(p) and os.path.getmtime(p) >= source_mtime for p in expected):
+                continue
+            with open(source, "rb") as f:
+                outputs = derivative_files(rel, f.read())
+            for path, content in outputs.items():
+                target = os.path.join(root, path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as f:
+                    f.write(content)
+            written += 1
+            print(f"{rel}: {len(outputs)} derivatives")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate responsive derivatives for Rooms/ images")
+    parser.add_argument("--root", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="repository checkout containing Rooms/")
+    parser.add_argument("--force", action="store_true", help="regenerate up-to-date derivatives")
+    args = parser.parse_args()
+    count = backfill(args.root, args.force)
+    print(f"Processed {count} images ({', '.join(FORMATS)} at widths {DERIVATIVE_WIDTHS})")
+
+
+if __name__ == "__main__":
+    main()
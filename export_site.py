@@ -0,0 +1,284 @@
+import os
+import re
+import html
+import json
+import shutil
+import hashlib
+import argparse
+from urllib.parse import quote
+from build_manifest import build_manifest
+from room_store import LocalRoomStore, BASE_PATH
+from derivatives import DERIVATIVE_ROOT, DERIVATIVE_WIDTHS, MIME_TYPES, derivative_path, is_image
+from static_assets import FALLBACK_URLS, asset_file
+from carousel import CAROUSEL_CSS, CAROUSEL_JS, sections_markup
+
+# Static export of every room for plain file hosting.
+#
+# Walks a local checkout's Rooms/ and writes site/:
+#   index.html           room list with a client-side search box
+#   search.json          rooms, points and info texts for that search
+#   rooms/<slug>.html    one page per room, same layout as the viewer
+#   media/...            Rooms/ and Derivatives/ files, hard-linked when possible
+#   assets/...           vendored Swiper and logo, if vendor_assets.py was run
+#
+# Exports are incremental. Each room page is stored with a fingerprint of
+# its manifest entry, its media files' sizes and mtimes, the page template
+# and the asset URLs it links, so a re-run only rewrites rooms that changed
+# and only copies media that is new or modified. A rebuilt room's media
+# folders are pruned of files its page no longer links.
+
+SITE_DIR = "site"
+STATE_FILE = ".export-state.json"
+# Bump when the page layout changes so every room is rebuilt
+TEMPLATE_VERSION = 1
+TEMPLATE_HASH = hashlib.sha1(f"{TEMPLATE_VERSION}{CAROUSEL_CSS}{CAROUSEL_JS}".encode()).hexdigest()
+
+PAGE_CSS = """
+body { margin: 0 auto; max-width: 760px; padding: 0 16px; font-family: "Source Sans Pro", sans-serif; }
+header { display: flex; align-items: center; justify-content: space-between; }
+header img { width: 68px; height: 68px; }
+.room-code { color: green; font-size: 15px; }
+a { color: #0D92F4; }
+ul.rooms { list-style: none; padding: 0; }
+ul.rooms li { padding: 6px 0; border-bottom: 1px solid #eee; }
+input[type=search] { width: 100%; font-size: 16px; padding: 8px; box-sizing: border-box; }
+"""
+
+# Filters the room list from search.json: every query word must start some
+# word of the room name, or of one of its info texts
+SEARCH_JS = """
+fetch('search.json').then((r) => r.json()).then((rooms) => {
+  const box = document.getElementById('q');
+  const list = document.getElementById('rooms');
+  const words = (text) => (text || '').toLowerCase().match(/[a-z0-9]+/g) || [];
+  const docs = rooms.map((room) => ({room, words: words([room.name, room.info,
+    ...room.points.map((p) => p.name + ' ' + p.info)].join(' '))}));
+  const render = () => {
+    const query = words(box.value);
+    list.innerHTML = '';
+    docs.filter((d) => query.every((q) => d.words.some((w) => w.startsWith(q)))).forEach((d) => {
+      const li = document.createElement('li');
+      const a = document.createElement('a');
+      a.href = d.room.url;
+      a.textContent = d.room.name;
+      li.appendChild(a);
+      list.appendChild(li);
+    });
+  };
+  box.addEventListener('input', render);
+});
+"""
+
+
+def room_slug(room):
+    return re.sub(r"[^A-Za-z0-9]+", "-", room).strip("-").lower() or "room"
+
+
+def _href(path, prefix):
+    """URL of a repository file under site/media, relative to a page"""
+    return f"{prefix}media/{quote(path)}"
+
+
+def _variants(root, path, prefix):
+    # Left unquoted: srcset_sources escapes variant URLs itself
+    variants = []
+    if is_image(path):
+        for width in DERIVATIVE_WIDTHS:
+            for fmt in MIME_TYPES:
+                derived = derivative_path(path, width, fmt)
+                if os.path.exists(os.path.join(root, derived)):
+                    variants.append((width, fmt, f"{prefix}media/{derived}"))
+    return tuple(variants)
+
+
+def _items(root, folder, names, prefix):
+    return tuple((name, _href(f"{folder}/{name}", prefix), _variants(root, f"{folder}/{name}", prefix))
+                 for name in names)
+
+
+def room_sources(root, room, data):
+    """Return every repository path a room page links to"""
+    room_path = f"{BASE_PATH}/{room}"
+    paths = [f"{room_path}/{name}" for name in data['media']]
+    for point, point_data in data['points'].items():
+        point_path = f"{room_path}/{point}"
+        if point_data['thumbnail']:
+            paths.append(f"{point_path}/thumbnail.jpg")
+        paths += [f"{point_path}/{name}" for name in point_data['media']]
+    for path in list(paths):
+        if is_image(path):
+            paths += [derivative_path(path, width, fmt) for width in DERIVATIVE_WIDTHS for fmt in MIME_TYPES
+                      if os.path.exists(os.path.join(root, derivative_path(path, width, fmt)))]
+    return paths
+
+
+def room_fingerprint(root, room, data, sources, assets):
+    digest = hashlib.sha1(TEMPLATE_HASH.encode())
+    digest.update(json.dumps([room, data, assets], sort_keys=True).encode())
+    for path in sources:
+        stat = os.stat(os.path.join(root, path))
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    return digest.hexdigest()
+
+
+def sync_file(source, target):
+    """Link or copy source to target unless an identical copy is there; return True if written"""
+    stat = os.stat(source)
+    try:
+        existing = os.stat(target)
+        if existing.st_size == stat.st_size and existing.st_mtime_ns == stat.st_mtime_ns:
+            return False
+        os.remove(target)
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+    return True
+
+
+def prune_media(out, room, sources):
+    """Remove files under a room's site/media folders that sources no longer lists; return how many"""
+    keep = {os.path.normpath(os.path.join(out, "media", path)) for path in sources}
+    removed = 0
+    for media_root in (BASE_PATH, f"{DERIVATIVE_ROOT}/{BASE_PATH}"):
+        folder = os.path.join(out, "media", media_root, room)
+        for dirpath, dirnames, filenames in os.walk(folder, topdown=False):
+            for name in filenames:
+                path = os.path.normpath(os.path.join(dirpath, name))
+                if path not in keep:
+                    os.remove(path)
+                    removed += 1
+            if dirpath != folder and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+    return removed
+
+
+def page(title, body, prefix, logo, head=""):
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+            f'<title>{html.escape(title)}</title>{head}<style>{PAGE_CSS}</style></head><body>'
+            f'<header><h1><a href="{prefix}index.html">🔍 Room</a> <span class="room-code">[MITM]</span></h1>'
+            f'<img src="{logo if "://" in logo else prefix + logo}" alt="Logo"></header><hr>{body}</body></html>')
+
+
+def room_page(root, room, data, logo, swiper_css, swiper_js):
+    prefix = "../"
+    room_path = f"{BASE_PATH}/{room}"
+    main_items = _items(root, room_path, data['media'], prefix)
+    sections = []
+    if main_items:
+        sections.append((room, main_items[0][1], data['info'] or "No information available",
+                         "Path through Photos", main_items))
+    for point, point_data in data['points'].items():
+        point_path = f"{room_path}/{point}"
+        thumbnail = _href(f"{point_path}/thumbnail.jpg", prefix) if point_data['thumbnail'] else None
+        sections.append((point, thumbnail, point_data['info'] or "", "",
+                         _items(root, point_path, point_data['media'], prefix)))
+    body, _ = sections_markup(sections)
+    css = swiper_css if "://" in swiper_css else prefix + swiper_css
+    js = swiper_js if "://" in swiper_js else prefix + swiper_js
+    return page(f"Room {room}",
+                f'<h2>Room: <span style="color: red">{html.escape(room)}</span></h2>{body}'
+                f'<script src="{js}"></script><script>{CAROUSEL_JS}</script>',
+                prefix, logo, head=f'<link rel="stylesheet" href="{css}"><style>{CAROUSEL_CSS}</style>')
+
+
+def _asset(root, out, name):
+    """Copy a vendored asset into site/assets and return its site path, or the CDN URL"""
+    path = asset_file(name)
+    if path is None:
+        return FALLBACK_URLS[name]
+    sync_file(os.path.join(root, "static", path), os.path.join(out, "assets", path))
+    return f"assets/{path}"
+
+
+def export(root, out, force=False):
+    """Export the site; return (rooms rebuilt, rooms total, media files written)"""
+    manifest = build_manifest(LocalRoomStore(root))
+    state_path = os.path.join(out, STATE_FILE)
+    state = {}
+    if not force:
+        try:
+            with open(state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = {}
+
+    logo = _asset(root, out, "logo_locorom.png")
+    swiper_css = _asset(root, out, "swiper/swiper-bundle.min.css")
+    swiper_js = _asset(root, out, "swiper/swiper-bundle.min.js")
+
+    slugs = {}
+    for room in manifest['rooms']:
+        slug = room_slug(room)
+        if slug in slugs.values():
+            slug += "-" + hashlib.sha1(room.encode()).hexdigest()[:6]
+        slugs[room] = slug
+
+    os.makedirs(os.path.join(out, "rooms"), exist_ok=True)
+    new_state = {}
+    rebuilt = 0
+    media_written = 0
+    for room, data in manifest['rooms'].items():
+        sources = room_sources(root, room, data)
+        fingerprint = room_fingerprint(root, room, data, sources, [logo, swiper_css, swiper_js])
+        page_path = os.path.join(out, "rooms", f"{slugs[room]}.html")
+        new_state[room] = {'slug': slugs[room], 'fingerprint': fingerprint}
+        if state.get(room) == new_state[room] and os.path.exists(page_path):
+            continue
+        for path in sources:
+            media_written += sync_file(os.path.join(root, path), os.path.join(out, "media", path))
+        prune_media(out, room, sources)
+        with open(page_path, "w", encoding="utf-8") as f:
+            f.write(room_page(root, room, data, logo, swiper_css, swiper_js))
+        rebuilt += 1
+
+    # Pages of rooms that no longer exist
+    for room, entry in state.items():
+        if room not in new_state:
+            try:
+                os.remove(os.path.join(out, "rooms", f"{entry['slug']}.html"))
+            except FileNotFoundError:
+                pass
+            for media_root in (BASE_PATH, f"{DERIVATIVE_ROOT}/{BASE_PATH}"):
+                shutil.rmtree(os.path.join(out, "media", media_root, room), ignore_errors=True)
+
+    search = [{
+        'name': room,
+        'url': f"rooms/{quote(slugs[room])}.html",
+        'info': data['info'] or "",
+        'points': [{'name': point, 'info': point_data['info'] or ""}
+                   for point, point_data in data['points'].items()],
+    } for room, data in manifest['rooms'].items()]
+    with open(os.path.join(out, "search.json"), "w", encoding="utf-8") as f:
+        json.dump(search, f, ensure_ascii=False, separators=(",", ":"))
+
+    links = "".join(f'<li><a href="rooms/{quote(slugs[room])}.html">{html.escape(room)}</a></li>'
+                    for room in manifest['rooms'])
+    with open(os.path.join(out, "index.html"), "w", encoding="utf-8") as f:
+        f.write(page("LOCOROM rooms",
+                     f'<input type="search" id="q" placeholder="Search room or landmark, e.g. 415B">'
+                     f'<ul class="rooms" id="rooms">{links}</ul><script>{SEARCH_JS}</script>',
+                     "", logo))
+
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(new_state, f, indent=1, sort_keys=True)
+    return rebuilt, len(manifest['rooms']), media_written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export every room as a static site")
+    parser.add_argument("--root", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="repository checkout containing Rooms/")
+    parser.add_argument("--output", default=SITE_DIR)
+    parser.add_argument("--force", action="store_true", help="rebuild every room")
+    args = parser.parse_args()
+    rebuilt, total, media = export(args.root, args.output, args.force)
+    print(f"Exported {args.output}: rebuilt {rebuilt} of {total} rooms, wrote {media} media files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+from urllib.parse import urlsplit, unquote, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the parts of GitHub the apps use, for benchmarks.
+#
+#   <base>/api/repos/{repo}/contents/{path}   GET (with ETag/304), PUT, DELETE
+#   <base>/api/repos/{repo}/git/...           ref, commits, recursive trees,
+#                                             blobs, trees, commits, ref updates
+#   <base>/raw/{repo}/{ref}/{path}            GET and HEAD, ref = branch or commit
+#
+# The repository is held in memory as commits of flat {path: blob SHA}
+# trees, loaded from a copy of a checkout, so admin flows can write to it
+# freely. Point the apps at it with GITHUB_API_URL=<base>/api and
+# GITHUB_RAW_URL=<base>/raw (read by room_store at import time). Every
+# request is counted with its bytes, and can be delayed to mimic network
+# latency.
+#
+# room_store reads the URLs when it is imported, so this module must not
+# import it (or anything that does) before the server is running.
+
+GITHUB_REPO = "2005lakshmi/locorom"
+BRANCH = "main"
+FILE_MODE = "100644"
+RATE_LIMIT = 5000
+
+
+def blob_sha(content):
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def _digest(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class FakeRepo:
+    def __init__(self, files, repo=GITHUB_REPO, branch=BRANCH):
+        self.repo = repo
+        self.branch = branch
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.lock = threading.Lock()
+        tree = {path: self.add_blob(content) for path, content in files.items()}
+        self.head = self.add_commit("Initial import", self.add_tree(tree), None)
+
+    @classmethod
+    def from_directory(cls, root, folders=("Rooms", "Derivatives"), files=("manifest.json",)):
+        """Load folders and single files of a checkout into a new repository"""
+        contents = {}
+        for folder in folders:
+            for dirpath, dirnames, filenames in os.walk(os.path.join(root, folder)):
+                for name in filenames:
+                    full = os.path.join(dirpath, name)
+                    with open(full, "rb") as f:
+                        contents[os.path.relpath(full, root).replace(os.sep, "/")] = f.read()
+        for name in files:
+            if os.path.exists(os.path.join(root, name)):
+                with open(os.path.join(root, name), "rb") as f:
+                    contents[name] = f.read()
+        return cls(contents)
+
+    def add_blob(self, content):
+        sha = blob_sha(content)
+        self.blobs[sha] = content
+        return sha
+
+    def add_tree(self, entries):
+        sha = _digest(sorted(entries.items()))
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def add_commit(self, message, tree_sha, parent):
+        sha = _digest(message, tree_sha, parent, len(self.commits))
+        self.commits[sha] = {'tree': tree_sha, 'parent': parent, 'message': message}
+        return sha
+
+    def files_at(self, ref):
+        commit = self.commits.get(self.head if ref == self.branch else ref)
+        return self.trees[commit['tree']] if commit else None
+
+    def commit_files(self, message, files):
+        """Commit a new flat tree on top of head (Contents API writes)"""
+        self.head = self.add_commit(message, self.add_tree(files), self.head)
+
+
+def _directories(files):
+    dirs = set()
+    for path in files:
+        parts = path.split("/")[:-1]
+        for i in range(1, len(parts) + 1):
+            dirs.add("/".join(parts[:i]))
+    return dirs
+
+
+class FakeGitHub:
+    def __init__(self, repo, latency=0.0):
+        self.repo = repo
+        self.latency = latency
+        self.base_url = None
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.requests = []
+
+    def record(self, kind, method, bytes_in, bytes_out, status):
+        with self._stats_lock:
+            self.requests.append((kind, method, bytes_in, bytes_out, status))
+
+    def stats(self):
+        """Return {kind: {'calls', 'bytes_in', 'bytes_out'}} since the last reset"""
+        with self._stats_lock:
+            totals = {}
+            for kind, method, bytes_in, bytes_out, status in self.requests:
+                entry = totals.setdefault(kind, {'calls': 0, 'bytes_in': 0, 'bytes_out': 0})
+                entry['calls'] += 1
+                entry['bytes_in'] += bytes_in
+                entry['bytes_out'] += bytes_out
+            return totals
+
+    # Contents API
+
+    def _download_url(self, path):
+        return f"{self.base_url}/raw/{self.repo.repo}/{self.repo.branch}/{path}"
+
+    def contents_get(self, path):
+        files = self.repo.files_at(self.repo.branch)
+        if path in files:
+            content = self.repo.blobs[files[path]]
+            return 200, {
+                'name': path.rsplit("/", 1)[-1], 'path': path, 'sha': files[path], 'size': len(content),
+                'type': 'file', 'encoding': 'base64', 'content': base64.b64encode(content).decode(),
+                'download_url': self._download_url(path),
+            }
+        prefix = path.rstrip("/") + "/" if path else ""
+        children = {}
+        for file_path, sha in files.items():
+            if file_path.startswith(prefix):
+                name, _, rest = file_path[len(prefix):].partition("/")
+                if rest:
+                    children.setdefault(name, {'type': 'dir', 'sha': None})
+                else:
+                    children[name] = {'type': 'file', 'sha': sha}
+        if not children:
+            return 404, {'message': 'Not Found'}
+        listing = []
+        for name in sorted(children):
+            child_path = prefix + name
+            entry = children[name]
+            listing.append({
+                'name': name, 'path': child_path, 'type': entry['type'],
+                'sha': entry['sha'] or _digest(child_path, sorted((p, s) for p, s in files.items()
+                                                                   if p.startswith(child_path + "/"))),
+                'download_url': self._download_url(child_path) if entry['type'] == 'file' else None,
+            })
+        return 200, listing
+
+    def contents_put(self, path, body):
+        with self.repo.lock:
+            files = dict(self.repo.files_at(self.repo.branch))
+            if path in files and body.get('sha') != files[path]:
+                return 422, {'message': '"sha" wasn\'t supplied or does not match'}
+            status = 200 if path in files else 201
+            files[path] = self.repo.add_blob(base64.b64decode(body.get('content', '')))
+            self.repo.commit_files(body.get('message', ''), files)
+            return status, {'content': {'path': path, 'sha': files[path]}, 'commit': {'sha': self.repo.head}}
+
+    def contents_delete(self, path, body):
+        with self.repo.lock:
+            files = dict(self.repo.files_at(self.repo.branch))
+            if path not in files:
+                return 404, {'message': 'Not Found'}
+            if body.get('sha') != files[path]:
+                return 409, {'message': 'sha does not match'}
+            del files[path]
+            self.repo.commit_files(body.get('message', ''), files)
+            return 200, {'commit': {'sha': self.repo.head}}
+
+    # Git Data API
+
+    def git(self, method, path, query, body):
+        repo = self.repo
+        if method == "GET" and path == f"ref/heads/{repo.branch}":
+            return 200, {'ref': f"refs/heads/{repo.branch}", 'object': {'sha': repo.head, 'type': 'commit'}}
+        if method == "GET" and path.startswith("commits/"):
+            commit = repo.commits.get(path[len("commits/"):])
+            if commit is None:
+                return 404, {'message': 'Not Found'}
+            return 200, {'tree': {'sha': commit['tree']},
+                         'parents': [{'sha': commit['parent']}] if commit['parent'] else []}
+        if method == "GET" and path.startswith("trees/"):
+            sha = path[len("trees/"):]
+            if sha in repo.commits:
+                # A commit SHA lists that commit's root tree, as on GitHub
+                sha = repo.commits[sha]['tree']
+            files = repo.trees.get(sha)
+            if files is None:
+                return 404, {'message': 'Not Found'}
+            tree = [{'path': d, 'mode': '040000', 'type': 'tree', 'sha': _digest(d)} for d in _directories(files)]
+            tree += [{'path': p, 'mode': FILE_MODE, 'type': 'blob', 'sha': s, 'size': len(repo.blobs[s])}
+                     for p, s in files.items()]
+            return 200, {'sha': sha, 'tree': sorted(tree, key=lambda e: e['path']), 'truncated': False}
+        if method == "GET" and path.startswith("blobs/"):
+            content = repo.blobs.get(path[len("blobs/"):])
+            if content is None:
+                return 404, {'message': 'Not Found'}
+            return 200, {'content': base64.b64encode(content).decode(), 'encoding': 'base64', 'size': len(content)}
+        if method == "POST" and path == "blobs":
+            with repo.lock:
+                return 201, {'sha': repo.add_blob(base64.b64decode(body['content']))}
+        if method == "POST" and path == "trees":
+            with repo.lock:
+                files = dict(repo.trees.get(body.get('base_tree'), {}))
+                for entry in body['tree']:
+                    if entry.get('sha') is None:
+                        files.pop(entry['path'], None)
+                    elif entry['sha'] not in repo.blobs:
+                        return 422, {'message': f"unknown blob {entry['sha']}"}
+                    else:
+                        files[entry['path']] = entry['sha']
+                return 201, {'sha': repo.add_tree(files)}
+        if method == "POST" and path == "commits":
+            with repo.lock:
+                parents = body.get('parents') or [None]
+                return 201, {'sha': repo.add_commit(body.get('message', ''), body['tree'], parents[0])}
+        if method == "PATCH" and path == f"refs/heads/{repo.branch}":
+            with repo.lock:
+                commit = repo.commits.get(body['sha'])
+                if commit is None or (commit['parent'] != repo.head and not body.get('force')):
+                    return 422, {'message': 'Update is not a fast forward'}
+                repo.head = body['sha']
+                return 200, {'object': {'sha': repo.head}}
+        return 404, {'message': 'Not Found'}
+
+    def raw(self, path):
+        owner, name, ref, file_path = path.split("/", 3)
+        files = self.repo.files_at(ref) if f"{owner}/{name}" == self.repo.repo else None
+        if not files or file_path not in files:
+            return None
+        return self.repo.blobs[files[file_path]]
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    github = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b""
+        return raw, (json.loads(raw) if raw else {})
+
+    def _reply(self, kind, status, payload, bytes_in=0, content_type="application/json"):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if status == 200 and self.command == "GET" and etag in self.headers.get('If-None-Match', ''):
+            status, body = 304, b""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('ETag', etag)
+        if kind != "raw":
+            self.send_header('X-RateLimit-Limit', str(RATE_LIMIT))
+            self.send_header('X-RateLimit-Remaining', str(RATE_LIMIT - 1))
+            self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        self.github.record(kind, self.command, bytes_in, len(body) if self.command != "HEAD" else 0, status)
+
+    def _handle(self):
+        if self.github.latency:
+            time.sleep(self.github.latency)
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        repo_prefix = f"/api/repos/{self.github.repo.repo}/"
+        raw_in, body = self._read_body() if self.command in ("PUT", "POST", "PATCH", "DELETE") else (b"", {})
+        if path.startswith("/raw/"):
+            content = self.github.raw(path[len("/raw/"):])
+            if content is None:
+                self._reply("raw", 404, b"404: Not Found", content_type="text/plain")
+            else:
+                self._reply("raw", 200, content, content_type="application/octet-stream")
+        elif path.startswith(repo_prefix + "contents"):
+            target = path[len(repo_prefix + "contents"):].strip("/")
+            handler = {'GET': lambda: self.github.contents_get(target),
+                       'PUT': lambda: self.github.contents_put(target, body),
+                       'DELETE': lambda: self.github.contents_delete(target, body)}.get(self.command)
+            status, payload = handler() if handler else (405, {'message': 'Method Not Allowed'})
+            self._reply("contents", status, payload, len(raw_in))
+        elif path.startswith(repo_prefix + "git/"):
+            status, payload = self.github.git(self.command, path[len(repo_prefix + "git/"):],
+                                              parse_qs(url.query), body)
+            self._reply("git", status, payload, len(raw_in))
+        else:
+            self._reply("other", 404, {'message': 'Not Found'}, len(raw_in))
+
+    do_GET = do_HEAD = do_PUT = do_POST = do_PATCH = do_DELETE = _handle
+
+
+def start(repo, latency=0.0, host="127.0.0.1", port=0):
+    """Serve repo in a background thread; return (FakeGitHub, server)"""
+    github = FakeGitHub(repo, latency)
+    handler = type("Handler", (FakeGitHubHandler,), {'github': github})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    github.base_url = f"http://{host}:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return github, server
@@ -0,0 +1,247 @@
+import time
+import base64
+import random
+import hashlib
+import requests
+from http_metrics import InstrumentedSession
+from room_store import GITHUB_REPO, BRANCH, API_URL
+from derivatives import DERIVATIVE_ROOT, derivative_path, derivatives_among, parse_derivative
+from streaming_upload import CHUNK_SIZE, Base64JsonBody, json_headers, upload_size
+
+# Thin client for the GitHub Git Data API (blobs, trees, commits, refs).
+#
+# Writing through trees lets a whole batch of changes land as one commit
+# with a single ref update, instead of one Contents API commit per file.
+# Derivatives under Derivatives/ are keyed by their source's path, so the
+# moves and deletes here carry them along in the same commit. Files
+# generated from the tree (manifest.json) are kept current by a
+# finish_entries hook that sees every commit's entries. api_url can point
+# at a local fake of these endpoints for testing.
+#
+# call_with_retries retries transient failures (409, 5xx, rate limits,
+# dropped connections) with exponential backoff and full jitter. A 403 is
+# only transient when GitHub marks it as a rate limit; otherwise it is a
+# permissions error that no retry will fix.
+
+FILE_MODE = "100644"
+DEFAULT_RETRIES = 4
+BASE_DELAY = 0.5  # seconds before the first retry
+MAX_DELAY = 8.0
+TRANSIENT_STATUS = {409, 429, 500, 502, 503, 504}
+
+
+class GitDataError(Exception):
+    """A Git Data API call returned an unexpected status"""
+
+    def __init__(self, message, status_code=None, rate_limited=False):
+        self.status_code = status_code
+        self.rate_limited = rate_limited
+        super().__init__(message)
+
+
+def is_rate_limited(response):
+    """True if a 403/429 response is GitHub throttling rather than refusing"""
+    return response.headers.get('X-RateLimit-Remaining') == "0" or 'Retry-After' in response.headers
+
+
+def is_transient(error):
+    """True if a failed call is worth retrying"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if not isinstance(error, GitDataError):
+        return False
+    return error.status_code in TRANSIENT_STATUS or (error.status_code == 403 and error.rate_limited)
+
+
+def call_with_retries(fn, *args, retries=DEFAULT_RETRIES, sleep=time.sleep):
+    """Call fn(*args), retrying transient errors with jittered exponential backoff
+
+    Only safe for calls that may run twice, such as blob and tree creation,
+    where the same input always gives the same SHA.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args)
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                raise
+            sleep(random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt)))
+
+
+class GitDataClient:
+    def __init__(self, repo=GITHUB_REPO, branch=BRANCH, api_url=API_URL, session=None, finish_entries=None):
+        self.branch = branch
+        self.base = f"{api_url}/repos/{repo}/git"
+        self.session = session or InstrumentedSession()
+        # finish_entries(base_tree, entries) -> entries to commit
+        self.finish_entries = finish_entries
+        self._last_tree = None
+
+    def _call(self, method, path, expected, json=None, data=None):
+        headers = None if data is None else json_headers()
+        response = self.session.request(method, f"{self.base}/{path}", headers=headers, json=json, data=data)
+        if response.status_code != expected:
+            raise GitDataError(f"{method} {path} failed (HTTP {response.status_code})", response.status_code,
+                               is_rate_limited(response))
+        return response.json()
+
+    def get_head(self):
+        """Return (commit SHA, tree SHA) of the branch head"""
+        commit_sha = self._call("GET", f"ref/heads/{self.branch}", 200)['object']['sha']
+        tree_sha = self._call("GET", f"commits/{commit_sha}", 200)['tree']['sha']
+        return commit_sha, tree_sha
+
+    def create_blob(self, content):
+        """Upload bytes or a binary file object (read from the start) as a blob; return its SHA"""
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        body = Base64JsonBody(content, {"encoding": "base64"})
+        return self._call("POST", "blobs", 201, data=body)['sha']
+
+    def get_blob(self, sha):
+        """Return the content of a blob as bytes"""
+        return base64.b64decode(self._call("GET", f"blobs/{sha}", 200)['content'])
+
+    def get_tree(self, tree_sha):
+        """Return the recursive listing of a tree
+
+        The last listing is kept: a tree SHA always names the same content,
+        and one commit may need its base tree more than once.
+        """
+        last = self._last_tree
+        if last is not None and last[0] == tree_sha:
+            return last[1]
+        data = self._call("GET", f"trees/{tree_sha}?recursive=1", 200)
+        if data.get('truncated'):
+            raise GitDataError(f"Tree {tree_sha} is too large to list in one request")
+        self._last_tree = (tree_sha, data['tree'])
+        return data['tree']
+
+    def tree_blobs(self, tree_sha):
+        """Return {path: blob SHA} for every file in a tree"""
+        return {item['path']: item['sha'] for item in self.get_tree(tree_sha) if item['type'] == 'blob'}
+
+    def create_tree(self, base_tree, entries):
+        data = {"base_tree": base_tree, "tree": entries}
+        return self._call("POST", "trees", 201, data)['sha']
+
+    def create_commit(self, message, tree_sha, parent_sha):
+        data = {"message": message, "tree": tree_sha, "parents": [parent_sha]}
+        return self._call("POST", "commits", 201, data)['sha']
+
+    def update_ref(self, commit_sha):
+        self._call("PATCH", f"refs/heads/{self.branch}", 200, {"sha": commit_sha, "force": False})
+
+    def commit_tree_entries(self, message, entries, retries=2):
+        """Apply tree entries on top of the branch head as a single commit
+
+        Each entry is {'path', 'mode', 'type', 'sha'}; a None sha deletes the
+        path. entries may also be a callable that builds the list from the
+        base tree SHA. Transient failures of each write are retried; if the
+        branch moved underneath us the tree is rebuilt on the new head and the
+        ref update retried. Returns the new commit SHA, or None if there was
+        nothing to change.
+        """
+        for attempt in range(retries + 1):
+            parent_sha, base_tree = call_with_retries(self.get_head)
+            tree_entries = entries(base_tree) if callable(entries) else entries
+            if not tree_entries:
+                return None
+            if self.finish_entries is not None:
+                tree_entries = self.finish_entries(base_tree, tree_entries)
+            tree_sha = call_with_retries(self.create_tree, base_tree, tree_entries)
+            commit_sha = call_with_retries(self.create_commit, message, tree_sha, parent_sha)
+            try:
+                # Setting the ref again to the same commit is a no-op, so a
+                # retry after a lost response is safe
+                call_with_retries(self.update_ref, commit_sha)
+                return commit_sha
+            except GitDataError as e:
+                # 422: not a fast-forward, someone else committed first
+                if e.status_code != 422 or attempt == retries:
+                    raise
+
+
+    def delete_prefix(self, prefix, message):
+        """Remove every file under prefix, and its derivatives, in one commit
+
+        Costs the same handful of calls however many files are removed, and
+        either the whole folder disappears or nothing does.
+        """
+        prefix = prefix.rstrip("/")
+        prefixes = (f"{prefix}/", f"{DERIVATIVE_ROOT}/{prefix}/")
+
+        def entries(base_tree):
+            return [blob_entry(path, None) for path in self.tree_blobs(base_tree) if path.startswith(prefixes)]
+
+        return self.commit_tree_entries(message, entries)
+
+    def delete_paths(self, paths, message):
+        """Remove files and their derivatives in one commit
+
+        paths maps each path to the blob SHA it was listed with (None for
+        any); if one of them changed or disappeared since, nothing is
+        removed.
+        """
+        def entries(base_tree):
+            blobs = self.tree_blobs(base_tree)
+            removed = []
+            for path, sha in paths.items():
+                if path not in blobs or sha not in (None, blobs[path]):
+                    raise GitDataError(f"{path} changed since it was listed")
+                removed += [path] + derivatives_among(blobs, path)
+            return [blob_entry(path, None) for path in removed]
+
+        return self.commit_tree_entries(message, entries)
+
+    def move_paths(self, moves, message):
+        """Rename or move files by re-pointing tree entries at their blobs
+
+        moves maps old path -> new path. No file content is transferred, so
+        the cost does not depend on file size, and all moves land in one
+        commit. Targets may be other sources in the same batch, which allows
+        swaps and reordering. Derivatives move with their source, and any
+        a target name still had from an earlier file are removed.
+        """
+        def entries(base_tree):
+            blobs = {item['path']: item for item in self.get_tree(base_tree) if item['type'] == 'blob'}
+            all_moves = dict(moves)
+            for old_path, new_path in moves.items():
+                if old_path not in blobs:
+                    raise GitDataError(f"{old_path} does not exist")
+                if new_path in blobs and new_path not in moves:
+                    raise GitDataError(f"{new_path} already exists")
+                for derived in derivatives_among(blobs, old_path):
+                    _, width, fmt = parse_derivative(derived)
+                    all_moves[derived] = derivative_path(new_path, width, fmt)
+            targets = set(all_moves.values())
+            tree_entries = [{"path": new_path, "mode": blobs[old_path]['mode'], "type": "blob",
+                             "sha": blobs[old_path]['sha']} for old_path, new_path in all_moves.items()]
+            stale = [old_path for old_path in all_moves if old_path not in targets]
+            for new_path in moves.values():
+                stale += [p for p in derivatives_among(blobs, new_path) if p not in targets and p not in all_moves]
+            tree_entries += [blob_entry(path, None) for path in stale]
+            return tree_entries
+
+        return self.commit_tree_entries(message, entries)
+
+
+def blob_sha(content):
+    """Return the SHA git gives bytes or a binary file object as a blob
+
+    Matches `git hash-object`, so it can be compared with tree listings
+    without uploading anything. File objects are hashed from the start in
+    chunks and rewound afterwards.
+    """
+    if isinstance(content, (bytes, bytearray)):
+        return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+    content.seek(0)
+    digest = hashlib.sha1(b"blob %d\0" % upload_size(content))
+    for chunk in iter(lambda: content.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_entry(path, sha):
+    return {"path": path, "mode": FILE_MODE, "type": "blob", "sha": sha}
@@ -0,0 +1,83 @@
+import time
+import threading
+from collections import OrderedDict
+from http_metrics import default_session
+
+# Conditional-request cache for GitHub API reads.
+#
+# Responses are stored by URL together with their ETag. Fresh entries are
+# served without a request; stale ones are revalidated with If-None-Match.
+# GitHub does not count 304 responses against the token's rate limit.
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL = 30  # seconds an entry is served without revalidation
+
+
+class ResponseCache:
+    """Size-bounded LRU of (response, ETag) pairs with a per-entry TTL"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, url, headers=None, ttl=None, session=None):
+        """GET url, answering from the cache or revalidating when possible"""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+                if now < entry['expires']:
+                    self.hits += 1
+                    return entry['response']
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            request_headers['If-None-Match'] = entry['etag']
+        response = (session or default_session).get(url, headers=request_headers)
+
+        with self._lock:
+            if response.status_code == 304 and entry is not None:
+                self.not_modified += 1
+                entry['expires'] = now + ttl
+                self._entries[url] = entry
+                return entry['response']
+            self.misses += 1
+            etag = response.headers.get('ETag')
+            if response.status_code == 200 and etag:
+                self._entries[url] = {'response': response, 'etag': etag, 'expires': now + ttl}
+                self._entries.move_to_end(url)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.pop(url, None)
+        return response
+
+    def invalidate(self, prefix=""):
+        """Drop every entry whose URL starts with prefix"""
+        with self._lock:
+            for url in [u for u in self._entries if u.startswith(prefix)]:
+                del self._entries[url]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+            }
+
+
+# Process-wide cache shared by every Streamlit session
+response_cache = ResponseCache()
+
+
+def cached_get(url, headers=None, ttl=None, session=None):
+    return response_cache.get(url, headers, ttl, session)
@@ -0,0 +1,247 @@
+import re
+import time
+import bisect
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+# Instrumented HTTP layer for every outbound request the apps make.
+#
+# InstrumentedSession times each request and records it in the process-wide
+# `metrics`, grouped by endpoint. An endpoint is a coarse route such as
+# "api:contents" or "api:git/trees", so the label set stays small. For each
+# endpoint it keeps counts by status, failure kinds (rate limited, 4xx, 5xx,
+# network), bytes in each direction and a latency histogram. `rerun()` wraps
+# one Streamlit script run and records how many calls it made. Those calls
+# are counted through a context variable, so concurrent sessions (each
+# running on its own thread) only count their own; thread pools working for
+# a run wrap their jobs in with_current_run(). Everything can be exported in
+# the Prometheus text format, either from the admin panel or from a small
+# scrape server.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_RERUNS = 50
+METRIC_PREFIX = "locorom"
+
+# [calls] of the script run the current thread is working for, if any
+_current_run = contextvars.ContextVar("http_metrics_run", default=None)
+
+
+def endpoint_of(url):
+    """Map a URL to a low-cardinality endpoint label"""
+    parts = urlsplit(url)
+    path = parts.path
+    if parts.hostname == "raw.githubusercontent.com" or path.startswith("/raw/"):
+        return "raw"
+    match = re.search(r"/repos/[^/]+/[^/]+/(contents|git/[a-z]+)", path)
+    if match:
+        return f"api:{match.group(1)}"
+    if parts.hostname == "api.github.com" or path.startswith("/api/"):
+        return "api:other"
+    return parts.hostname or "unknown"
+
+
+def failure_kind(status_code, headers):
+    if status_code in (403, 429) and (headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in headers):
+        return "rate_limited"
+    if status_code >= 500:
+        return "server_error"
+    if status_code >= 400 and status_code != 404:
+        return "client_error"
+    return None
+
+
+class _Endpoint:
+    def __init__(self):
+        self.statuses = {}
+        self.failures = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.seconds = 0.0
+        self.count = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def quantile(self, q):
+        """Estimate a latency quantile as the upper bound of its histogram bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float('inf'),), self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class HttpMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.reruns = deque(maxlen=RECENT_RERUNS)
+        self.rerun_count = 0
+        self.rerun_calls = 0
+
+    def record(self, method, url, status, seconds, bytes_sent, bytes_received, failure=None):
+        endpoint = endpoint_of(url)
+        with self._lock:
+            stats = self._endpoints.setdefault((endpoint, method), _Endpoint())
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if failure:
+                stats.failures[failure] = stats.failures.get(failure, 0) + 1
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            stats.seconds += seconds
+            stats.count += 1
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            run = _current_run.get()
+            if run is not None:
+                run[0] += 1
+
+    @contextmanager
+    def rerun(self, page):
+        """Record the calls made while one script run executes"""
+        run = [0]
+        token = _current_run.set(run)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            _current_run.reset(token)
+            with self._lock:
+                calls = run[0]
+                self.rerun_count += 1
+                self.rerun_calls += calls
+                self.reruns.append({'time': time.time(), 'page': page, 'calls': calls,
+                                    'seconds': round(time.perf_counter() - started, 3)})
+
+    def endpoint_rows(self):
+        """Return one summary dict per (endpoint, method), busiest first"""
+        with self._lock:
+            rows = [{
+                'endpoint': endpoint,
+                'method': method,
+                'calls': s.count,
+                'failures': sum(s.failures.values()),
+                'rate_limited': s.failures.get('rate_limited', 0),
+                'statuses': ", ".join(f"{code}: {n}" for code, n in sorted(s.statuses.items(), key=str)),
+                'mean_ms': round(1000 * s.seconds / s.count, 1) if s.count else None,
+                'p95_ms': 1000 * s.quantile(0.95) if s.count else None,
+                'kb_sent': round(s.bytes_sent / 1024, 1),
+                'kb_received': round(s.bytes_received / 1024, 1),
+            } for (endpoint, method), s in self._endpoints.items()]
+        return sorted(rows, key=lambda r: -r['calls'])
+
+    def prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        p = METRIC_PREFIX
+        lines = [
+            f"# HELP {p}_http_requests_total Outbound HTTP requests by endpoint, method and status.",
+            f"# TYPE {p}_http_requests_total counter",
+        ]
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            for (endpoint, method), s in endpoints:
+                for status, n in sorted(s.statuses.items(), key=str):
+                    lines.append(f'{p}_http_requests_total{{endpoint="{endpoint}",method="{method}",'
+                                 f'status="{status}"}} {n}')
+            lines += [f"# HELP {p}_http_failures_total Failed outbound requests by kind.",
+                      f"# TYPE {p}_http_failures_total counter"]
+            for (endpoint, method), s in endpoints:
+                for kind, n in sorted(s.failures.items()):
+                    lines.append(f'{p}_http_failures_total{{endpoint="{endpoint}",method="{method}",'
+                                 f'kind="{kind}"}} {n}')
+            lines += [f"# HELP {p}_http_request_duration_seconds Outbound request latency.",
+                      f"# TYPE {p}_http_request_duration_seconds histogram"]
+            for (endpoint, method), s in endpoints:
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS, s.buckets):
+                    cumulative += n
+                    lines.append(f'{p}_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{p}_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {s.count}')
+                lines.append(f'{p}_http_request_duration_seconds_sum{{{labels}}} {s.seconds:.6f}')
+                lines.append(f'{p}_http_request_duration_seconds_count{{{labels}}} {s.count}')
+            for direction in ("sent", "received"):
+                lines += [f"# HELP {p}_http_bytes_{direction}_total HTTP body bytes {direction} by outbound requests.",
+                          f"# TYPE {p}_http_bytes_{direction}_total counter"]
+                for (endpoint, method), s in endpoints:
+                    lines.append(f'{p}_http_bytes_{direction}_total{{endpoint="{endpoint}",method="{method}"}} '
+                                 f'{getattr(s, "bytes_" + direction)}')
+            lines += [f"# HELP {p}_reruns_total Streamlit script runs.",
+                      f"# TYPE {p}_reruns_total counter",
+                      f"{p}_reruns_total {self.rerun_count}",
+                      f"# HELP {p}_rerun_http_calls_total Outbound requests made during script runs.",
+                      f"# TYPE {p}_rerun_http_calls_total counter",
+                      f"{p}_rerun_http_calls_total {self.rerun_calls}"]
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry shared by every session and thread
+metrics = HttpMetrics()
+
+
+def with_current_run(fn):
+    """Wrap fn so that calls made from pool threads count toward the caller's script run"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def _body_length(body):
+    if body is None:
+        return 0
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+class InstrumentedSession(requests.Session):
+    """requests.Session that records every request in `metrics`"""
+
+    def send(self, request, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except requests.RequestException:
+            metrics.record(request.method, request.url, "error", time.perf_counter() - started,
+                           _body_length(request.body), 0, "network_error")
+            raise
+        received = (len(response.content) if not kwargs.get('stream')
+                    else int(response.headers.get('Content-Length') or 0))
+        metrics.record(request.method, request.url, response.status_code, time.perf_counter() - started,
+                       _body_length(request.body), received,
+                       failure_kind(response.status_code, response.headers))
+        return response
+
+
+# Shared session for code that used to call requests.get directly
+default_session = InstrumentedSession()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """Serve /metrics for Prometheus from a background thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
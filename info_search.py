@@ -0,0 +1,118 @@
+import re
+import math
+from concurrent.futures import ThreadPoolExecutor
+from room_store import BASE_PATH
+from http_metrics import with_current_run
+from room_search import tokenize
+
+# Full-text search over the info.txt location descriptions.
+#
+# Every room and every point is one document. Documents are scored with
+# BM25, and query words also match longer words they prefix ("stair" ->
+# "staircase") at a discount, so landmark queries like "near the library
+# staircase" find the right point without fetching anything per room.
+
+K1 = 1.5
+B = 0.75
+PREFIX_WEIGHT = 0.5
+MIN_PREFIX_LENGTH = 3
+STOPWORDS = {"a", "an", "and", "at", "by", "for", "from", "in", "is", "near", "next",
+             "of", "on", "or", "the", "to", "with"}
+
+
+def _terms(text):
+    return [t for t in tokenize(text) if t not in STOPWORDS]
+
+
+def documents_from_store(store, max_workers=8):
+    """Return [(room, point or None, text)] for every info.txt in store"""
+    targets = []
+    for room in store.list_rooms():
+        targets.append((room, None, f"{BASE_PATH}/{room}/info.txt"))
+        for point in store.list_points(room):
+            targets.append((room, point, f"{BASE_PATH}/{room}/{point}/info.txt"))
+    # Snapshot stores fetch each info.txt once; do those fetches in parallel
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        texts = list(executor.map(with_current_run(lambda target: store.read_text(target[2])), targets))
+    return [(room, point, text) for (room, point, _), text in zip(targets, texts) if text and text.strip()]
+
+
+def documents_from_manifest(manifest):
+    docs = []
+    for room, data in manifest['rooms'].items():
+        if data.get('info'):
+            docs.append((room, None, data['info']))
+        for point, point_data in data['points'].items():
+            if point_data.get('info'):
+                docs.append((room, point, point_data['info']))
+    return docs
+
+
+def match_spans(text, words):
+    """Return [(start, end)] of every word of text that starts with one of words"""
+    if not words:
+        return []
+    pattern = re.compile(r"\b(" + "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True)) + r")\w*",
+                         re.IGNORECASE)
+    return [m.span() for m in pattern.finditer(text)]
+
+
+def _mark(text, spans, marker):
+    parts = []
+    end = 0
+    for start, stop in spans:
+        parts += [text[end:start], marker, text[start:stop], marker]
+        end = stop
+    return "".join(parts) + text[end:]
+
+
+def highlight(text, words, marker="**"):
+    """Wrap every word of text that starts with one of words in marker"""
+    return _mark(text, match_spans(text, words), marker)
+
+
+class InfoSearchIndex:
+    def __init__(self, documents):
+        self.documents = list(documents)
+        self.postings = {}
+        self.lengths = []
+        for doc_id, (_, _, text) in enumerate(self.documents):
+            terms = _terms(text)
+            self.lengths.append(len(terms))
+            for term in terms:
+                counts = self.postings.setdefault(term, {})
+                counts[doc_id] = counts.get(doc_id, 0) + 1
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        self.vocabulary = sorted(self.postings)
+
+    def _idf(self, term):
+        n = len(self.documents)
+        df = len(self.postings[term])
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _expand(self, query_term):
+        """Return [(term, weight)] for a query term: itself plus terms it prefixes"""
+        expanded = [(query_term, 1.0)] if query_term in self.postings else []
+        if len(query_term) >= MIN_PREFIX_LENGTH:
+            expanded += [(t, PREFIX_WEIGHT) for t in self.vocabulary
+                         if t != query_term and t.startswith(query_term)]
+        return expanded
+
+    def hits(self, query, limit=10):
+        """Return [(score, room, point, text, match spans)] best first"""
+        query_terms = _terms(query)
+        scores = {}
+        for query_term in query_terms:
+            for term, weight in self._expand(query_term):
+                idf = self._idf(term)
+                for doc_id, tf in self.postings[term].items():
+                    norm = K1 * (1 - B + B * self.lengths[doc_id] / self.average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * tf * (K1 + 1) / (tf + norm)
+        ranked = sorted(scores, key=lambda d: -scores[d])[:limit]
+        return [(scores[d], self.documents[d][0], self.documents[d][1], self.documents[d][2],
+                 match_spans(self.documents[d][2], query_terms)) for d in ranked]
+
+    def search(self, query, limit=10):
+        """Return [(score, room, point, highlighted text)] best first"""
+        return [(score, room, point, _mark(text, spans, "**"))
+                for score, room, point, text, spans in self.hits(query, limit)]
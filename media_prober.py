@@ -0,0 +1,82 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from http_metrics import InstrumentedSession, with_current_run
+from media_sequence import sequence_name
+
+# Media discovery by URL for deployments without a manifest.
+#
+# Probes run on one pooled keep-alive session with a bounded number in
+# flight. Media names follow the upload sequence a, b, ..., z, aa, ..., so
+# probing stops at the first name with no file. Misses are cached per folder
+# so reruns do not repeat them.
+
+MEDIA_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'mp4']
+MAX_WORKERS = 16
+WINDOW = 4  # sequence names probed per round
+NEGATIVE_TTL = 600  # seconds a folder's misses are trusted
+PROBE_TIMEOUT = 5
+
+
+class MediaProber:
+    """Concurrent HEAD prober with per-folder negative caching"""
+
+    def __init__(self, max_workers=MAX_WORKERS, window=WINDOW, negative_ttl=NEGATIVE_TTL):
+        self.window = window
+        self.negative_ttl = negative_ttl
+        self.session = InstrumentedSession()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._missing = {}
+        self._lock = threading.Lock()
+
+    def _misses(self, folder):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._missing.get(folder)
+            if entry is None or now - entry[0] > self.negative_ttl:
+                entry = (now, set())
+                self._missing[folder] = entry
+            return entry[1]
+
+    def _exists(self, url, misses):
+        if url in misses:
+            return False
+        try:
+            found = self.session.head(url, timeout=PROBE_TIMEOUT).status_code == 200
+        except requests.RequestException:
+            return False
+        if not found:
+            with self._lock:
+                misses.add(url)
+        return found
+
+    def probe_media(self, folder, url_for):
+        """Return URLs of the media sequence in folder, stopping at the first gap
+
+        url_for(filename) builds the URL of a file inside folder.
+        """
+        misses = self._misses(folder)
+        files = []
+        start = 0
+        while True:
+            names = [sequence_name(i) for i in range(start, start + self.window)]
+            urls = [[url_for(f"{name}.{ext}") for ext in MEDIA_EXTENSIONS] for name in names]
+            flat = [url for group in urls for url in group]
+            found = dict(zip(flat, self.executor.map(with_current_run(lambda u: self._exists(u, misses)), flat)))
+            for group in urls:
+                hits = [url for url in group if found[url]]
+                if not hits:
+                    return files
+                files.extend(hits)
+            start += self.window
+
+    def probe_existing(self, folder, urls):
+        """Return the subset of urls that exist, probed concurrently"""
+        misses = self._misses(folder)
+        probes = self.executor.map(with_current_run(lambda u: self._exists(u, misses)), urls)
+        return [url for url, ok in zip(urls, probes) if ok]
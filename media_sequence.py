@@ -0,0 +1,131 @@
+import time
+import string
+import threading
+from room_store import MEDIA_EXTENSIONS
+
+# Media file names: a, b, ..., z, aa, ab, ... (bijective base 26).
+#
+# Names map to integers and back, so the successor of "z" is "aa" rather
+# than whatever sorts after it as a string. SequenceAllocator keeps the next
+# free index of each folder in memory: the folder is listed once to seed the
+# counter, and a batch then reserves a contiguous range of names in O(1).
+# Other processes write to the same folders, so a counter can fall behind;
+# writers check their names against the tree they commit on and seed() the
+# counter past anything they find there. Hand-inserted names ("ca" between
+# "c" and "d") are not the end of the sequence and are stepped over.
+
+# Lowercase stems that are not part of the sequence
+RESERVED_STEMS = {'info', 'thumbnail'}
+COUNTER_TTL = 300  # seconds before a folder is listed again
+
+
+def sequence_name(index):
+    """Return the index-th name of the sequence a, ..., z, aa, ab, ... (0-based)"""
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = string.ascii_lowercase[rem] + name
+    return name
+
+
+def sequence_index(name):
+    """Inverse of sequence_name; None if name is not a sequence name"""
+    if not name or any(c not in string.ascii_lowercase for c in name):
+        return None
+    index = 0
+    for c in name:
+        index = index * 26 + ord(c) - ord('a') + 1
+    return index - 1
+
+
+def is_media_name(filename):
+    """True for files shown in a folder's carousel: media, but not info or thumbnail"""
+    stem, _, ext = filename.rpartition('.')
+    return ext.lower() in MEDIA_EXTENSIONS and stem not in RESERVED_STEMS
+
+
+def sequence_indexes(filenames):
+    """Return the set of sequence indexes used by the media files in filenames"""
+    indexes = set()
+    for filename in filenames:
+        if is_media_name(filename):
+            index = sequence_index(filename.rpartition('.')[0])
+            if index is not None:
+                indexes.add(index)
+    return indexes
+
+
+def next_index(filenames):
+    """Return the index that continues the folder's sequence
+
+    Folders contain hand-inserted names such as "ca" (between "c" and "d"),
+    which are not the end of the sequence. The sequence is the single-letter
+    names plus whatever continues them without a gap, so a-i with ca and ga
+    continues at "j", and a-z with aa, ab at "ac".
+    """
+    used = sequence_indexes(filenames)
+    index = max((i + 1 for i in used if i < 26), default=0)
+    while index in used:
+        index += 1
+    return index
+
+
+def first_free_range(filenames, start, count):
+    """Return the first index >= start where count consecutive names are all unused"""
+    used = sequence_indexes(filenames)
+    index = start
+    while any(i in used for i in range(index, index + count)):
+        index += 1
+    return index
+
+
+class SequenceAllocator:
+    """Process-wide next-free-name counters, one per folder"""
+
+    def __init__(self, ttl=COUNTER_TTL):
+        self.ttl = ttl
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, folder, count, list_names):
+        """Reserve count consecutive names in folder; return the first index
+
+        list_names() returns the folder's file names. It is only called when
+        the folder has no counter yet or its counter has expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counters.get(folder)
+            if entry is None or now - entry[1] > self.ttl:
+                listed = next_index(list_names())
+                entry = [max(listed, entry[0]) if entry else listed, now]
+                self._counters[folder] = entry
+            start = entry[0]
+            entry[0] += count
+            return start
+
+    def seed(self, folder, first_free):
+        """Move folder's counter to at least first_free, e.g. after seeing a newer listing"""
+        with self._lock:
+            entry = self._counters.get(folder)
+            if entry is None:
+                self._counters[folder] = [first_free, time.monotonic()]
+            elif entry[0] < first_free:
+                entry[0] = first_free
+
+    def release(self, folder, start, count):
+        """Give back a reservation that was never used, if nothing followed it"""
+        with self._lock:
+            entry = self._counters.get(folder)
+            if entry is not None and entry[0] == start + count:
+                entry[0] = start
+
+    def forget(self, folder=""):
+        """Drop the counters of folder and everything under it (all by default)
+
+        Call after renames or deletes, which the counters do not track.
+        """
+        with self._lock:
+            for key in [k for k in self._counters if not folder or k == folder or k.startswith(folder + "/")]:
+                del self._counters[key]
@@ -0,0 +1,270 @@
+import io
+import os
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image, ImageOps
+from room_store import BASE_PATH
+from derivatives import is_image
+
+# Offline scan for duplicate photos under Rooms/.
+#
+# Byte-identical copies are found by content digest and reported on their
+# own: git stores one blob for all of them, so deleting a copy frees no
+# repository space, only the bytes viewers download for it again.
+#
+# Near-duplicates are found among the distinct contents. Every image gets a
+# 64-bit difference hash (dHash): the picture is shrunk to 9x8 greyscale and
+# each bit records whether a pixel is brighter than its right neighbour.
+# Re-encoded, resized or slightly re-shot copies land a few bits apart.
+# Hashes are packed 8 bytes per image into one uint8 array, and pairs are
+# found by XOR-ing a block of rows against the whole array and counting bits
+# through a lookup table, all in NumPy. Groups form around the image that
+# would be kept (the largest): it claims the unclaimed images within the
+# threshold of itself, so a chain of similar shots never merges into one
+# group of dissimilar ones.
+#
+# Digests and hashes are kept in an .npz index next to each file's size and
+# mtime, so a re-run only reads images that are new or changed. Reading runs
+# in a process pool.
+#
+#   python near_duplicates.py [--threshold 6] [--json report.json] [--groups]
+
+INDEX_FILE = ".near-duplicates.npz"
+HASH_SIZE = 8
+HASH_BYTES = HASH_SIZE * HASH_SIZE // 8
+# Differing bits (of 64) at or below which two photos count as the same shot
+DEFAULT_THRESHOLD = 6
+# Cells of the XOR block compared at once; bounds memory on large trees
+BLOCK_CELLS = 1 << 22
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def fingerprint(path):
+    """Return (SHA-1 digest, packed difference hash) of an image file, or None if it cannot be read"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    value = dhash(io.BytesIO(data))
+    return (hashlib.sha1(data).digest(), value) if value is not None else None
+
+
+def dhash(path):
+    """Return the packed difference hash of an image file, or None if it cannot be read"""
+    try:
+        with Image.open(path) as image:
+            # JPEGs are decoded at a fraction of full size, which is all a 9x8 hash needs
+            image.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+            image = ImageOps.exif_transpose(image).convert("L").resize((HASH_SIZE + 1, HASH_SIZE),
+                                                                       Image.Resampling.LANCZOS)
+            pixels = np.asarray(image, dtype=np.int16)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    return np.packbits(pixels[:, 1:] > pixels[:, :-1])
+
+
+def list_images(root):
+    """Return [(path, size, mtime_ns)] for every image under root/Rooms, sorted by path"""
+    images = []
+    for dirpath, _, filenames in os.walk(os.path.join(root, BASE_PATH)):
+        for name in filenames:
+            if is_image(name):
+                full = os.path.join(dirpath, name)
+                stat = os.stat(full)
+                images.append((os.path.relpath(full, root).replace(os.sep, "/"), stat.st_size, stat.st_mtime_ns))
+    return sorted(images)
+
+
+def load_index(path):
+    """Return {path: (size, mtime_ns, (digest, hash))} from an index file, or {} if there is none
+
+    Indexes written before digests were recorded count as none.
+    """
+    try:
+        with np.load(path) as data:
+            return {p: (int(s), int(m), (d.tobytes(), h)) for p, s, m, d, h in
+                    zip(data['paths'].tolist(), data['sizes'], data['mtimes'], data['digests'], data['hashes'])}
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}
+
+
+def save_index(path, images, digests, hashes):
+    np.savez_compressed(path,
+                        paths=np.array([p for p, _, _ in images], dtype=str),
+                        sizes=np.array([s for _, s, _ in images], dtype=np.int64),
+                        mtimes=np.array([m for _, _, m in images], dtype=np.int64),
+                        digests=np.frombuffer(b"".join(digests), dtype=np.uint8).reshape(-1, 20),
+                        hashes=hashes)
+
+
+def update_hashes(root, index_path, workers=None):
+    """Fingerprint new or changed images and rewrite the index
+
+    Returns ([(path, size)], [digest], hashes as an (n, 8) uint8 array,
+    images read this run). Unreadable images are left out.
+    """
+    index = load_index(index_path)
+    images = list_images(root)
+    stale = [(p, s, m) for p, s, m in images if index.get(p, (None, None))[:2] != (s, m)]
+    if stale:
+        with ProcessPoolExecutor(workers) as pool:
+            fresh = pool.map(fingerprint, [os.path.join(root, p) for p, _, _ in stale], chunksize=16)
+            for (path, size, mtime), value in zip(stale, fresh):
+                index[path] = (size, mtime, value)
+
+    kept = [(p, s, m) for p, s, m in images if index[p][2] is not None]
+    digests = [index[p][2][0] for p, _, _ in kept]
+    hashes = np.array([index[p][2][1] for p, _, _ in kept], dtype=np.uint8).reshape(-1, HASH_BYTES)
+    save_index(index_path, kept, digests, hashes)
+    return [(p, s) for p, s, _ in kept], digests, hashes, len(stale)
+
+
+def near_pairs(hashes, threshold):
+    """Yield (i, j, distance) for every pair i < j within threshold bits"""
+    n = len(hashes)
+    block = max(1, BLOCK_CELLS // max(n, 1))
+    for start in range(0, n, block):
+        rows = hashes[start:start + block]
+        distances = POPCOUNT[rows[:, None, :] ^ hashes[None, :, :]].sum(axis=2, dtype=np.uint16)
+        i, j = np.nonzero(distances <= threshold)
+        later = j > i + start
+        i, j = i[later], j[later]
+        yield from zip((i + start).tolist(), j.tolist(), distances[i, j].tolist())
+
+
+def near_groups(hashes, order, threshold):
+    """Return [(keeper, [(index, distance to keeper)])]
+
+    order ranks the indexes from the best one to keep down. Each image not
+    yet claimed, in that order, keeps itself and claims the unclaimed
+    images within threshold bits of it.
+    """
+    neighbours = {}
+    for i, j, distance in near_pairs(hashes, threshold):
+        neighbours.setdefault(i, []).append((j, distance))
+        neighbours.setdefault(j, []).append((i, distance))
+    claimed = set()
+    groups = []
+    for keeper in order:
+        if keeper in claimed or keeper not in neighbours:
+            continue
+        claimed.add(keeper)
+        members = [(i, distance) for i, distance in neighbours[keeper] if i not in claimed]
+        claimed.update(i for i, _ in members)
+        if members:
+            groups.append((keeper, sorted(members, key=lambda m: (m[1], m[0]))))
+    return groups
+
+
+def room_of(path):
+    return path.split("/")[1]
+
+
+def scan(root, index_path=None, threshold=DEFAULT_THRESHOLD, workers=None):
+    """Return a report of exact copies, near-duplicate groups and bytes per room
+
+    Exact copies keep their first path; the others count as exact_bytes,
+    which are downloaded again but stored once. Near-duplicates are
+    compared per distinct content: the largest in a group is kept, and
+    each other content's size is reclaimable once, in the room of its
+    first path.
+    """
+    images, digests, hashes, hashed = update_hashes(root, index_path or os.path.join(root, INDEX_FILE), workers)
+    rooms = {}
+    for path, size in images:
+        room = rooms.setdefault(room_of(path), {'images': 0, 'bytes': 0, 'exact_copies': 0, 'exact_bytes': 0,
+                                                'near_duplicates': 0, 'reclaimable_bytes': 0})
+        room['images'] += 1
+        room['bytes'] += size
+
+    # Distinct contents, each with its paths in path order
+    by_digest = {}
+    for i, digest in enumerate(digests):
+        by_digest.setdefault(digest, []).append(i)
+    contents = list(by_digest.values())
+
+    exact_groups = []
+    for members in contents:
+        if len(members) > 1:
+            keep, size = images[members[0]]
+            copies = [images[i][0] for i in members[1:]]
+            for path in copies:
+                room = rooms[room_of(path)]
+                room['exact_copies'] += 1
+                room['exact_bytes'] += size
+            exact_groups.append({'keep': keep, 'bytes': size, 'copies': copies})
+    exact_groups.sort(key=lambda g: -g['bytes'] * len(g['copies']))
+
+    content_hashes = hashes[[members[0] for members in contents]]
+    order = sorted(range(len(contents)), key=lambda c: (-images[contents[c][0]][1], images[contents[c][0]][0]))
+    groups = []
+    for keeper, members in near_groups(content_hashes, order, threshold):
+        copies = []
+        for c, distance in members:
+            paths = [images[i][0] for i in contents[c]]
+            size = images[contents[c][0]][1]
+            for path in paths:
+                rooms[room_of(path)]['near_duplicates'] += 1
+            rooms[room_of(paths[0])]['reclaimable_bytes'] += size
+            copies.append({'paths': paths, 'bytes': size, 'distance': distance})
+        groups.append({'keep': images[contents[keeper][0]][0], 'copies': copies})
+    groups.sort(key=lambda g: -sum(c['bytes'] for c in g['copies']))
+    return {
+        'images': len(images),
+        'distinct': len(contents),
+        'hashed': hashed,
+        'threshold': threshold,
+        'exact_copies': sum(r['exact_copies'] for r in rooms.values()),
+        'exact_bytes': sum(r['exact_bytes'] for r in rooms.values()),
+        'reclaimable_bytes': sum(r['reclaimable_bytes'] for r in rooms.values()),
+        'rooms': rooms,
+        'exact_groups': exact_groups,
+        'groups': groups,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find exact and near-duplicate photos under Rooms/")
+    parser.add_argument("--root", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="repository checkout containing Rooms/")
+    parser.add_argument("--index", help=f"hash index file (default: <root>/{INDEX_FILE})")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD,
+                        help="maximum differing hash bits, out of 64")
+    parser.add_argument("--workers", type=int, help="hashing processes (default: one per CPU)")
+    parser.add_argument("--groups", action="store_true", help="also list every copy and duplicate group")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = scan(args.root, args.index, args.threshold, args.workers)
+    print(f"{report['images']} images ({report['distinct']} distinct), {report['hashed']} read this run")
+    print(f"{report['exact_copies']} exact copies: {report['exact_bytes'] / 2**20:.1f} MB downloaded again, "
+          f"stored once")
+    print(f"{report['reclaimable_bytes'] / 2**20:.1f} MB reclaimable from near-duplicates "
+          f"at threshold {args.threshold}")
+    rooms = sorted(report['rooms'].items(), key=lambda r: (-r[1]['reclaimable_bytes'], -r[1]['exact_bytes']))
+    print(f"{'room':<24}{'images':>8}{'MB':>9}{'exact':>7}{'MB exact':>10}{'near':>6}{'MB reclaimable':>16}")
+    for room, stats in rooms:
+        if stats['exact_copies'] or stats['near_duplicates']:
+            print(f"{room:<24}{stats['images']:>8}{stats['bytes'] / 2**20:>9.1f}{stats['exact_copies']:>7}"
+                  f"{stats['exact_bytes'] / 2**20:>10.2f}{stats['near_duplicates']:>6}"
+                  f"{stats['reclaimable_bytes'] / 2**20:>16.2f}")
+    if args.groups:
+        for group in report['exact_groups']:
+            print(f"\nidentical to {group['keep']} ({group['bytes'] / 1024:.0f} KB)")
+            for path in group['copies']:
+                print(f"  {path}")
+        for group in report['groups']:
+            print(f"\nkeep {group['keep']}")
+            for copy in group['copies']:
+                print(f"  {', '.join(copy['paths'])}  ({copy['bytes'] / 1024:.0f} KB, {copy['distance']} bits)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import re
+import bisect
+from functools import lru_cache
+
+# Search index over room folder names.
+#
+# Folder names hold several rooms ("422,423,424,425,426,427") or a number
+# plus lab titles ("123 (Design Laboratory, Heat and Mass Transfer
+# Laboratory)"), so names are split into tokens and every query token must
+# match some token of the name, exactly, as a prefix ("lab" ->
+# "laboratory") or within one typo. Only words of four or more letters
+# are matched with a typo: in a room number or a short token a "typo"
+# usually names a different room ("m003" is not "m005"). Those fall back
+# to the substring match the viewer always had instead ("15b" ->
+# "415b"). Typo candidates come from a precomputed single-deletion table,
+# so lookups stay well under a millisecond.
+
+EXACT_SCORE = 3
+PREFIX_SCORE = 2
+FUZZY_SCORE = 1
+SUBSTRING_SCORE = 1
+MIN_FUZZY_LENGTH = 4
+
+
+def _fuzzy(token):
+    """True if a token is a word that may be matched within one typo"""
+    return len(token) >= MIN_FUZZY_LENGTH and token.isalpha()
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens"""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _name_tokens(name):
+    tokens = set(tokenize(name))
+    # Also index the name with separators removed ("M-003" -> "m003") and
+    # number/letter runs split ("416a" -> "416", "a")
+    tokens.add("".join(tokenize(name)))
+    for token in list(tokens):
+        tokens.update(re.findall(r"[a-z]+|[0-9]+", token))
+    tokens.discard("")
+    return tokens
+
+
+def _deletes(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _within_one_edit(a, b):
+    """True if a and b differ by at most one insert, delete, substitute or swap"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 1 or (
+            len(diff) == 2 and diff[1] == diff[0] + 1
+            and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+        )
+    short, long_ = (a, b) if len(a) < len(b) else (b, a)
+    return any(long_[:i] + long_[i + 1:] == short for i in range(len(long_)))
+
+
+class RoomSearchIndex:
+    def __init__(self, rooms):
+        self.rooms = list(rooms)
+        self.postings = {}
+        for position, room in enumerate(self.rooms):
+            for token in _name_tokens(room):
+                self.postings.setdefault(token, set()).add(position)
+        self.vocabulary = sorted(self.postings)
+        self.deletions = {}
+        for token in self.vocabulary:
+            if _fuzzy(token):
+                for variant in _deletes(token) | {token}:
+                    self.deletions.setdefault(variant, set()).add(token)
+
+    def _matches(self, query_token):
+        """Return {room position: best score} for one query token"""
+        scores = {}
+
+        def add(tokens, score):
+            for token in tokens:
+                for position in self.postings[token]:
+                    if scores.get(position, 0) < score:
+                        scores[position] = score
+
+        start = bisect.bisect_left(self.vocabulary, query_token)
+        prefixed = []
+        for token in self.vocabulary[start:]:
+            if not token.startswith(query_token):
+                break
+            prefixed.append(token)
+        add([t for t in prefixed if t != query_token], PREFIX_SCORE)
+        if query_token in self.postings:
+            add([query_token], EXACT_SCORE)
+        if _fuzzy(query_token):
+            candidates = set()
+            for variant in _deletes(query_token) | {query_token}:
+                candidates |= self.deletions.get(variant, set())
+            add([t for t in candidates if t != query_token and _within_one_edit(t, query_token)], FUZZY_SCORE)
+        else:
+            add([t for t in self.vocabulary if query_token in t[1:]], SUBSTRING_SCORE)
+        return scores
+
+    def search(self, query):
+        """Return room names matching every query token, best first
+
+        A blank query lists every room; one with no searchable characters
+        ("??") matches none.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return [] if query.strip() else list(self.rooms)
+        totals = None
+        for query_token in query_tokens:
+            scores = self._matches(query_token)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {p: totals[p] + s for p, s in scores.items() if p in totals}
+            if not totals:
+                return []
+        normalized = "".join(query_tokens)
+        ranked = sorted(
+            totals,
+            key=lambda p: (
+                -totals[p],
+                "".join(tokenize(self.rooms[p])) != normalized,  # exact name first
+                len(self.rooms[p]),
+                self.rooms[p],
+            ),
+        )
+        return [self.rooms[p] for p in ranked]
+
+
+@lru_cache(maxsize=4)
+def _index_for(rooms):
+    return RoomSearchIndex(rooms)
+
+
+def search_rooms(rooms, query):
+    """Search rooms, reusing the index until the set of rooms changes"""
+    return _index_for(tuple(rooms)).search(query)
@@ -0,0 +1,181 @@
+import time
+import threading
+import requests
+from http_cache import cached_get
+from http_metrics import default_session
+from derivatives import parse_derivative
+from room_store import RoomStore, GITHUB_REPO, BASE_PATH, BRANCH, API_URL, get_raw_url
+
+# One-shot snapshot of the Rooms/ tree built from the Git Trees API.
+#
+# A single `recursive=1` tree request replaces the per-room and per-point
+# Contents API listings. The snapshot is keyed by the branch head SHA and is
+# only rebuilt when the branch moves. Media URLs point at the branch and
+# carry the file's blob SHA, so they stay the same across commits that do
+# not change that file.
+
+HEAD_CHECK_INTERVAL = 30  # seconds between branch head checks
+
+_lock = threading.Lock()
+_snapshot = None
+_last_head_check = 0.0
+# info.txt bodies keyed by blob SHA, shared across snapshots so unchanged
+# files are never fetched twice
+_text_cache = {}
+
+
+class SnapshotRoomStore(RoomStore):
+    """In-memory room -> points -> media index built from one tree listing"""
+
+    def __init__(self, commit_sha, tree_entries, repo=GITHUB_REPO, fetch=None, tree_sha=None, read_blob=None):
+        self.commit_sha = commit_sha
+        # Root tree of the commit; lets writes based on it skip listing it again
+        self.tree_sha = tree_sha
+        self.repo = repo
+        self._fetch = fetch or default_session.get
+        # read_blob(sha) -> text, for trees not yet committed (no raw URLs)
+        self._read_blob = read_blob
+        self.dirs = {BASE_PATH: []}
+        # path -> blob SHA for every file in the tree
+        self.blobs = {}
+        # source path -> [(width, fmt, url)]
+        self.derivatives = {}
+        self._paths_by_blob = None
+        prefix = BASE_PATH + "/"
+        for item in tree_entries:
+            path = item['path']
+            if item['type'] == 'blob':
+                self.blobs[path] = item['sha']
+            derived = parse_derivative(path) if item['type'] == 'blob' else None
+            if derived is not None:
+                source, width, fmt = derived
+                self.derivatives.setdefault(source, []).append((width, fmt, media_url(path, item['sha'], repo)))
+                continue
+            if not path.startswith(prefix):
+                continue
+            parent, _, name = path.rpartition("/")
+            is_dir = item['type'] == 'tree'
+            entry = {
+                'name': name,
+                'path': path,
+                'type': 'dir' if is_dir else 'file',
+                'sha': item['sha'],
+                'download_url': None if is_dir else media_url(path, item['sha'], repo),
+            }
+            self.dirs.setdefault(parent, []).append(entry)
+            if is_dir:
+                self.dirs.setdefault(path, [])
+        for entries in self.dirs.values():
+            entries.sort(key=lambda e: e['name'])
+
+    def list_dir(self, path):
+        return self.dirs.get(path, [])
+
+    def derivatives_for(self, path):
+        return self.derivatives.get(path, [])
+
+    def paths_for_blob(self, sha):
+        """Return the Rooms/ files whose content has this blob SHA"""
+        if self._paths_by_blob is None:
+            index = {}
+            for path, blob_sha in self.blobs.items():
+                if path.startswith(BASE_PATH + "/"):
+                    index.setdefault(blob_sha, []).append(path)
+            self._paths_by_blob = index
+        return self._paths_by_blob.get(sha, [])
+
+    def read_text(self, path):
+        sha = self.blobs.get(path)
+        if sha is None:
+            return None
+        if self._read_blob is not None:
+            return cached_text(sha, lambda: self._read_blob(sha))
+
+        def fetch():
+            # Read at the commit, so the text is the content of this blob SHA
+            response = self._fetch(get_raw_url(path, self.repo, self.commit_sha))
+            return response.text if response.status_code == 200 else None
+
+        return cached_text(sha, fetch)
+
+
+def media_url(path, sha, repo=GITHUB_REPO):
+    """Branch raw URL of a file, versioned by its blob SHA
+
+    The URL only changes when the file does, so a commit that touches other
+    files does not make every client download all media again. The query is
+    ignored by raw.githubusercontent.com and only keys the caches.
+    """
+    return f"{get_raw_url(path, repo)}?{sha[:12]}"
+
+
+def cached_text(sha, read):
+    """Return the text of blob sha, calling read() only if it is not cached yet
+
+    read() may return None (not found), which is not cached.
+    """
+    if sha not in _text_cache:
+        text = read()
+        if text is None:
+            return None
+        _text_cache[sha] = text
+    return _text_cache[sha]
+
+
+def tree_listing(blobs):
+    """Return a recursive tree listing, directories included, for {path: blob SHA}"""
+    dirs = {path.rsplit("/", i)[0] for path in blobs for i in range(1, path.count("/") + 1)}
+    return ([{'path': d, 'type': 'tree', 'sha': None} for d in sorted(dirs)]
+            + [{'path': p, 'type': 'blob', 'sha': s} for p, s in blobs.items()])
+
+
+def fetch_head_sha(repo=GITHUB_REPO, branch=BRANCH, session=None):
+    """Return the commit SHA the branch currently points at, or None"""
+    # The interval in load_snapshot throttles these; revalidate every time
+    response = cached_get(f"{API_URL}/repos/{repo}/git/ref/heads/{branch}", ttl=0, session=session)
+    if response.status_code != 200:
+        return None
+    return response.json()['object']['sha']
+
+
+def fetch_snapshot(commit_sha, repo=GITHUB_REPO, session=None):
+    """Build a SnapshotRoomStore from one recursive tree request"""
+    response = cached_get(f"{API_URL}/repos/{repo}/git/trees/{commit_sha}?recursive=1", session=session)
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    if data.get('truncated'):
+        # Tree too large for one response; callers fall back to per-path reads
+        return None
+    return SnapshotRoomStore(commit_sha, data['tree'], repo, tree_sha=data.get('sha'))
+
+
+def load_snapshot(max_age=HEAD_CHECK_INTERVAL, session=None):
+    """Return the current snapshot, rebuilding it only when the head moves"""
+    global _snapshot, _last_head_check
+    with _lock:
+        now = time.monotonic()
+        if _snapshot is not None and now - _last_head_check < max_age:
+            return _snapshot
+        try:
+            head = fetch_head_sha(session=session)
+        except requests.RequestException:
+            head = None
+        _last_head_check = now
+        if head is None:
+            return _snapshot
+        if _snapshot is None or _snapshot.commit_sha != head:
+            try:
+                _snapshot = fetch_snapshot(head, session=session) or _snapshot
+            except requests.RequestException:
+                pass
+        return _snapshot
+
+
+def reset_snapshot():
+    """Forget the current snapshot and cached info texts (for tests and benchmarks)"""
+    global _snapshot, _last_head_check
+    with _lock:
+        _snapshot = None
+        _last_head_check = 0.0
+        _text_cache.clear()
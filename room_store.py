@@ -0,0 +1,133 @@
+import os
+import base64
+from http_cache import cached_get
+from derivatives import DERIVATIVE_WIDTHS, MIME_TYPES, derivative_path
+
+# Storage backends for the Rooms/ tree.
+#
+# Every backend returns directory listings shaped like GitHub Contents API
+# entries ({'name', 'path', 'type', 'sha', 'download_url'}) so the viewer code
+# in check.py can switch between them without changes.
+
+GITHUB_REPO = "2005lakshmi/locorom"
+BASE_PATH = "Rooms"
+BRANCH = "main"
+MEDIA_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'mp4']
+# Overridable so the apps can run against a local stand-in (see fake_github.py)
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+RAW_URL = os.environ.get("GITHUB_RAW_URL", "https://raw.githubusercontent.com")
+
+
+def media_sort_key(name):
+    """Order media names as a, b, ..., z, aa, ab (and 1, 2, ..., 9, 90)"""
+    stem = name.rsplit('.', 1)[0]
+    return (len(stem), stem)
+
+
+def get_raw_url(path, repo=GITHUB_REPO, branch=BRANCH):
+    """Construct raw GitHub URL for a repository path"""
+    return f"{RAW_URL}/{repo}/{branch}/{path}"
+
+
+class RoomStore:
+    """Read-only access to the Rooms/ tree"""
+
+    def list_dir(self, path):
+        """Return Contents-API-style entries for path, or [] if missing"""
+        raise NotImplementedError
+
+    def read_text(self, path):
+        """Return the text of a file, or None if it does not exist"""
+        raise NotImplementedError
+
+    def derivatives_for(self, path):
+        """Return (width, fmt, url) for each stored derivative of a media file"""
+        return []
+
+    def list_rooms(self):
+        return [item['name'] for item in self.list_dir(BASE_PATH) if item['type'] == 'dir']
+
+    def list_points(self, room_name):
+        return [item['name'] for item in self.list_dir(f"{BASE_PATH}/{room_name}") if item['type'] == 'dir']
+
+
+class GitHubRoomStore(RoomStore):
+    """Backend that reads through the GitHub Contents API"""
+
+    def __init__(self, repo=GITHUB_REPO, session=None):
+        self.repo = repo
+        self.session = session
+
+    def _get(self, path):
+        url = f"{API_URL}/repos/{self.repo}/contents/{path}"
+        return cached_get(url, session=self.session)
+
+    def list_dir(self, path):
+        response = self._get(path)
+        if response.status_code != 200:
+            return []
+        data = response.json()
+        return data if isinstance(data, list) else []
+
+    def read_text(self, path):
+        response = self._get(path)
+        if response.status_code != 200:
+            return None
+        return base64.b64decode(response.json()['content']).decode()
+
+
+class LocalRoomStore(RoomStore):
+    """Backend that reads a local checkout of the repository with os.scandir
+
+    Media entries still point at raw.githubusercontent.com so the browser can
+    fetch them; only listings and info.txt reads stay on disk.
+    """
+
+    def __init__(self, root=".", repo=GITHUB_REPO, branch=BRANCH):
+        self.root = root
+        self.repo = repo
+        self.branch = branch
+
+    def _entry(self, path, dir_entry):
+        entry_path = f"{path}/{dir_entry.name}"
+        is_dir = dir_entry.is_dir()
+        return {
+            'name': dir_entry.name,
+            'path': entry_path,
+            'type': 'dir' if is_dir else 'file',
+            'sha': None,
+            'download_url': None if is_dir else get_raw_url(entry_path, self.repo, self.branch),
+        }
+
+    def list_dir(self, path):
+        try:
+            with os.scandir(os.path.join(self.root, path)) as it:
+                entries = [self._entry(path, e) for e in it if not e.name.startswith('.')]
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        # GitHub returns listings sorted by name; keep the same order
+        return sorted(entries, key=lambda e: e['name'])
+
+    def derivatives_for(self, path):
+        variants = []
+        for width in DERIVATIVE_WIDTHS:
+            for fmt in MIME_TYPES:
+                derived = derivative_path(path, width, fmt)
+                if os.path.exists(os.path.join(self.root, derived)):
+                    variants.append((width, fmt, get_raw_url(derived, self.repo, self.branch)))
+        return variants
+
+    def read_text(self, path):
+        try:
+            with open(os.path.join(self.root, path), "r", encoding="utf-8") as f:
+                return f.read()
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+
+
+def default_room_store(root=None, session=None):
+    """Use the local checkout when Rooms/ is present, else the GitHub API"""
+    root = root or os.path.dirname(os.path.abspath(__file__))
+    if os.path.isdir(os.path.join(root, BASE_PATH)):
+        return LocalRoomStore(root)
+    return GitHubRoomStore(session=session)
@@ -0,0 +1,68 @@
+import os
+import json
+from functools import lru_cache
+
+# URLs of the front-end assets vendored by vendor_assets.py.
+#
+# Vendored files are served by Streamlit at /app/static/ under
+# content-hashed names. Until they have been generated, the pinned CDN
+# (or raw GitHub) URL is used instead.
+#
+# Streamlit sends those files without Cache-Control, so browsers revalidate
+# them on every page load. ImmutableAssetsMiddleware marks the hashed files
+# cacheable for a year when the app is served through asgi.py.
+
+STATIC_ROUTE = "/app/static"
+VENDOR_DIR = "vendor"
+# A vendored file's name changes with its content
+IMMUTABLE = b"public, max-age=31536000, immutable"
+ASSET_MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "assets.json")
+SWIPER_VERSION = "8.4.7"
+
+FALLBACK_URLS = {
+    "swiper/swiper-bundle.min.js": f"https://unpkg.com/swiper@{SWIPER_VERSION}/swiper-bundle.min.js",
+    "swiper/swiper-bundle.min.css": f"https://unpkg.com/swiper@{SWIPER_VERSION}/swiper-bundle.min.css",
+    "logo_locorom.png": "https://raw.githubusercontent.com/2005lakshmi/locorom/main/logo_locorom.png",
+}
+
+
+@lru_cache(maxsize=1)
+def _asset_map():
+    try:
+        with open(ASSET_MAP, encoding="utf-8") as f:
+            return json.load(f)['assets']
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}
+
+
+def asset_file(name):
+    """Return the path of a vendored asset relative to static/, or None"""
+    return _asset_map().get(name)
+
+
+def asset_url(name):
+    """Return the local URL of a vendored asset, or its pinned remote URL"""
+    path = _asset_map().get(name)
+    if path is not None:
+        return f"{STATIC_ROUTE}/{path}"
+    return FALLBACK_URLS[name]
+
+
+class ImmutableAssetsMiddleware:
+    """ASGI middleware adding a long-lived Cache-Control to vendored files"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or f"{STATIC_ROUTE}/{VENDOR_DIR}/" not in scope['path']:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_cacheable(message):
+            if message['type'] == 'http.response.start' and message['status'] == 200:
+                headers = [(k, v) for k, v in message.get('headers', []) if k.lower() != b'cache-control']
+                message = dict(message, headers=headers + [(b'cache-control', IMMUTABLE)])
+            await send(message)
+
+        await self.app(scope, receive, send_cacheable)
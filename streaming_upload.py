@@ -0,0 +1,101 @@
+import io
+import os
+import json
+import base64
+
+# Low-memory request bodies for GitHub uploads.
+#
+# The Contents and Git Data APIs want file bytes base64-encoded inside a JSON
+# document. Building that body as read() -> b64encode -> str -> json.dumps
+# keeps about four copies of the file alive at once. Base64JsonBody instead
+# encodes the source a chunk at a time as requests sends it. It knows its
+# exact length up front, so the upload still goes out with a Content-Length
+# rather than chunked transfer encoding.
+
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024  # GitHub rejects larger files
+CHUNK_SIZE = 3 * 64 * 1024  # a multiple of 3, so chunks encode independently
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def upload_size(fileobj):
+    """Return the size of a file object without reading it"""
+    size = getattr(fileobj, 'size', None)
+    if size is not None:
+        return size
+    position = fileobj.tell()
+    size = fileobj.seek(0, os.SEEK_END) - position
+    fileobj.seek(position)
+    return size
+
+
+def check_upload_size(fileobj, limit=MAX_UPLOAD_BYTES):
+    size = upload_size(fileobj)
+    if size > limit:
+        raise UploadTooLarge(f"{getattr(fileobj, 'name', 'File')} is {size / 2**20:.1f} MB; "
+                             f"the limit is {limit / 2**20:.0f} MB")
+    return size
+
+
+class Base64JsonBody:
+    """File-like JSON body {**fields, key: base64(source)} encoded on the fly
+
+    Pass it as data= to requests. seek(0) rewinds the source so the same body
+    can be sent again when a request is retried.
+    """
+
+    def __init__(self, source, fields=None, key="content", limit=MAX_UPLOAD_BYTES):
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        self.source = source
+        self.start = source.tell()
+        size = check_upload_size(source, limit)
+        # With key last, the document ends in '"<base64>"}'
+        document = json.dumps({**(fields or {}), key: ""})
+        self.head = document[:-2].encode()
+        self.tail = b'"}'
+        self.length = len(self.head) + 4 * ((size + 2) // 3) + len(self.tail)
+        self.seek(0)
+
+    def __len__(self):
+        return self.length
+
+    def _pieces(self):
+        yield self.head
+        while True:
+            chunk = self.source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield base64.b64encode(chunk)
+        yield self.tail
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            piece = next(self._pieces_iter, None)
+            if piece is None:
+                break
+            self._buffer += piece
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]  # bytearray drops a prefix without copying the rest
+        self._position += len(data)
+        return data
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if offset != 0 or whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("Base64JsonBody can only be rewound to the start")
+        self.source.seek(self.start)
+        self._pieces_iter = self._pieces()
+        self._buffer = bytearray()
+        self._position = 0
+        return 0
+
+
+def json_headers(headers=None):
+    return {**(headers or {}), 'Content-Type': 'application/json'}
@@ -0,0 +1,54 @@
+import threading
+import pytest
+import requests
+from api_server import RoomApi, serve
+
+# The JSON API served from a small manifest on a free local port.
+
+MANIFEST = {'version': 2, 'rooms': {
+    "205": {'info': "Ground floor, next to the library staircase", 'media': ["a.jpg", "b.jpg"], 'points': {
+        "Point A": {'info': "Side door by the staircase", 'thumbnail': True, 'media': ["a.jpg"]}}},
+    "211 PE lab": {'info': "", 'media': [], 'points': {}},
+}}
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = serve(RoomApi(MANIFEST), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_rooms_lists_every_room(base_url):
+    rooms = requests.get(f"{base_url}/rooms").json()
+    assert [(r['id'], r['points'], r['url']) for r in rooms] == [("205", 1, "/rooms/205"),
+                                                                 ("211 PE lab", 0, "/rooms/211%20PE%20lab")]
+
+
+def test_room_detail_and_missing_room(base_url):
+    room = requests.get(f"{base_url}/rooms/205").json()
+    assert [m['name'] for m in room['media']] == ["a.jpg", "b.jpg"]
+    assert room['points'][0]['name'] == "Point A"
+    assert room['points'][0]['thumbnail'].endswith("/Rooms/205/Point A/thumbnail.jpg")
+    assert requests.get(f"{base_url}/rooms/211%20PE%20lab").json()['name'] == "211 PE lab"
+    assert requests.get(f"{base_url}/rooms/999").status_code == 404
+
+
+def test_matching_etag_gets_304(base_url):
+    first = requests.get(f"{base_url}/rooms/205")
+    again = requests.get(f"{base_url}/rooms/205", headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers['ETag'] == first.headers['ETag']
+
+
+def test_search_returns_plain_landmark_text_with_offsets(base_url):
+    result = requests.get(f"{base_url}/search", params={'q': "stair"}).json()
+    assert result['rooms'] == []
+    hit = result['landmarks'][0]
+    assert "**" not in hit['text']
+    assert [hit['text'][a:b] for a, b in hit['matches']] == ["staircase"]
+    assert requests.get(f"{base_url}/search", params={'q': "pe"}).json()['rooms'] == ["211 PE lab"]
+    assert requests.get(f"{base_url}/search", params={'q': "??"}).json() == {'query': "??", 'rooms': [],
+                                                                            'landmarks': []}
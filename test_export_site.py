@@ -0,0 +1,29 @@
+import os
+import export_site
+from export_site import export
+
+# Incremental static export of a small checkout written to tmp_path.
+
+
+def write(root, path, content):
+    os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+    with open(os.path.join(root, path), "wb") as f:
+        f.write(content)
+
+
+def test_export_rebuilds_on_asset_changes_and_prunes_dropped_media(tmp_path, monkeypatch):
+    root, out = str(tmp_path / "repo"), str(tmp_path / "site")
+    for name in ("a.jpg", "b.jpg"):
+        write(root, f"Rooms/205/{name}", name.encode())
+    write(root, "Rooms/205/info.txt", b"Corridor")
+    monkeypatch.setattr(export_site, "_asset", lambda root, out, name: export_site.FALLBACK_URLS[name])
+    assert export(root, out)[:2] == (1, 1)
+    assert export(root, out)[:2] == (0, 1)
+
+    # Vendoring the assets changes every page's links
+    monkeypatch.setattr(export_site, "_asset", lambda root, out, name: f"assets/{name}")
+    assert export(root, out)[:2] == (1, 1)
+
+    os.remove(os.path.join(root, "Rooms/205/b.jpg"))
+    assert export(root, out)[:2] == (1, 1)
+    assert sorted(os.listdir(os.path.join(out, "media/Rooms/205"))) == ["a.jpg"]
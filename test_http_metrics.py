@@ -0,0 +1,42 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http_metrics import HttpMetrics, with_current_run
+
+# Per-rerun call counts, which must not mix between concurrent sessions.
+
+
+def record(metrics, n):
+    for _ in range(n):
+        metrics.record("GET", "https://api.github.com/repos/o/r/contents/x", 200, 0.01, 0, 10)
+
+
+def test_concurrent_reruns_count_only_their_own_calls():
+    metrics = HttpMetrics()
+    both_started = threading.Barrier(2)
+
+    def session(page, n):
+        with metrics.rerun(page):
+            both_started.wait()
+            record(metrics, n)
+            # Keep both runs open while the other records
+            both_started.wait()
+
+    threads = [threading.Thread(target=session, args=(page, n)) for page, n in (("a", 3), ("b", 5))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted((run['page'], run['calls']) for run in metrics.reruns) == [("a", 3), ("b", 5)]
+    # Calls outside any rerun are not attributed to one
+    record(metrics, 2)
+    assert metrics.rerun_calls == 8
+
+
+def test_pool_work_counts_toward_the_calling_rerun():
+    metrics = HttpMetrics()
+    with metrics.rerun("upload"):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(with_current_run(lambda n: record(metrics, n)), [1, 2, 3, 4]))
+            # Unwrapped jobs run outside the rerun
+            pool.submit(record, metrics, 1).result()
+    assert metrics.reruns[-1]['calls'] == 10
@@ -0,0 +1,32 @@
+import string
+from media_sequence import first_free_range, next_index, sequence_name
+from room_store import media_sort_key
+
+# Listing of Rooms/321/Point B: "ca" and "ga" were inserted by hand after
+# "c" and "g", and are not the end of the sequence.
+POINT_321_B = ["a.jpg", "b.jpg", "c.jpg", "ca.jpg", "d.jpg", "e.jpg", "f.jpg", "g.jpg", "ga.jpg", "h.jpg",
+               "i.jpg", "info.txt", "thumbnail.jpg"]
+
+
+def test_next_index_continues_after_inserted_names():
+    assert sequence_name(next_index(POINT_321_B)) == "j"
+    # Rooms/219/Point C: a gap at "f" and "ea" inserted
+    assert sequence_name(next_index(["a.jpg", "b.jpg", "c.jpg", "d.jpg", "e.jpg", "ea.jpg", "g.jpg", "h.jpg"])) == "i"
+    assert sequence_name(next_index([])) == "a"
+
+
+def test_next_index_continues_past_z():
+    letters = [f"{c}.jpg" for c in string.ascii_lowercase]
+    assert sequence_name(next_index(letters)) == "aa"
+    assert sequence_name(next_index(letters + ["aa.mp4", "ab.jpg", "ca.jpg"])) == "ac"
+
+
+def test_first_free_range_steps_over_taken_names():
+    letters = [f"{c}.jpg" for c in string.ascii_lowercase] + ["ab.jpg"]
+    assert first_free_range(letters, 26, 1) == 26
+    assert sequence_name(first_free_range(letters, 26, 2)) == "ac"
+
+
+def test_new_names_sort_after_the_single_letters():
+    names = sorted(POINT_321_B[:11] + ["j.jpg"], key=media_sort_key)
+    assert names[9:] == ["j.jpg", "ca.jpg", "ga.jpg"]
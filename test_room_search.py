@@ -0,0 +1,23 @@
+from room_search import search_rooms
+
+# Room name search over a sample of the real folder names.
+
+ROOMS = ["321", "321B", "415", "415B", "416a", "M-003", "M-005", "B-003", "211 PE lab",
+         "Fluid Mechanics and Machines Laboratory", "Machine Shop"]
+
+
+def test_short_and_numeric_tokens_match_as_substrings():
+    assert search_rooms(ROOMS, "15b") == ["415B"]
+    assert search_rooms(ROOMS, "415") == ["415", "415B"]
+    assert search_rooms(ROOMS, "m003") == ["M-003"]
+
+
+def test_only_long_words_match_with_a_typo():
+    assert search_rooms(ROOMS, "laboratroy") == ["Fluid Mechanics and Machines Laboratory"]
+    assert search_rooms(ROOMS, "machne") == ["Machine Shop"]
+    assert search_rooms(ROOMS, "lbb") == []
+
+
+def test_queries_without_tokens():
+    assert search_rooms(ROOMS, "??") == []
+    assert search_rooms(ROOMS, "") == ROOMS
@@ -0,0 +1,29 @@
+from room_snapshot import SnapshotRoomStore, tree_listing
+
+# Snapshot indexes built from flat {path: blob SHA} listings.
+
+
+def snapshot(commit_sha, blobs):
+    return SnapshotRoomStore(commit_sha, tree_listing(blobs))
+
+
+def test_media_urls_only_change_with_the_file():
+    blobs = {"Rooms/205/a.jpg": "a" * 40, "Derivatives/Rooms/205/a.jpg.320.webp": "d" * 40,
+             "Rooms/205/info.txt": "1" * 40}
+    before = snapshot("c" * 40, blobs)
+    after = snapshot("e" * 40, dict(blobs, **{"Rooms/205/info.txt": "2" * 40}))
+    url = before.list_dir("Rooms/205")[0]['download_url']
+    assert url == after.list_dir("Rooms/205")[0]['download_url']
+    assert "c" * 40 not in url and url.endswith("?" + "a" * 12)
+    assert before.derivatives_for("Rooms/205/a.jpg") == after.derivatives_for("Rooms/205/a.jpg")
+
+    changed = snapshot("f" * 40, dict(blobs, **{"Rooms/205/a.jpg": "b" * 40}))
+    assert changed.list_dir("Rooms/205")[0]['download_url'] != url
+
+
+def test_derivatives_are_keyed_by_the_full_file_name():
+    store = snapshot("c" * 40, {"Rooms/205/a.jpg": "a" * 40, "Rooms/205/a.png": "b" * 40,
+                                "Derivatives/Rooms/205/a.jpg.320.webp": "d" * 40,
+                                "Derivatives/Rooms/205/a.png.640.webp": "e" * 40})
+    assert [(w, fmt) for w, fmt, _ in store.derivatives_for("Rooms/205/a.jpg")] == [(320, "webp")]
+    assert [(w, fmt) for w, fmt, _ in store.derivatives_for("Rooms/205/a.png")] == [(640, "webp")]
@@ -0,0 +1,311 @@
+import io
+import json
+import base64
+import string
+import pytest
+import requests
+from PIL import Image
+from fake_github import blob_sha
+from benchmark import SECRETS, reset_caches
+import git_data
+from git_data import GitDataClient, GitDataError, is_transient
+from streaming_upload import Base64JsonBody, UploadTooLarge
+
+# Upload and tree-write paths exercised against fake_github.py (started in
+# conftest.py).
+
+
+def jpeg(shade, size=(400, 300)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (shade, 255 - shade, 90)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def upload(data, name):
+    file = io.BytesIO(data)
+    file.name = name
+    file.type = "image/jpeg"
+    file.size = len(data)
+    return file
+
+
+def head_files(repo):
+    return {path: repo.blobs[sha] for path, sha in repo.files_at(repo.branch).items()}
+
+
+def test_base64_json_body_streams_the_exact_document():
+    content = bytes(range(256)) * 1000
+    body = Base64JsonBody(io.BytesIO(content), {"message": "add"})
+    expected = json.dumps({"message": "add", "content": base64.b64encode(content).decode()}).encode()
+    chunks = []
+    while True:
+        chunk = body.read(1000)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    assert b"".join(chunks) == expected
+    assert len(body) == len(expected)
+    # Retries rewind and send the same bytes again
+    body.seek(0)
+    assert body.read() == expected
+
+
+def test_base64_json_body_refuses_oversized_files():
+    with pytest.raises(UploadTooLarge):
+        Base64JsonBody(io.BytesIO(b"x" * 11), limit=10)
+
+
+def test_create_blob_streams_file_objects(repo):
+    fake = repo({})
+    content = jpeg(10)
+    file = io.BytesIO(content)
+    file.read()
+    assert GitDataClient().create_blob(file) == blob_sha(content)
+    assert fake.blobs[blob_sha(content)] == content
+
+
+class FlakySession(requests.Session):
+    """Answers the first call to each of `failing` with a bare status"""
+
+    def __init__(self, failing, status=502, headers=None):
+        super().__init__()
+        self.failing = set(failing)
+        self.status = status
+        self.headers_sent = headers or {}
+
+    def request(self, method, url, **kwargs):
+        key = (method, url.rsplit("/git/", 1)[1])
+        if key in self.failing:
+            self.failing.discard(key)
+            response = requests.Response()
+            response.status_code = self.status
+            response.headers.update(self.headers_sent)
+            return response
+        return super().request(method, url, **kwargs)
+
+
+def test_commit_retries_transient_failures_of_each_write(repo, monkeypatch):
+    monkeypatch.setattr(git_data, "BASE_DELAY", 0)
+    fake = repo({"Rooms/205/a.jpg": b"a"})
+    commits = len(fake.commits)
+    session = FlakySession({("POST", "trees"), ("POST", "commits"), ("PATCH", f"refs/heads/{fake.branch}")})
+    GitDataClient(session=session).move_paths({"Rooms/205/a.jpg": "Rooms/205/b.jpg"}, "Rename")
+    assert not session.failing
+    assert head_files(fake) == {"Rooms/205/b.jpg": b"a"}
+    assert len(fake.commits) == commits + 1
+
+
+def test_403_is_only_retried_when_rate_limited(repo, monkeypatch):
+    monkeypatch.setattr(git_data, "BASE_DELAY", 0)
+    assert not is_transient(GitDataError("forbidden", 403))
+    assert is_transient(GitDataError("slow down", 403, rate_limited=True))
+    fake = repo({"Rooms/205/a.jpg": b"a"})
+    with pytest.raises(GitDataError):
+        GitDataClient(session=FlakySession({("POST", "trees")}, 403)).delete_prefix("Rooms/205", "Delete")
+    limited = FlakySession({("POST", "trees")}, 403, {"X-RateLimit-Remaining": "0"})
+    GitDataClient(session=limited).delete_prefix("Rooms/205", "Delete")
+    assert head_files(fake) == {}
+
+
+def test_move_paths_swaps_in_one_commit(repo):
+    fake = repo({"Rooms/205/a.jpg": b"first", "Rooms/205/b.jpg": b"second"})
+    commits = len(fake.commits)
+    GitDataClient().move_paths({"Rooms/205/a.jpg": "Rooms/205/b.jpg", "Rooms/205/b.jpg": "Rooms/205/a.jpg"}, "Swap")
+    assert head_files(fake) == {"Rooms/205/a.jpg": b"second", "Rooms/205/b.jpg": b"first"}
+    assert len(fake.commits) == commits + 1
+
+
+def test_move_paths_refuses_missing_sources_and_existing_targets(repo):
+    fake = repo({"Rooms/205/a.jpg": b"first", "Rooms/205/b.jpg": b"second"})
+    client = GitDataClient()
+    with pytest.raises(GitDataError):
+        client.move_paths({"Rooms/205/c.jpg": "Rooms/205/d.jpg"}, "Rename")
+    with pytest.raises(GitDataError):
+        client.move_paths({"Rooms/205/a.jpg": "Rooms/205/b.jpg"}, "Rename")
+    assert head_files(fake) == {"Rooms/205/a.jpg": b"first", "Rooms/205/b.jpg": b"second"}
+
+
+def test_move_paths_carries_derivatives(repo):
+    fake = repo({"Rooms/205/a.jpg": b"new", "Derivatives/Rooms/205/a.jpg.320.webp": b"new small",
+                 "Rooms/205/b.jpg": b"old", "Derivatives/Rooms/205/b.jpg.320.webp": b"old small",
+                 "Derivatives/Rooms/205/c.jpg.640.webp": b"left over"})
+    GitDataClient().move_paths({"Rooms/205/a.jpg": "Rooms/205/c.jpg"}, "Rename")
+    assert head_files(fake) == {"Rooms/205/c.jpg": b"new", "Derivatives/Rooms/205/c.jpg.320.webp": b"new small",
+                                "Rooms/205/b.jpg": b"old", "Derivatives/Rooms/205/b.jpg.320.webp": b"old small"}
+
+
+def test_delete_paths_removes_derivatives_and_checks_the_sha(repo):
+    fake = repo({"Rooms/205/a.jpg": b"a", "Derivatives/Rooms/205/a.jpg.320.webp": b"small",
+                 "Derivatives/Rooms/205/ab.jpg.320.webp": b"other",
+                 "Rooms/205/a.png": b"png", "Derivatives/Rooms/205/a.png.320.webp": b"small png"})
+    client = GitDataClient()
+    with pytest.raises(GitDataError):
+        client.delete_paths({"Rooms/205/a.jpg": blob_sha(b"changed")}, "Delete")
+    client.delete_paths({"Rooms/205/a.jpg": blob_sha(b"a")}, "Delete")
+    assert head_files(fake) == {"Derivatives/Rooms/205/ab.jpg.320.webp": b"other",
+                                "Rooms/205/a.png": b"png", "Derivatives/Rooms/205/a.png.320.webp": b"small png"}
+
+
+def test_delete_prefix_removes_a_folder_in_one_commit(repo):
+    fake = repo({"Rooms/205/info.txt": b"", "Rooms/205/Point A/a.jpg": b"a", "Rooms/2050/info.txt": b"keep",
+                 "Derivatives/Rooms/205/Point A/a.jpg.320.webp": b"small"})
+    commits = len(fake.commits)
+    assert GitDataClient().delete_prefix("Rooms/205", "Delete room 205") is not None
+    assert head_files(fake) == {"Rooms/2050/info.txt": b"keep"}
+    assert len(fake.commits) == commits + 1
+    # Nothing left to delete: no commit
+    assert GitDataClient().delete_prefix("Rooms/205", "Delete room 205") is None
+
+
+def _check_script():
+    import streamlit as st
+    import check
+    st.session_state['result'] = getattr(check, st.session_state['function'])(*st.session_state['args'])
+
+
+def run_check(function, *args):
+    """Call a check.py function inside a Streamlit script run"""
+    from streamlit.testing.v1 import AppTest
+    reset_caches()
+    at = AppTest.from_function(_check_script, default_timeout=60)
+    for section, values in SECRETS.items():
+        at.secrets[section] = values
+    at.session_state['function'] = function
+    at.session_state['args'] = args
+    at.run()
+    assert not at.exception, at.exception
+    return at.session_state['result']
+
+
+def run_upload(files, room="205", subfolder=None):
+    return run_check("upload_room_files", room, files, subfolder)
+
+
+def test_upload_room_files_names_a_batch_in_one_commit(repo):
+    fake = repo({"Rooms/205/info.txt": b"", "Rooms/205/a.jpg": jpeg(0)})
+    commits = len(fake.commits)
+    results = run_upload([upload(jpeg(60), "x.jpg"), upload(jpeg(120), "y.jpg")])
+    assert [(name, error) for name, error, _ in results] == [("b.jpg", None), ("c.jpg", None)]
+    files = head_files(fake)
+    assert files["Rooms/205/b.jpg"] == jpeg(60)
+    assert files["Rooms/205/c.jpg"] == jpeg(120)
+    assert any(path.startswith("Derivatives/Rooms/205/b.jpg.320.") for path in files)
+    assert len(fake.commits) == commits + 1
+
+
+def test_upload_room_files_skips_copies_already_in_the_carousel(repo):
+    fake = repo({"Rooms/205/Point A/thumbnail.jpg": jpeg(30), "Rooms/205/Point A/a.jpg": jpeg(0)})
+    results = run_upload([upload(jpeg(0), "again.jpg"), upload(jpeg(30), "thumb.jpg"), upload(jpeg(90), "new.jpg"),
+                          upload(jpeg(90), "new-again.jpg")], subfolder="Point A")
+    assert results == [
+        ("a.jpg", None, "Rooms/205/Point A/a.jpg"),
+        # Same bytes as the thumbnail: referenced, but still added to the carousel
+        ("b.jpg", None, "Rooms/205/Point A/thumbnail.jpg"),
+        ("c.jpg", None, None),
+        ("c.jpg", None, "Rooms/205/Point A/c.jpg"),
+    ]
+    files = head_files(fake)
+    assert files["Rooms/205/Point A/b.jpg"] == jpeg(30)
+    assert "Rooms/205/Point A/d.jpg" not in files
+
+
+def test_upload_drops_derivatives_left_at_the_new_name(repo):
+    fake = repo({"Rooms/205/info.txt": b"", "Derivatives/Rooms/205/a.jpg.9999.webp": b"old picture"})
+    run_upload([upload(jpeg(60), "x.jpg")])
+    files = head_files(fake)
+    assert files["Rooms/205/a.jpg"] == jpeg(60)
+    assert "Derivatives/Rooms/205/a.jpg.9999.webp" not in files
+
+
+def test_thumbnails_get_derivatives_when_created_and_replaced(repo):
+    fake = repo({"Rooms/205/info.txt": b""})
+    assert run_check("create_subfolder", "205", "Point A", upload(jpeg(10, (800, 600)), "t.jpg"), "Door")
+    files = head_files(fake)
+    first = {path: data for path, data in files.items() if path.startswith("Derivatives/Rooms/205/Point A/thumbnail.")}
+    assert first and files["Rooms/205/Point A/info.txt"] == b"Door"
+
+    assert run_check("update_subfolder_thumbnail", "205", "Point A", upload(jpeg(200, (800, 600)), "u.jpg"))
+    files = head_files(fake)
+    assert files["Rooms/205/Point A/thumbnail.jpg"] == jpeg(200, (800, 600))
+    second = {path: data for path, data in files.items() if path.startswith("Derivatives/Rooms/205/Point A/thumbnail.")}
+    assert second.keys() == first.keys() and all(second[p] != first[p] for p in first)
+
+
+def _concurrent_writer_script():
+    import streamlit as st
+    import check
+    from git_data import GitDataClient, blob_entry
+    first = check.upload_room_files("205", [st.session_state['files'][0]])
+    # Another process adds b.jpg; this process's counter still says b is next
+    client = GitDataClient()
+    client.commit_tree_entries("Elsewhere", [blob_entry("Rooms/205/b.jpg", client.create_blob(b"someone else's"))])
+    st.session_state['result'] = first + check.upload_room_files("205", [st.session_state['files'][1]])
+
+
+def test_upload_names_skip_files_added_by_another_writer(repo):
+    from streamlit.testing.v1 import AppTest
+    fake = repo({"Rooms/205/info.txt": b""})
+    reset_caches()
+    at = AppTest.from_function(_concurrent_writer_script, default_timeout=60)
+    for section, values in SECRETS.items():
+        at.secrets[section] = values
+    at.session_state['files'] = [upload(jpeg(60), "x.jpg"), upload(jpeg(120), "y.jpg")]
+    at.run()
+    assert not at.exception, at.exception
+    assert [name for name, _, _ in at.session_state['result']] == ["a.jpg", "c.jpg"]
+    files = head_files(fake)
+    assert files["Rooms/205/b.jpg"] == b"someone else's"
+    assert files["Rooms/205/c.jpg"] == jpeg(120)
+
+
+def manifest(repo):
+    return json.loads(head_files(repo)["manifest.json"])
+
+
+def test_admin_writes_rewrite_the_manifest_in_the_same_commit(repo):
+    fake = repo({"Rooms/205/info.txt": b"Lab", "Rooms/206/info.txt": b"Office"})
+    run_upload([upload(jpeg(60), "x.jpg")])
+    assert len(fake.commits) == 2
+    rooms = manifest(fake)['rooms']
+    assert rooms['205'] == {'info': "Lab", 'info_sha': blob_sha(b"Lab"), 'media': ["a.jpg"], 'points': {}}
+    assert rooms['206']['info'] == "Office"
+
+    assert run_check("create_subfolder", "205", "Point A", upload(jpeg(10), "t.jpg"), "Door")
+    assert run_check("update_subfolder_info", "205", "Point A", "Side door")
+    assert run_check("rename_file", "Rooms/205/a.jpg", "b.jpg")
+    rooms = manifest(fake)['rooms']
+    assert rooms['205']['media'] == ["b.jpg"]
+    assert rooms['205']['points'] == {'Point A': {'info': "Side door", 'info_sha': blob_sha(b"Side door"),
+                                                  'thumbnail': True, 'media': []}}
+
+    assert run_check("delete_room", "206")
+    assert list(manifest(fake)['rooms']) == ["205"]
+    assert len(fake.commits) == 6
+
+
+def test_manifest_rereads_info_edited_outside_the_admin_app(repo):
+    fake = repo({"Rooms/205/info.txt": b"Lab", "Rooms/206/info.txt": b"Office"})
+    run_upload([upload(jpeg(60), "x.jpg")])
+    # A commit made on GitHub directly leaves manifest.json behind
+    fake.commit_files("Edit", dict(fake.files_at(fake.branch),
+                                   **{"Rooms/206/info.txt": fake.add_blob(b"Office, first floor")}))
+    run_upload([upload(jpeg(70), "y.jpg")])
+    assert manifest(fake)['rooms']['206']['info'] == "Office, first floor"
+
+
+def test_upload_continues_the_sequence_of_a_folder_with_inserted_names(repo):
+    files = {f"Rooms/321/Point B/{name}": b"" for name in ["info.txt", "thumbnail.jpg"]}
+    files.update({f"Rooms/321/Point B/{c}.jpg": jpeg(i) for i, c in enumerate("abcdefghi")})
+    files.update({"Rooms/321/Point B/ca.jpg": jpeg(100), "Rooms/321/Point B/ga.jpg": jpeg(110)})
+    repo(files)
+    results = run_upload([upload(jpeg(200), "x.jpg")], room="321", subfolder="Point B")
+    assert [name for name, _, _ in results] == ["j.jpg"]
+
+
+def test_upload_batch_steps_over_a_name_inserted_ahead(repo):
+    files = {"Rooms/205/info.txt": b"", "Rooms/205/ab.jpg": jpeg(250)}
+    files.update({f"Rooms/205/{c}.jpg": jpeg(i * 9) for i, c in enumerate(string.ascii_lowercase)})
+    fake = repo(files)
+    results = run_upload([upload(jpeg(3, (320, 240)), "x.jpg"), upload(jpeg(7, (320, 240)), "y.jpg")])
+    assert [name for name, _, _ in results] == ["ac.jpg", "ad.jpg"]
+    assert head_files(fake)["Rooms/205/ab.jpg"] == jpeg(250)
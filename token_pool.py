@@ -0,0 +1,93 @@
+import time
+import threading
+from http_metrics import InstrumentedSession
+
+# Process-wide pool of GitHub tokens.
+#
+# Quota is tracked from the X-RateLimit-* headers that every API response
+# already carries, so no /rate_limit probing is needed. Requests go out with
+# the token that has quota left; a rate-limited 403/429 marks the token as
+# exhausted until its reset time and the request is retried with the next
+# one. The pool is safe to share between concurrent Streamlit sessions.
+
+# Seconds to bench a token that was rate limited without a reset header
+DEFAULT_COOLDOWN = 60
+
+
+class TokenPool:
+    def __init__(self, tokens):
+        self._lock = threading.Lock()
+        # remaining is None until the first response for that token
+        self._state = [{'token': t, 'remaining': None, 'limit': None, 'reset': 0.0} for t in tokens]
+        self._current = 0
+
+    def __len__(self):
+        return len(self._state)
+
+    def acquire(self):
+        """Return the token to use next, or None if the pool is empty"""
+        with self._lock:
+            if not self._state:
+                return None
+            now = time.time()
+            count = len(self._state)
+            for offset in range(count):
+                index = (self._current + offset) % count
+                state = self._state[index]
+                if state['remaining'] != 0 or state['reset'] <= now:
+                    self._current = index
+                    return state['token']
+            # Everything is exhausted: use the token that resets first
+            state = min(self._state, key=lambda s: s['reset'])
+            return state['token']
+
+    def record(self, token, response):
+        """Update a token's quota from a response; return True if it was rate limited"""
+        headers = response.headers
+        limited = response.status_code in (403, 429) and (
+            headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in headers
+        )
+        with self._lock:
+            state = next((s for s in self._state if s['token'] == token), None)
+            if state is None:
+                return limited
+            if 'X-RateLimit-Remaining' in headers:
+                state['remaining'] = int(headers['X-RateLimit-Remaining'])
+                state['limit'] = int(headers.get('X-RateLimit-Limit', 0)) or state['limit']
+                state['reset'] = float(headers.get('X-RateLimit-Reset', 0))
+            if limited:
+                state['remaining'] = 0
+                if 'Retry-After' in headers:
+                    state['reset'] = time.time() + int(headers['Retry-After'])
+                elif state['reset'] <= time.time():
+                    state['reset'] = time.time() + DEFAULT_COOLDOWN
+                self._current = (self._state.index(state) + 1) % len(self._state)
+        return limited
+
+    def status(self):
+        """Return [(masked token, remaining, limit, reset epoch)] for display"""
+        with self._lock:
+            return [(f"…{s['token'][-4:]}", s['remaining'], s['limit'], s['reset']) for s in self._state]
+
+
+class TokenPoolSession(InstrumentedSession):
+    """Session that authenticates from a TokenPool and rotates when rate limited"""
+
+    def __init__(self, pool):
+        super().__init__()
+        self.pool = pool
+
+    def request(self, method, url, **kwargs):
+        headers = dict(kwargs.pop('headers', None) or {})
+        attempts = max(len(self.pool), 1)
+        for attempt in range(attempts):
+            if attempt and hasattr(kwargs.get('data'), 'seek'):
+                # Streamed bodies were consumed by the previous attempt
+                kwargs['data'].seek(0)
+            token = self.pool.acquire()
+            if token is not None:
+                headers['Authorization'] = f"token {token}"
+            response = super().request(method, url, headers=headers, **kwargs)
+            if token is None or not self.pool.record(token, response) or attempt == attempts - 1:
+                return response
+        return response
@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from git_data import call_with_retries
+from http_metrics import with_current_run
+
+# Bounded-concurrency upload executor.
+#
+# Each file of a batch runs as one job on a small thread pool. The HTTP calls
+# inside a job go through git_data.call_with_retries (re-exported here),
+# which retries transient failures with exponential backoff and full jitter.
+# Results come back in submission order whatever order the jobs finish in,
+# so callers can name files in selection order once the batch is done.
+
+DEFAULT_WORKERS = 4
+
+
+class UploadExecutor:
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self.max_workers = max_workers
+
+    def run(self, items, work, on_progress=None):
+        """Run work(item) for every item; return [(result, error)] in item order
+
+        on_progress(index, result, error) is called from the calling thread
+        as each job finishes, so it may safely update Streamlit elements.
+        """
+        outcomes = [None] * len(items)
+        work = with_current_run(work)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(work, item): index for index, item in enumerate(items)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    outcomes[index] = (future.result(), None)
+                except Exception as e:
+                    outcomes[index] = (None, e)
+                if on_progress is not None:
+                    on_progress(index, *outcomes[index])
+        return outcomes
@@ -0,0 +1,133 @@
+import io
+import os
+import json
+import shutil
+import base64
+import hashlib
+import tarfile
+import argparse
+import tempfile
+import requests
+from static_assets import SWIPER_VERSION, VENDOR_DIR
+
+# Vendor the front-end assets into static/ so the carousels never depend on
+# unpkg or raw.githubusercontent.com at view time.
+#
+# Swiper is pinned to one release and fetched from the npm registry with its
+# published integrity hash checked. Every asset is written under a
+# content-hashed name, so it can be cached forever (see asgi.py), and
+# static/assets.json maps logical names to the hashed files;
+# static_assets.asset_url reads it. Nothing is compressed here: Streamlit
+# gzips /app/static/ responses itself.
+#
+# The new files are built in a temporary directory and only swapped in once
+# everything has been fetched and checked, so a failed run leaves the
+# current assets alone. --local-only skips the registry and keeps the
+# Swiper files already vendored, if any.
+#
+# Streamlit serves static/ at /app/static/ once enableStaticServing is on
+# (see .streamlit/config.toml). Commit the generated files.
+
+SWIPER_FILES = ["swiper-bundle.min.js", "swiper-bundle.min.css"]
+LOCAL_FILES = ["logo_locorom.png"]
+STATIC_DIR = "static"
+ASSET_MAP = "assets.json"
+
+
+def fetch_swiper(version=SWIPER_VERSION):
+    """Return {filename: bytes} of the Swiper bundle files from the npm registry"""
+    meta = requests.get(f"https://registry.npmjs.org/swiper/{version}", timeout=30)
+    meta.raise_for_status()
+    dist = meta.json()['dist']
+    tarball = requests.get(dist['tarball'], timeout=60)
+    tarball.raise_for_status()
+
+    algorithm, expected = dist['integrity'].split('-', 1)
+    actual = base64.b64encode(hashlib.new(algorithm, tarball.content).digest()).decode()
+    if actual != expected:
+        raise ValueError(f"swiper {version} tarball failed its {algorithm} integrity check")
+
+    files = {}
+    with tarfile.open(fileobj=io.BytesIO(tarball.content), mode="r:gz") as tar:
+        for name in SWIPER_FILES:
+            files[name] = tar.extractfile(f"package/{name}").read()
+    return files
+
+
+def hashed_name(name, content):
+    stem, ext = name.split('.', 1)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}.{ext}"
+
+
+def write_asset(out_dir, name, content):
+    """Write content under its hashed name; return that name"""
+    filename = hashed_name(name, content)
+    with open(os.path.join(out_dir, filename), "wb") as f:
+        f.write(content)
+    return filename
+
+
+def current_assets(root, names):
+    """Return {name: bytes} of the given assets as currently vendored under root"""
+    try:
+        with open(os.path.join(root, STATIC_DIR, ASSET_MAP), encoding="utf-8") as f:
+            mapping = json.load(f)['assets']
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}
+    assets = {}
+    for name in names:
+        path = mapping.get(name)
+        if path is not None and os.path.exists(os.path.join(root, STATIC_DIR, path)):
+            with open(os.path.join(root, STATIC_DIR, path), "rb") as f:
+                assets[name] = f.read()
+    return assets
+
+
+def vendor(root, fetch=True):
+    swiper_names = [f"swiper/{name}" for name in SWIPER_FILES]
+    if fetch:
+        assets = {f"swiper/{name}": content for name, content in fetch_swiper().items()}
+    else:
+        assets = current_assets(root, swiper_names)
+    for name in LOCAL_FILES:
+        with open(os.path.join(root, name), "rb") as f:
+            assets[name] = f.read()
+
+    static_dir = os.path.join(root, STATIC_DIR)
+    out_dir = os.path.join(static_dir, VENDOR_DIR)
+    os.makedirs(static_dir, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f".{VENDOR_DIR}-", dir=static_dir)
+    try:
+        os.chmod(build_dir, 0o755)
+        mapping = {}
+        for name, content in assets.items():
+            filename = write_asset(build_dir, name.rsplit('/', 1)[-1], content)
+            mapping[name] = f"{VENDOR_DIR}/{filename}"
+            print(f"{name} -> {STATIC_DIR}/{mapping[name]} ({len(content)} bytes)")
+        with open(os.path.join(build_dir, ASSET_MAP), "w", encoding="utf-8") as f:
+            json.dump({'swiper_version': SWIPER_VERSION, 'assets': mapping}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+        # Swap the directory in, then the map that points into it
+        old_dir = build_dir + ".old"
+        if os.path.exists(out_dir):
+            os.replace(out_dir, old_dir)
+        os.replace(os.path.join(build_dir, ASSET_MAP), os.path.join(static_dir, ASSET_MAP))
+        os.replace(build_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vendor Swiper and the logo into static/")
+    parser.add_argument("--root", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="repository checkout to write static/ into")
+    parser.add_argument("--local-only", action="store_true",
+                        help="do not fetch Swiper; keep the vendored copy, if any")
+    args = parser.parse_args()
+    vendor(args.root, fetch=not args.local_only)
+
+
+if __name__ == "__main__":
+    main()